@@ -1,150 +1,195 @@
 import os
+import pathlib
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 DB_PATH = os.path.join(BASE_DIR, "database", "gestione.db")
 
-_connection = None
+# Profili di tuning (pragma per connessione). "desktop" è il default dell'app.
+PROFILI = {
+    # GUI: WAL + synchronous NORMAL (sicuro in WAL, un fsync per checkpoint invece che per commit)
+    "desktop": {"synchronous": "NORMAL", "cache_size": -16000, "mmap_size": 64 * 1024 * 1024, "temp_store": "MEMORY"},
+    # massima durabilità (es. PC senza UPS): fsync a ogni commit
+    "sicuro": {"synchronous": "FULL", "cache_size": -8000, "mmap_size": 0, "temp_store": "DEFAULT"},
+    # job notturni / import: cache e mmap grandi
+    "batch": {"synchronous": "NORMAL", "cache_size": -128000, "mmap_size": 512 * 1024 * 1024, "temp_store": "MEMORY"},
+}
+
+READ_POOL_SIZE = 4
+
+_profilo = dict(PROFILI[os.environ.get("GESTIONE_DB_PROFILO", "desktop")])
+
+_local = threading.local()           # una connessione di scrittura per thread
+_lock = threading.Lock()
+_open_connections = []               # tutte le connessioni aperte (per close_all)
+_generation = 0                      # incrementata da close_all: invalida le connessioni dei thread
+_read_pool = queue.LifoQueue()       # connessioni read-only riusabili
+
+
+def configure(db_path: str | None = None, profilo: str | None = None, **pragmas):
+    """
+    Cambia file DB e/o profilo di tuning. Chiude le connessioni aperte:
+    le nuove verranno create con le impostazioni aggiornate.
+    pragmas: override puntuali (synchronous, cache_size, mmap_size, temp_store).
+    """
+    global DB_PATH, _profilo
+    close_all()
+    if db_path is not None:
+        DB_PATH = db_path
+    if profilo is not None:
+        _profilo = dict(PROFILI[profilo])
+    _profilo.update(pragmas)
+
+
+def profilo_corrente() -> dict:
+    """Pragma in uso (una copia): configure(**profilo_corrente()) li ripristina."""
+    return dict(_profilo)
+
+
+def _apply_pragmas(conn: sqlite3.Connection):
+    conn.execute("PRAGMA foreign_keys = ON;")  # IMPORTANTISSIMO in SQLite
+    conn.execute(f"PRAGMA synchronous = {_profilo['synchronous']};")
+    conn.execute(f"PRAGMA cache_size = {int(_profilo['cache_size'])};")
+    conn.execute(f"PRAGMA mmap_size = {int(_profilo['mmap_size'])};")
+    conn.execute(f"PRAGMA temp_store = {_profilo['temp_store']};")
+
+
+def _open_connection(readonly: bool = False) -> sqlite3.Connection:
+    if readonly:
+        # le connessioni del pool passano da un thread all'altro
+        # as_uri(): percorso assoluto con "%", "?", "#" e spazi codificati
+        uri = pathlib.Path(DB_PATH).resolve().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(DB_PATH)
+        # WAL: i lettori non bloccano lo scrittore (e viceversa); persistente nel file
+        conn.execute("PRAGMA journal_mode = WAL;")
+    conn.row_factory = sqlite3.Row
+    _apply_pragmas(conn)
+
+    with _lock:
+        _open_connections.append(conn)
+    return conn
 
 
 def get_connection():
-    global _connection
-    if _connection is None:
-        _connection = sqlite3.connect(DB_PATH)
-        _connection.row_factory = sqlite3.Row
-        _connection.execute("PRAGMA foreign_keys = ON;")  # IMPORTANTISSIMO in SQLite
-    return _connection
+    """Connessione di lettura/scrittura del thread corrente (una per thread)."""
+    conn = getattr(_local, "connection", None)
+    if conn is None or getattr(_local, "generation", None) != _generation:
+        conn = _open_connection()
+        _local.connection = conn
+        _local.generation = _generation
+        _local.tx_depth = 0
+    return conn
+
+
+@contextmanager
+def transaction():
+    """
+    Unità di lavoro sulla connessione del thread corrente:
+
+        with transaction() as conn:
+            conn.execute(...)
+            altra_funzione_repo(...)   # se apre a sua volta transaction(), diventa un SAVEPOINT
+
+    Il livello più esterno fa BEGIN IMMEDIATE ... COMMIT (un solo fsync); i livelli annidati
+    usano SAVEPOINT/RELEASE. Un'eccezione annulla solo il livello in cui è nata (ROLLBACK TO)
+    e poi risale: se nessuno la gestisce, salta tutta la transazione.
+    """
+    conn = get_connection()
+    depth = getattr(_local, "tx_depth", 0)
+    savepoint = f"sp_{depth}"
+
+    if depth == 0:
+        conn.execute("BEGIN IMMEDIATE")
+    else:
+        conn.execute(f"SAVEPOINT {savepoint}")
+    _local.tx_depth = depth + 1
+
+    try:
+        yield conn
+    except BaseException:
+        _local.tx_depth = depth
+        if depth == 0:
+            conn.rollback()
+        else:
+            conn.execute(f"ROLLBACK TO {savepoint}")
+            conn.execute(f"RELEASE {savepoint}")
+        raise
+    else:
+        _local.tx_depth = depth
+        if depth == 0:
+            conn.commit()
+        else:
+            conn.execute(f"RELEASE {savepoint}")
+
+
+@contextmanager
+def read_connection():
+    """
+    Connessione read-only presa dal pool (report, prefetch, job in background).
+    In WAL legge uno snapshot coerente senza bloccare chi scrive.
+    """
+    try:
+        conn = _read_pool.get_nowait()
+    except queue.Empty:
+        get_connection()  # il file deve esistere (e avere già il WAL) prima di aprirlo read-only
+        conn = _open_connection(readonly=True)
+
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        if _read_pool.qsize() < READ_POOL_SIZE:
+            _read_pool.put(conn)
+        else:
+            _forget(conn)
+
+
+def _forget(conn: sqlite3.Connection):
+    with _lock:
+        if conn in _open_connections:
+            _open_connections.remove(conn)
+    conn.close()
+
+
+def close_all():
+    """Chiude tutte le connessioni (di ogni thread e del pool)."""
+    global _generation
+    with _lock:
+        _generation += 1
+        conns = list(_open_connections)
+        _open_connections.clear()
+    for conn in conns:
+        try:
+            conn.close()
+        except sqlite3.ProgrammingError:
+            # connessione di un altro thread: verrà chiusa dal garbage collector
+            pass
+
+    while not _read_pool.empty():
+        _read_pool.get_nowait()
 
 
 def reset_db():
     """Cancella fisicamente il file DB e lo ricrea pulito."""
-    global _connection
-    if _connection is not None:
-        _connection.close()
-        _connection = None
+    close_all()
 
-    if os.path.exists(DB_PATH):
-        os.remove(DB_PATH)
+    for path in (DB_PATH, DB_PATH + "-wal", DB_PATH + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
 
     init_db()
 
 
 def init_db():
-    conn = get_connection()
-    cur = conn.cursor()
-
-    # --- CLIENTI ---
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS clienti (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL,
-            cognome TEXT NOT NULL,
-            telefono TEXT,
-            indirizzo TEXT,
-            email TEXT
-        );
-    """)
-
-    # --- DIPENDENTI ---
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS dipendenti (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL,
-            cognome TEXT NOT NULL,
-            telefono TEXT,
-            email TEXT,
-            mansione TEXT,
-            ore_settimanali INTEGER,
-            stipendio REAL,
-            scadenza_contratto TEXT
-        );
-    """)
-
-    # --- SERVIZI ---
-    # "prezzo_orario" -> sostituito con "prezzo_mensile"
-    # campi extra utili: durata_default_ore, attivo
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS servizi (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL,
-            descrizione TEXT,
-            prezzo_mensile REAL,
-            durata_default_ore REAL,
-            attivo INTEGER NOT NULL DEFAULT 1
-        );
-    """)
-
-    # --- INTERVENTI (istanze reali) ---
-    # NIENTE dipendente_id qui: la relazione è N-N su interventi_dipendenti
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS interventi (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            cliente_id INTEGER NOT NULL,
-            servizio_id INTEGER NOT NULL,
-            data TEXT NOT NULL,        -- YYYY-MM-DD
-            ora_inizio TEXT NOT NULL,  -- HH:MM
-            durata_ore REAL,
-            stato TEXT NOT NULL DEFAULT 'Programmato',
-            note TEXT,
-            ricorrente_id INTEGER,
-            FOREIGN KEY (cliente_id) REFERENCES clienti(id) ON DELETE RESTRICT,
-            FOREIGN KEY (servizio_id) REFERENCES servizi(id) ON DELETE RESTRICT,
-            FOREIGN KEY (ricorrente_id) REFERENCES interventi_ricorrenti(id) ON DELETE SET NULL
-        );
-    """)
-
-    # --- N-N dipendenti su interventi reali ---
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS interventi_dipendenti (
-            intervento_id INTEGER NOT NULL,
-            dipendente_id INTEGER NOT NULL,
-            PRIMARY KEY (intervento_id, dipendente_id),
-            FOREIGN KEY (intervento_id) REFERENCES interventi(id) ON DELETE CASCADE,
-            FOREIGN KEY (dipendente_id) REFERENCES dipendenti(id) ON DELETE CASCADE
-        );
-    """)
-
-    # --- INTERVENTI RICORRENTI (modello) ---
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS interventi_ricorrenti (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            cliente_id INTEGER NOT NULL,
-            servizio_id INTEGER NOT NULL,
-            ora_inizio TEXT NOT NULL,
-            durata_ore REAL,
-            data_inizio TEXT,   -- YYYY-MM-DD (opzionale)
-            data_fine TEXT,     -- YYYY-MM-DD (opzionale)
-            attivo INTEGER NOT NULL DEFAULT 1,
-            note TEXT,
-            FOREIGN KEY (cliente_id) REFERENCES clienti(id) ON DELETE RESTRICT,
-            FOREIGN KEY (servizio_id) REFERENCES servizi(id) ON DELETE RESTRICT
-        );
-    """)
-
-    # --- Giorni della settimana per ricorrenti (0=Lun ... 6=Dom oppure come preferisci) ---
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS interventi_ricorrenti_giorni (
-            ricorrente_id INTEGER NOT NULL,
-            giorno_settimana INTEGER NOT NULL,
-            PRIMARY KEY (ricorrente_id, giorno_settimana),
-            FOREIGN KEY (ricorrente_id) REFERENCES interventi_ricorrenti(id) ON DELETE CASCADE
-        );
-    """)
-
-    # --- N-N dipendenti su ricorrenti ---
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS ricorrenti_dipendenti (
-            ricorrente_id INTEGER NOT NULL,
-            dipendente_id INTEGER NOT NULL,
-            PRIMARY KEY (ricorrente_id, dipendente_id),
-            FOREIGN KEY (ricorrente_id) REFERENCES interventi_ricorrenti(id) ON DELETE CASCADE,
-            FOREIGN KEY (dipendente_id) REFERENCES dipendenti(id) ON DELETE CASCADE
-        );
-    """)
-
-    # --- Indici utili (velocizzano calendario/ricerche) ---
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_interventi_data ON interventi(data);")
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_interventi_cliente ON interventi(cliente_id);")
-    cur.execute("CREATE INDEX IF NOT EXISTS idx_interventi_servizio ON interventi(servizio_id);")
-
-    conn.commit()
+    """
+    Porta lo schema all'ultima versione (vedi database/migrations.py).
+    Se il DB è già aggiornato costa una sola lettura di PRAGMA user_version.
+    """
+    from database.migrations import migrate
+    migrate()
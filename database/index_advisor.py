@@ -0,0 +1,125 @@
+"""
+Index advisor: esegue EXPLAIN QUERY PLAN sulle query "calde" registrate dai repository
+e segnala le scansioni complete di tabella (SCAN senza indice) e gli ordinamenti in
+tabella temporanea.
+
+Le query si registrano nel modulo che le usa con registra_query(nome, sql); i parametri
+vengono legati a NULL (al planner serve solo sapere che ci sono).
+
+Uso, dopo ogni modifica allo schema:
+
+    python -m database.index_advisor [--db percorso.db]
+
+Esce con codice 1 se trova scansioni non ammesse.
+"""
+import argparse
+import importlib
+import re
+import sys
+from dataclasses import dataclass, field
+
+from database.database import get_connection
+
+# moduli che registrano query: importati da analizza() per popolare il registro
+MODULI_QUERY = (
+    "database.repositories.interventi_repo",
+    "database.repositories.ricorrenti_repo",
+    "database.repositories.fatturazione_repo",
+    "database.repositories.esportazione_repo",
+    "models.cliente",
+    "models.dipendenti",
+    "models.servizi",
+    "services.importa",
+)
+
+QUERY_REGISTRATE = {}  # nome -> (sql, alias con scansione ammessa)
+
+
+def registra_query(nome: str, sql: str, scansioni_ammesse=()) -> str:
+    """
+    Registra una query per l'advisor e la restituisce (si può usare come costante).
+    scansioni_ammesse: alias/tabelle per cui una SCAN è voluta (es. tabelle piccole).
+    """
+    QUERY_REGISTRATE[nome] = (sql, tuple(scansioni_ammesse))
+    return sql
+
+
+@dataclass
+class Esito:
+    nome: str
+    piano: list = field(default_factory=list)       # righe "detail" di EXPLAIN QUERY PLAN
+    scansioni: list = field(default_factory=list)   # SCAN senza indice non ammesse
+    ordinamenti: list = field(default_factory=list)  # USE TEMP B-TREE ...
+
+    @property
+    def ok(self) -> bool:
+        return not self.scansioni
+
+
+_RE_SCAN = re.compile(r"^SCAN (\w+)(.*)$")
+
+
+def _parametri_nulli(sql: str):
+    nomi = re.findall(r":(\w+)", sql)
+    if nomi:
+        return {n: None for n in nomi}
+    return (None,) * sql.count("?")
+
+
+def spiega(conn, sql: str) -> list[str]:
+    rows = conn.execute("EXPLAIN QUERY PLAN " + sql, _parametri_nulli(sql)).fetchall()
+    return [r["detail"] for r in rows]
+
+
+def analizza(conn=None) -> list[Esito]:
+    for modulo in MODULI_QUERY:
+        importlib.import_module(modulo)
+
+    conn = conn or get_connection()
+    out = []
+    for nome, (sql, ammesse) in sorted(QUERY_REGISTRATE.items()):
+        esito = Esito(nome, spiega(conn, sql))
+        for detail in esito.piano:
+            m = _RE_SCAN.match(detail)
+            # "SCAN x USING INDEX" è una visita ordinata dell'indice (con LIMIT si ferma subito)
+            if m and "USING" not in m.group(2) and "VIRTUAL TABLE" not in m.group(2):
+                if m.group(1) not in ammesse:
+                    esito.scansioni.append(detail)
+            elif detail.startswith("USE TEMP B-TREE"):
+                esito.ordinamenti.append(detail)
+        out.append(esito)
+    return out
+
+
+def report(esiti: list[Esito]) -> str:
+    righe = []
+    for e in esiti:
+        righe.append(f"[{'OK' if e.ok else 'SCAN'}] {e.nome}")
+        for d in e.scansioni:
+            righe.append(f"    scansione completa: {d}")
+        for d in e.ordinamenti:
+            righe.append(f"    ordinamento temporaneo: {d}")
+    problemi = sum(1 for e in esiti if not e.ok)
+    righe.append(f"{len(esiti)} query analizzate, {problemi} con scansioni complete")
+    return "\n".join(righe)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Controlla i piani delle query registrate")
+    parser.add_argument("--db", help="percorso del database (default: database/gestione.db)")
+    args = parser.parse_args(argv)
+
+    # con "python -m" questo file è __main__: il registro popolato dai repository
+    # è quello del modulo database.index_advisor
+    from database import database as db, index_advisor
+    if args.db:
+        db.configure(db_path=args.db)
+    db.init_db()
+
+    esiti = index_advisor.analizza()
+    print(index_advisor.report(esiti))
+    return 0 if all(e.ok for e in esiti) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,346 @@
+"""
+Migrazioni dello schema, versionate con PRAGMA user_version.
+
+Ogni passo è una funzione registrata con @migrazione(N, "descrizione") e viene applicato
+una sola volta, in ordine, dentro una transazione (DDL compreso: in SQLite è transazionale).
+All'avvio, se user_version è già all'ultima versione, non si esegue nessun DDL.
+
+Per evolvere lo schema: aggiungere in fondo un nuovo passo con il numero successivo.
+Non modificare mai un passo già rilasciato.
+"""
+from database.database import get_connection, transaction
+
+MIGRAZIONI = []  # [(versione, descrizione, funzione)] in ordine crescente
+
+
+def migrazione(versione: int, descrizione: str):
+    def register(fn):
+        if MIGRAZIONI and versione <= MIGRAZIONI[-1][0]:
+            raise ValueError(f"Migrazione {versione} fuori ordine")
+        MIGRAZIONI.append((versione, descrizione, fn))
+        return fn
+    return register
+
+
+def ultima_versione() -> int:
+    return MIGRAZIONI[-1][0] if MIGRAZIONI else 0
+
+
+def versione_corrente(conn=None) -> int:
+    conn = conn or get_connection()
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate() -> list[int]:
+    """Applica le migrazioni mancanti. Restituisce le versioni applicate (vuota se già aggiornato)."""
+    conn = get_connection()
+    if versione_corrente(conn) >= ultima_versione():
+        return []
+
+    applicate = []
+    for versione, descrizione, fn in MIGRAZIONI:
+        with transaction() as conn:
+            # riletta dentro la transazione: un altro processo potrebbe averla già applicata
+            if versione_corrente(conn) >= versione:
+                continue
+            fn(conn)
+            conn.execute(f"PRAGMA user_version = {int(versione)}")
+        applicate.append(versione)
+    return applicate
+
+
+# ---------------------------------------------------------
+#  HELPER (idempotenti: si possono usare anche su DB "a metà")
+# ---------------------------------------------------------
+def colonna_esiste(conn, tabella: str, colonna: str) -> bool:
+    return any(r["name"] == colonna for r in conn.execute(f"PRAGMA table_info({tabella})"))
+
+
+def aggiungi_colonna(conn, tabella: str, colonna: str, definizione: str):
+    """ALTER TABLE ... ADD COLUMN solo se manca (operazione O(1), non riscrive la tabella)."""
+    if not colonna_esiste(conn, tabella, colonna):
+        conn.execute(f"ALTER TABLE {tabella} ADD COLUMN {colonna} {definizione}")
+
+
+# ---------------------------------------------------------
+#  PASSI
+# ---------------------------------------------------------
+@migrazione(1, "schema iniziale")
+def _m001_schema_iniziale(conn):
+    # IF NOT EXISTS: i DB creati prima delle migrazioni (user_version = 0) hanno già le tabelle
+
+    # --- CLIENTI ---
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS clienti (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            cognome TEXT NOT NULL,
+            telefono TEXT,
+            indirizzo TEXT,
+            email TEXT
+        );
+    """)
+
+    # --- DIPENDENTI ---
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS dipendenti (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            cognome TEXT NOT NULL,
+            telefono TEXT,
+            email TEXT,
+            mansione TEXT,
+            ore_settimanali INTEGER,
+            stipendio REAL,
+            scadenza_contratto TEXT
+        );
+    """)
+
+    # --- SERVIZI ---
+    # "prezzo_orario" -> sostituito con "prezzo_mensile"
+    # campi extra utili: durata_default_ore, attivo
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS servizi (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            descrizione TEXT,
+            prezzo_mensile REAL,
+            durata_default_ore REAL,
+            attivo INTEGER NOT NULL DEFAULT 1
+        );
+    """)
+
+    # --- INTERVENTI (istanze reali) ---
+    # NIENTE dipendente_id qui: la relazione è N-N su interventi_dipendenti
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS interventi (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente_id INTEGER NOT NULL,
+            servizio_id INTEGER NOT NULL,
+            data TEXT NOT NULL,        -- YYYY-MM-DD
+            ora_inizio TEXT NOT NULL,  -- HH:MM
+            durata_ore REAL,
+            stato TEXT NOT NULL DEFAULT 'Programmato',
+            note TEXT,
+            ricorrente_id INTEGER,
+            FOREIGN KEY (cliente_id) REFERENCES clienti(id) ON DELETE RESTRICT,
+            FOREIGN KEY (servizio_id) REFERENCES servizi(id) ON DELETE RESTRICT,
+            FOREIGN KEY (ricorrente_id) REFERENCES interventi_ricorrenti(id) ON DELETE SET NULL
+        );
+    """)
+
+    # --- N-N dipendenti su interventi reali ---
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS interventi_dipendenti (
+            intervento_id INTEGER NOT NULL,
+            dipendente_id INTEGER NOT NULL,
+            PRIMARY KEY (intervento_id, dipendente_id),
+            FOREIGN KEY (intervento_id) REFERENCES interventi(id) ON DELETE CASCADE,
+            FOREIGN KEY (dipendente_id) REFERENCES dipendenti(id) ON DELETE CASCADE
+        );
+    """)
+
+    # --- INTERVENTI RICORRENTI (modello) ---
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS interventi_ricorrenti (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente_id INTEGER NOT NULL,
+            servizio_id INTEGER NOT NULL,
+            ora_inizio TEXT NOT NULL,
+            durata_ore REAL,
+            data_inizio TEXT,   -- YYYY-MM-DD (opzionale)
+            data_fine TEXT,     -- YYYY-MM-DD (opzionale)
+            attivo INTEGER NOT NULL DEFAULT 1,
+            note TEXT,
+            FOREIGN KEY (cliente_id) REFERENCES clienti(id) ON DELETE RESTRICT,
+            FOREIGN KEY (servizio_id) REFERENCES servizi(id) ON DELETE RESTRICT
+        );
+    """)
+
+    # --- Giorni della settimana per ricorrenti (0=Lun ... 6=Dom oppure come preferisci) ---
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS interventi_ricorrenti_giorni (
+            ricorrente_id INTEGER NOT NULL,
+            giorno_settimana INTEGER NOT NULL,
+            PRIMARY KEY (ricorrente_id, giorno_settimana),
+            FOREIGN KEY (ricorrente_id) REFERENCES interventi_ricorrenti(id) ON DELETE CASCADE
+        );
+    """)
+
+    # --- N-N dipendenti su ricorrenti ---
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ricorrenti_dipendenti (
+            ricorrente_id INTEGER NOT NULL,
+            dipendente_id INTEGER NOT NULL,
+            PRIMARY KEY (ricorrente_id, dipendente_id),
+            FOREIGN KEY (ricorrente_id) REFERENCES interventi_ricorrenti(id) ON DELETE CASCADE,
+            FOREIGN KEY (dipendente_id) REFERENCES dipendenti(id) ON DELETE CASCADE
+        );
+    """)
+
+    # --- Indici utili (velocizzano calendario/ricerche) ---
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_interventi_data ON interventi(data);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_interventi_cliente ON interventi(cliente_id);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_interventi_servizio ON interventi(servizio_id);")
+
+
+@migrazione(2, "indici su tabelle ponte e ricerche (index advisor)")
+def _m002_indici(conn):
+    # lookup inversi sulle tabelle N-N: la PK (x_id, dipendente_id) non serve per dipendente_id.
+    # Indici composti = coprenti anche per il join verso l'intervento/regola.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_interventi_dipendenti_dip "
+                 "ON interventi_dipendenti(dipendente_id, intervento_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_ricorrenti_dipendenti_dip "
+                 "ON ricorrenti_dipendenti(dipendente_id, ricorrente_id)")
+
+    # controlli "in uso" prima di eliminare clienti/servizi
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_ricorrenti_cliente ON interventi_ricorrenti(cliente_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_ricorrenti_servizio ON interventi_ricorrenti(servizio_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_ricorrenti_ora ON interventi_ricorrenti(ora_inizio)")
+
+    # stesso ordine della paginazione (data DESC, ora ASC): niente sort temporaneo.
+    # Copre anche le ricerche per sola data, quindi sostituisce idx_interventi_data.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_interventi_data_ora ON interventi(data DESC, ora_inizio)")
+    conn.execute("DROP INDEX IF EXISTS idx_interventi_data")
+
+
+@migrazione(3, "chiavi normalizzate per i duplicati (nome_norm / cognome_norm)")
+def _m003_chiavi_normalizzate(conn):
+    # calcolate in Python (casefold non esiste in SQL) e mantenute dai model ad ogni scrittura
+    from services.normalizza import norm_nome
+
+    for tabella, colonne in (("clienti", ("nome", "cognome")),
+                             ("dipendenti", ("nome", "cognome")),
+                             ("servizi", ("nome",))):
+        for col in colonne:
+            aggiungi_colonna(conn, tabella, f"{col}_norm", "TEXT")
+
+        righe = conn.execute(f"SELECT id, {', '.join(colonne)} FROM {tabella}").fetchall()
+        set_sql = ", ".join(f"{col}_norm = ?" for col in colonne)
+        conn.executemany(
+            f"UPDATE {tabella} SET {set_sql} WHERE id = ?",
+            [tuple(norm_nome(r[col]) for col in colonne) + (r["id"],) for r in righe],
+        )
+
+    # non UNIQUE: i DB esistenti potrebbero già contenere doppioni
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_clienti_norm ON clienti(cognome_norm, nome_norm)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_dipendenti_norm ON dipendenti(cognome_norm, nome_norm)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_servizi_norm ON servizi(nome_norm)")
+
+
+# Indice di ricerca full-text: una sola tabella FTS5 per tutte le entità.
+# rowid = id * 8 + codice tipo, così i trigger aggiornano/cancellano per rowid (O(log n))
+# e dal rowid si ricava (tipo, id) senza colonne extra.
+TIPI_RICERCA = {1: "cliente", 2: "dipendente", 3: "servizio", 4: "intervento", 5: "ricorrente"}
+
+_SORGENTI_RICERCA = (
+    # (tabella, codice, titolo, testo, condizione per indicizzare la riga)
+    ("clienti", 1,
+     "coalesce({r}.nome, '') || ' ' || coalesce({r}.cognome, '')",
+     "coalesce({r}.indirizzo, '') || ' ' || coalesce({r}.email, '') || ' ' || coalesce({r}.telefono, '')",
+     "1"),
+    ("dipendenti", 2,
+     "coalesce({r}.nome, '') || ' ' || coalesce({r}.cognome, '')",
+     "coalesce({r}.mansione, '') || ' ' || coalesce({r}.email, '') || ' ' || coalesce({r}.telefono, '')",
+     "1"),
+    ("servizi", 3, "coalesce({r}.nome, '')", "coalesce({r}.descrizione, '')", "1"),
+    # degli interventi interessano solo le note (cliente/servizio sono già indicizzati)
+    ("interventi", 4, "''", "{r}.note", "coalesce({r}.note, '') != ''"),
+    ("interventi_ricorrenti", 5, "''", "{r}.note", "coalesce({r}.note, '') != ''"),
+)
+
+
+@migrazione(4, "ricerca full-text (FTS5) con trigger")
+def _m004_ricerca(conn):
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS ricerca USING fts5(
+            titolo, testo,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """)
+    conn.execute("DELETE FROM ricerca")  # ricostruito da zero sotto (idempotente)
+
+    for tabella, codice, titolo, testo, condizione in _SORGENTI_RICERCA:
+        def inserisci(r):
+            return (f"INSERT INTO ricerca(rowid, titolo, testo) "
+                    f"SELECT {r}.id * 8 + {codice}, {titolo.format(r=r)}, {testo.format(r=r)} "
+                    f"WHERE {condizione.format(r=r)};")
+
+        cancella = f"DELETE FROM ricerca WHERE rowid = old.id * 8 + {codice};"
+
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{tabella}_ricerca_ins AFTER INSERT ON {tabella} "
+                     f"BEGIN {inserisci('new')} END")
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{tabella}_ricerca_upd AFTER UPDATE ON {tabella} "
+                     f"BEGIN {cancella} {inserisci('new')} END")
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{tabella}_ricerca_del AFTER DELETE ON {tabella} "
+                     f"BEGIN {cancella} END")
+
+        # righe già presenti
+        conn.execute(f"INSERT INTO ricerca(rowid, titolo, testo) "
+                     f"SELECT t.id * 8 + {codice}, {titolo.format(r='t')}, {testo.format(r='t')} "
+                     f"FROM {tabella} t WHERE {condizione.format(r='t')}")
+
+
+@migrazione(5, "fatturazione: riepiloghi dei mesi chiusi")
+def _m005_fatturazione(conn):
+    # mese chiuso = fatture emesse: righe congelate (nomi e prezzi copiati), mai ricalcolate.
+    # Niente FK verso clienti/servizi: una fattura resta anche se il cliente viene eliminato.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS fatturazione_mesi (
+            mese TEXT PRIMARY KEY,          -- YYYY-MM
+            chiuso_il TEXT NOT NULL,        -- YYYY-MM-DD HH:MM:SS
+            n_clienti INTEGER NOT NULL,
+            totale REAL NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS fatturazione_righe (
+            mese TEXT NOT NULL,
+            cliente_id INTEGER NOT NULL,
+            servizio_id INTEGER NOT NULL,
+            cliente TEXT NOT NULL,
+            servizio TEXT NOT NULL,
+            prezzo_mensile REAL NOT NULL,
+            quota REAL NOT NULL,            -- frazione del mese fatturata (0..1)
+            importo REAL NOT NULL,
+            n_singoli INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (mese, cliente_id, servizio_id),
+            FOREIGN KEY (mese) REFERENCES fatturazione_mesi(mese) ON DELETE CASCADE
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_fatturazione_righe_cliente "
+                 "ON fatturazione_righe(cliente_id, mese)")
+
+
+@migrazione(6, "ricorrenti: data di sospensione per la fatturazione")
+def _m006_sospeso_dal(conn):
+    # giorno da cui la regola è sospesa (attivo = 0), scritto da ricorrenti_repo al passaggio
+    # attivo -> sospeso: i mesi precedenti si fatturano come se la regola fosse ancora attiva.
+    # Le regole già sospese restano senza data: non si sa da quando, non si fatturano.
+    aggiungi_colonna(conn, "interventi_ricorrenti", "sospeso_dal", "TEXT")
+
+
+@migrazione(7, "ricorrenti: periodi di sospensione")
+def _m007_sospensioni(conn):
+    # un periodo per ogni sospensione, chiuso alla riattivazione: sospeso_dal teneva solo l'ultima
+    # e veniva azzerato riattivando, così i mesi aperti fatturavano anche i giorni sospesi.
+    # dal NULL = da sempre (regole sospese prima che si registrasse la data), al NULL = ancora sospesa.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ricorrenti_sospensioni (
+            ricorrente_id INTEGER NOT NULL,
+            dal TEXT,           -- YYYY-MM-DD, primo giorno sospeso
+            al TEXT,            -- YYYY-MM-DD, ultimo giorno sospeso
+            FOREIGN KEY (ricorrente_id) REFERENCES interventi_ricorrenti(id) ON DELETE CASCADE
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_ricorrenti_sospensioni "
+                 "ON ricorrenti_sospensioni(ricorrente_id, dal)")
+    # le regole sospese oggi diventano sospensioni aperte (DROP COLUMN: SQLite >= 3.35)
+    ha_data = colonna_esiste(conn, "interventi_ricorrenti", "sospeso_dal")
+    conn.execute(f"""
+        INSERT INTO ricorrenti_sospensioni(ricorrente_id, dal)
+        SELECT id, {'sospeso_dal' if ha_data else 'NULL'} FROM interventi_ricorrenti WHERE attivo = 0
+    """)
+    if ha_data:
+        conn.execute("ALTER TABLE interventi_ricorrenti DROP COLUMN sospeso_dal")
@@ -0,0 +1,79 @@
+"""
+Letture in streaming per l'esportazione (services.esporta): le righe escono a blocchi
+con fetchmany da una connessione read-only del pool, senza mai caricare la tabella intera.
+Ogni riga è autosufficiente (nomi e dipendenti già risolti in SQL), quindi si può
+scrivere appena letta.
+"""
+from __future__ import annotations
+
+from database.database import read_connection
+from database.index_advisor import registra_query
+
+BLOCCO = 500
+
+# ordine per id (chiave primaria): nessun ordinamento temporaneo, memoria costante.
+# Le colonne sono quelle accettate dall'import (services.importa): l'export si reimporta.
+COLONNE_ANAGRAFICHE = {
+    "clienti": ("id", "nome", "cognome", "telefono", "indirizzo", "email"),
+    "dipendenti": ("id", "nome", "cognome", "telefono", "email", "mansione",
+                   "ore_settimanali", "stipendio", "scadenza_contratto"),
+    "servizi": ("id", "nome", "descrizione", "prezzo_mensile", "durata_default_ore", "attivo"),
+}
+
+_SQL_ANAGRAFICA = {
+    tabella: registra_query(f"esporta_{tabella}",
+                            f"SELECT {', '.join(colonne)} FROM {tabella} ORDER BY id",
+                            scansioni_ammesse=(tabella,))
+    for tabella, colonne in COLONNE_ANAGRAFICHE.items()
+}
+
+COLONNE_INTERVENTI = ("id", "data", "ora_inizio", "durata_ore", "stato", "cliente_id", "cliente",
+                      "servizio_id", "servizio", "dipendenti", "note")
+
+_SQL_INTERVENTI = """
+    SELECT i.id, i.data, i.ora_inizio, i.durata_ore, i.stato,
+           i.cliente_id, c.nome || ' ' || c.cognome AS cliente,
+           i.servizio_id, s.nome AS servizio,
+           (SELECT group_concat(d.nome || ' ' || d.cognome, ', ')
+            FROM interventi_dipendenti x JOIN dipendenti d ON d.id = x.dipendente_id
+            WHERE x.intervento_id = i.id) AS dipendenti,
+           i.note
+    FROM interventi i
+    JOIN clienti c ON c.id = i.cliente_id
+    JOIN servizi s ON s.id = i.servizio_id
+    WHERE i.data BETWEEN :da AND :a {filtro}
+    ORDER BY i.data, i.ora_inizio, i.id
+"""
+# idx_interventi_data_ora dà già l'ordine per data: SQLite ordina solo dentro ogni giorno
+# (RIGHT PART OF ORDER BY), quindi il sorter tiene in memoria al massimo un giorno.
+
+_FILTRO_DIPENDENTE = """AND EXISTS (
+        SELECT 1 FROM interventi_dipendenti y
+        WHERE y.intervento_id = i.id AND y.dipendente_id = :dipendente_id)"""
+
+_SQL_INTERVENTI_TUTTI = registra_query("esporta_interventi", _SQL_INTERVENTI.format(filtro=""))
+_SQL_INTERVENTI_DIPENDENTE = registra_query("esporta_interventi_dipendente",
+                                            _SQL_INTERVENTI.format(filtro=_FILTRO_DIPENDENTE))
+
+
+def _scorri(sql: str, params=(), blocco: int = BLOCCO):
+    with read_connection() as conn:
+        cur = conn.execute(sql, params)
+        while True:
+            righe = cur.fetchmany(blocco)
+            if not righe:
+                return
+            yield from (tuple(r) for r in righe)
+
+
+def scorri_anagrafica(tabella: str, blocco: int = BLOCCO):
+    """Tuple nell'ordine di COLONNE_ANAGRAFICHE[tabella]."""
+    return _scorri(_SQL_ANAGRAFICA[tabella], (), blocco)
+
+
+def scorri_interventi(data_inizio: str, data_fine: str, dipendente_id: int | None = None,
+                      blocco: int = BLOCCO):
+    """SINGOLI con data in [data_inizio, data_fine], in ordine di data e ora (COLONNE_INTERVENTI)."""
+    params = {"da": data_inizio, "a": data_fine, "dipendente_id": dipendente_id}
+    sql = _SQL_INTERVENTI_TUTTI if dipendente_id is None else _SQL_INTERVENTI_DIPENDENTE
+    return _scorri(sql, params, blocco)
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime
+
+from database.database import get_connection, transaction
+from database.index_advisor import registra_query
+
+# ---------------------------------------------------------
+#  DATI DEL MESE (calcolo)
+# ---------------------------------------------------------
+# nomi e prezzo arrivano già col join: il calcolo di un mese sono tre sole query
+_SQL_RICORRENTI_MESE = registra_query("fatturazione_ricorrenti_mese", """
+    SELECT r.id, r.cliente_id, r.servizio_id, r.data_inizio, r.data_fine,
+           c.nome || ' ' || c.cognome AS cliente, s.nome AS servizio, s.prezzo_mensile
+    FROM interventi_ricorrenti r
+    JOIN clienti c ON c.id = r.cliente_id
+    JOIN servizi s ON s.id = r.servizio_id
+    WHERE (r.data_inizio IS NULL OR r.data_inizio <= :a)
+      AND (r.data_fine IS NULL OR r.data_fine >= :da)
+""", scansioni_ammesse=("r",))
+
+# poche righe (una per sospensione): la scansione costa meno di una ricerca per regola
+_SQL_SOSPENSIONI_MESE = registra_query("fatturazione_sospensioni_mese", """
+    SELECT ricorrente_id, dal, al
+    FROM ricorrenti_sospensioni
+    WHERE (dal IS NULL OR dal <= :a) AND (al IS NULL OR al >= :da)
+""", scansioni_ammesse=("ricorrenti_sospensioni",))
+
+_SQL_SINGOLI_MESE = registra_query("fatturazione_singoli_mese", """
+    SELECT i.cliente_id, i.servizio_id, COUNT(*) AS n, GROUP_CONCAT(DISTINCT i.data) AS giorni,
+           c.nome || ' ' || c.cognome AS cliente, s.nome AS servizio, s.prezzo_mensile
+    FROM interventi i
+    JOIN clienti c ON c.id = i.cliente_id
+    JOIN servizi s ON s.id = i.servizio_id
+    WHERE i.data BETWEEN :da AND :a AND i.stato <> 'Annullato'
+    GROUP BY i.cliente_id, i.servizio_id
+""")
+
+
+def ricorrenti_mese(data_inizio: str, data_fine: str) -> list[sqlite3.Row]:
+    """
+    Regole RICORRENTI il cui periodo tocca [data_inizio, data_fine], attive o no:
+    i giorni sospesi si tolgono con sospensioni_mese.
+    """
+    return get_connection().execute(_SQL_RICORRENTI_MESE, {"da": data_inizio, "a": data_fine}).fetchall()
+
+
+def sospensioni_mese(data_inizio: str, data_fine: str) -> dict[int, list[tuple]]:
+    """ricorrente_id -> [(dal, al)] delle sospensioni che toccano il periodo (None = senza limite)."""
+    out = {}
+    for r in get_connection().execute(_SQL_SOSPENSIONI_MESE, {"da": data_inizio, "a": data_fine}):
+        out.setdefault(r["ricorrente_id"], []).append((r["dal"], r["al"]))
+    return out
+
+
+def singoli_mese(data_inizio: str, data_fine: str) -> list[sqlite3.Row]:
+    """SINGOLI non annullati del periodo per (cliente, servizio): quanti e in quali giorni ("d1,d2,...")."""
+    return get_connection().execute(_SQL_SINGOLI_MESE, {"da": data_inizio, "a": data_fine}).fetchall()
+
+
+# ---------------------------------------------------------
+#  MESI CHIUSI (riepiloghi salvati)
+# ---------------------------------------------------------
+_SQL_RIGHE_CHIUSE = registra_query("fatturazione_righe_mese", """
+    SELECT mese, cliente_id, cliente, servizio_id, servizio, prezzo_mensile, quota, importo, n_singoli
+    FROM fatturazione_righe
+    WHERE mese = ?
+""")
+
+
+def get_mese_chiuso(mese: str) -> sqlite3.Row | None:
+    return get_connection().execute(
+        "SELECT mese, chiuso_il, n_clienti, totale FROM fatturazione_mesi WHERE mese = ?", (mese,)
+    ).fetchone()
+
+
+def get_mesi_chiusi() -> list[sqlite3.Row]:
+    return get_connection().execute(
+        "SELECT mese, chiuso_il, n_clienti, totale FROM fatturazione_mesi ORDER BY mese DESC"
+    ).fetchall()
+
+
+def get_righe_chiuse(mese: str) -> list[sqlite3.Row]:
+    return get_connection().execute(_SQL_RIGHE_CHIUSE, (mese,)).fetchall()
+
+
+def salva_mese_chiuso(mese: str, righe: list[tuple]) -> bool:
+    """
+    righe: (cliente_id, cliente, servizio_id, servizio, prezzo_mensile, quota, importo, n_singoli).
+    Testata e righe in un'unica transazione. False se il mese era già chiuso.
+    """
+    n_clienti = len({r[0] for r in righe})
+    totale = round(sum(r[6] for r in righe), 2)
+    try:
+        with transaction() as conn:
+            conn.execute("""
+                INSERT INTO fatturazione_mesi(mese, chiuso_il, n_clienti, totale)
+                VALUES (?, ?, ?, ?)
+            """, (mese, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), n_clienti, totale))
+            conn.executemany("""
+                INSERT INTO fatturazione_righe(mese, cliente_id, cliente, servizio_id, servizio,
+                                               prezzo_mensile, quota, importo, n_singoli)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(mese,) + tuple(r) for r in righe])
+    except sqlite3.IntegrityError:
+        return False  # chiuso nel frattempo da un altro processo
+    return True
+
+
+def elimina_mese_chiuso(mese: str) -> bool:
+    """Riapre il mese: testata e righe (ON DELETE CASCADE)."""
+    with transaction() as conn:
+        cur = conn.execute("DELETE FROM fatturazione_mesi WHERE mese = ?", (mese,))
+    return cur.rowcount > 0
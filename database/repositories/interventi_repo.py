@@ -1,58 +1,296 @@
-from database.database import get_connection
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from database.database import get_connection, transaction
+from database.index_advisor import registra_query
+from services.cache_calendario import invalida_date
+from services.ricorrenze import Regola, giorni_da_maschera
+
+
+@dataclass(slots=True)
+class RigaIntervento:
+    """
+    Riga "mista" della tabella interventi: un SINGOLO (istanza reale) o un RICORRENTE (regola).
+    Porta solo dati strutturati; la formattazione (nomi, giorni, periodo, durata) si fa in UI.
+    """
+    id_ref: int
+    tipo: str                       # 'SINGOLO' | 'RICORRENTE'
+    cliente_id: int
+    cliente_nome: str
+    cliente_cognome: str
+    servizio_id: int
+    servizio: str
+    ora: str                        # HH:MM
+    durata_min: Optional[int]       # durata in minuti
+    stato: str                      # singoli: Programmato/...; ricorrenti: Attivo/Sospeso
+    note: Optional[str] = None
+    data: Optional[str] = None      # SINGOLO: YYYY-MM-DD
+    maschera_giorni: int = 0        # RICORRENTE: bit (giorno-1), 1=Lun ... 7=Dom
+    data_inizio: Optional[str] = None
+    data_fine: Optional[str] = None
+    attivo: bool = True
+    dipendente_ids: Tuple[int, ...] = ()
+    dipendenti: Tuple[str, ...] = ()   # "Nome Cognome", stesso ordine di dipendente_ids
+
+    @property
+    def cliente(self) -> str:
+        return f"{self.cliente_nome} {self.cliente_cognome}"
+
+    @property
+    def durata_ore(self) -> Optional[float]:
+        return None if self.durata_min is None else self.durata_min / 60.0
+
+    @property
+    def giorni(self) -> list[int]:
+        return giorni_da_maschera(self.maschera_giorni)
+
+    def regola(self) -> Regola:
+        """Per i RICORRENTI: regola da passare al motore delle ricorrenze."""
+        return Regola.crea(self.id_ref, self.giorni, self.data_inizio, self.data_fine, self.attivo)
 
-def get_interventi_misti():
-    conn = get_connection()
-    cur = conn.cursor()
 
-    sql = """
-    -- SINGOLI (istanze reali)
+_SQL_SINGOLI = """
     SELECT
-      i.id AS id_ref,
-      'SINGOLO' AS tipo,
-      c.nome || ' ' || c.cognome AS cliente,
-      s.nome AS servizio,
-      COALESCE(GROUP_CONCAT(d.nome || ' ' || d.cognome, ', '), '-') AS dipendenti,
-      i.data AS data,
-      i.ora_inizio AS ora,
-      COALESCE(i.durata_ore, '') AS durata,
-      '-' AS giorni,
-      i.stato AS stato,
-      '-' AS periodo
+      i.id, i.cliente_id, c.nome AS cliente_nome, c.cognome AS cliente_cognome,
+      i.servizio_id, s.nome AS servizio, i.data, i.ora_inizio, i.stato, i.note,
+      CAST(ROUND(i.durata_ore * 60) AS INTEGER) AS durata_min
     FROM interventi i
     JOIN clienti c ON c.id = i.cliente_id
     JOIN servizi s ON s.id = i.servizio_id
-    LEFT JOIN interventi_dipendenti idp ON idp.intervento_id = i.id
-    LEFT JOIN dipendenti d ON d.id = idp.dipendente_id
-    GROUP BY i.id
+    WHERE {where}
+    ORDER BY i.data DESC, i.ora_inizio ASC, i.id ASC
+    {limit}
+"""
 
-    UNION ALL
+_SQL_SINGOLI_DIPENDENTI = """
+    SELECT idp.intervento_id AS ref, d.id, d.nome, d.cognome
+    FROM interventi i
+    JOIN interventi_dipendenti idp ON idp.intervento_id = i.id
+    JOIN dipendenti d ON d.id = idp.dipendente_id
+    WHERE {where}
+    ORDER BY idp.intervento_id, d.id
+"""
 
-    -- RICORRENTI (regole)
+_SQL_RICORRENTI = """
     SELECT
-      r.id AS id_ref,
-      'RICORRENTE' AS tipo,
-      c.nome || ' ' || c.cognome AS cliente,
-      s.nome AS servizio,
-      COALESCE(GROUP_CONCAT(DISTINCT d.nome || ' ' || d.cognome), '-') AS dipendenti,
-      '-' AS data,
-      r.ora_inizio AS ora,
-      COALESCE(r.durata_ore, '') AS durata,
-      COALESCE(GROUP_CONCAT(DISTINCT rg.giorno_settimana), '-') AS giorni,
-      CASE WHEN r.attivo=1 THEN 'Attivo' ELSE 'Sospeso' END AS stato,
-      (COALESCE(r.data_inizio,'-') || ' → ' || COALESCE(r.data_fine,'-')) AS periodo
+      r.id, r.cliente_id, c.nome AS cliente_nome, c.cognome AS cliente_cognome,
+      r.servizio_id, s.nome AS servizio, r.ora_inizio, r.attivo, r.note,
+      r.data_inizio, r.data_fine,
+      CAST(ROUND(r.durata_ore * 60) AS INTEGER) AS durata_min,
+      COALESCE((SELECT SUM(1 << (rg.giorno_settimana - 1))
+                FROM interventi_ricorrenti_giorni rg
+                WHERE rg.ricorrente_id = r.id), 0) AS maschera
     FROM interventi_ricorrenti r
     JOIN clienti c ON c.id = r.cliente_id
     JOIN servizi s ON s.id = r.servizio_id
-    LEFT JOIN interventi_ricorrenti_giorni rg ON rg.ricorrente_id = r.id
-    LEFT JOIN ricorrenti_dipendenti rdp ON rdp.ricorrente_id = r.id
-    LEFT JOIN dipendenti d ON d.id = rdp.dipendente_id
-    GROUP BY r.id
+    WHERE {where}
+    ORDER BY r.ora_inizio ASC, r.id ASC
+    {limit}
+"""
+
+_SQL_RICORRENTI_DIPENDENTI = """
+    SELECT rdp.ricorrente_id AS ref, d.id, d.nome, d.cognome
+    FROM interventi_ricorrenti r
+    JOIN ricorrenti_dipendenti rdp ON rdp.ricorrente_id = r.id
+    JOIN dipendenti d ON d.id = rdp.dipendente_id
+    WHERE {where}
+    ORDER BY rdp.ricorrente_id, d.id
+"""
+
+
+# ordine: data DESC, ora_inizio ASC, id ASC (idx_interventi_data_ora)
+_WHERE_PAGINA_SINGOLI = """(i.data < :data
+    OR (i.data = :data AND (i.ora_inizio > :ora
+        OR (i.ora_inizio = :ora AND i.id > :id))))"""
+
+# ordine: ora_inizio ASC, id ASC
+_WHERE_PAGINA_RICORRENTI = "(r.ora_inizio > :ora OR (r.ora_inizio = :ora AND r.id > :id))"
+
+
+def _dipendenti_per_ref(cur, sql: str, params) -> dict:
+    # ref -> (ids, nomi)
+    out = {}
+    for row in cur.execute(sql, params):
+        ids, nomi = out.setdefault(row["ref"], ([], []))
+        ids.append(row["id"])
+        nomi.append(f"{row['nome']} {row['cognome']}")
+    return out
+
+
+def _query_righe(cur, sql_righe: str, sql_dip: str, alias: str, where: str, params, limite):
+    """
+    Esegue la query principale e quella dei dipendenti collegati.
+    Senza limite la query dipendenti usa lo stesso WHERE (join); con LIMIT (paginazione)
+    la restringe agli id della pagina, così non tocca le righe successive.
+    """
+    if limite is None:
+        rows = cur.execute(sql_righe.format(where=where, limit=""), dict(params)).fetchall()
+        return rows, _dipendenti_per_ref(cur, sql_dip.format(where=where), params)
 
-    ORDER BY tipo DESC, data DESC, ora ASC;
+    rows = cur.execute(sql_righe.format(where=where, limit="LIMIT :limite"),
+                       dict(params, limite=limite)).fetchall()
+    ids = json.dumps([r["id"] for r in rows])
+    dip = _dipendenti_per_ref(
+        cur, sql_dip.format(where=f"{alias}.id IN (SELECT value FROM json_each(:ids))"), {"ids": ids}
+    )
+    return rows, dip
+
+
+def _righe_singoli(cur, where: str, params, limite: int | None = None) -> list[RigaIntervento]:
+    rows, dip = _query_righe(cur, _SQL_SINGOLI, _SQL_SINGOLI_DIPENDENTI, "i", where, params, limite)
+    out = []
+    for r in rows:
+        ids, nomi = dip.get(r["id"], ((), ()))
+        out.append(RigaIntervento(
+            id_ref=r["id"],
+            tipo="SINGOLO",
+            cliente_id=r["cliente_id"],
+            cliente_nome=r["cliente_nome"],
+            cliente_cognome=r["cliente_cognome"],
+            servizio_id=r["servizio_id"],
+            servizio=r["servizio"],
+            ora=r["ora_inizio"],
+            durata_min=r["durata_min"],
+            stato=r["stato"],
+            note=r["note"],
+            data=r["data"],
+            dipendente_ids=tuple(ids),
+            dipendenti=tuple(nomi),
+        ))
+    return out
+
+
+def _righe_ricorrenti(cur, where: str, params, limite: int | None = None) -> list[RigaIntervento]:
+    rows, dip = _query_righe(cur, _SQL_RICORRENTI, _SQL_RICORRENTI_DIPENDENTI, "r", where, params, limite)
+    out = []
+    for r in rows:
+        ids, nomi = dip.get(r["id"], ((), ()))
+        out.append(RigaIntervento(
+            id_ref=r["id"],
+            tipo="RICORRENTE",
+            cliente_id=r["cliente_id"],
+            cliente_nome=r["cliente_nome"],
+            cliente_cognome=r["cliente_cognome"],
+            servizio_id=r["servizio_id"],
+            servizio=r["servizio"],
+            ora=r["ora_inizio"],
+            durata_min=r["durata_min"],
+            stato="Attivo" if r["attivo"] == 1 else "Sospeso",
+            note=r["note"],
+            maschera_giorni=r["maschera"],
+            data_inizio=r["data_inizio"],
+            data_fine=r["data_fine"],
+            attivo=r["attivo"] == 1,
+            dipendente_ids=tuple(ids),
+            dipendenti=tuple(nomi),
+        ))
+    return out
+
+
+def get_interventi_misti() -> list[RigaIntervento]:
+    """Tutti i SINGOLI (data DESC, ora ASC) seguiti da tutte le regole RICORRENTI."""
+    conn = get_connection()
+    cur = conn.cursor()
+    return _righe_singoli(cur, "1", {}) + _righe_ricorrenti(cur, "1", {})
+
+
+def get_interventi_pagina(dopo: RigaIntervento | None = None, limite: int = 200) -> list[RigaIntervento]:
+    """
+    Paginazione keyset di get_interventi_misti: restituisce al massimo `limite` righe
+    successive a `dopo` (l'ultima riga della pagina precedente, None per la prima pagina).
+    Nessun OFFSET: il costo di una pagina non dipende da quante righe la precedono.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+
+    out = []
+    if dopo is None or dopo.tipo == "SINGOLO":
+        if dopo is None:
+            where, params = "1", {}
+        else:
+            where = _WHERE_PAGINA_SINGOLI
+            params = {"data": dopo.data, "ora": dopo.ora, "id": dopo.id_ref}
+        out = _righe_singoli(cur, where, params, limite)
+        if len(out) >= limite:
+            return out
+        dopo = None  # singoli finiti: si prosegue con i ricorrenti dall'inizio
+
+    if dopo is None:
+        where, params = "1", {}
+    else:
+        where = _WHERE_PAGINA_RICORRENTI
+        params = {"ora": dopo.ora, "id": dopo.id_ref}
+    return out + _righe_ricorrenti(cur, where, params, limite - len(out))
+
+
+_FILTRO_PERIODO_SINGOLI = "i.data BETWEEN :da AND :a"
+_FILTRO_PERIODO_RICORRENTI = """(r.data_inizio IS NULL OR r.data_inizio <= :a)
+    AND (r.data_fine IS NULL OR r.data_fine >= :da)"""
+
+_FILTRO_DIPENDENTE_SINGOLI = """EXISTS (
+    SELECT 1 FROM interventi_dipendenti x
+    WHERE x.intervento_id = i.id AND x.dipendente_id = :dipendente_id)"""
+
+_FILTRO_DIPENDENTE_RICORRENTI = """EXISTS (
+    SELECT 1 FROM ricorrenti_dipendenti x
+    WHERE x.ricorrente_id = r.id AND x.dipendente_id = :dipendente_id)"""
+
+
+def get_interventi_periodo(data_inizio: str, data_fine: str,
+                           cliente_id: int | None = None,
+                           dipendente_id: int | None = None,
+                           stato: str | None = None) -> list[RigaIntervento]:
+    """
+    Come get_interventi_misti, ma limitato a un intervallo di date (YYYY-MM-DD, estremi inclusi):
+    - SINGOLI con data nel periodo (usa idx_interventi_data_ora)
+    - RICORRENTI il cui periodo data_inizio/data_fine si sovrappone all'intervallo
+    Filtri opzionali su cliente, dipendente e stato ('Attivo'/'Sospeso' per i ricorrenti).
     """
+    conn = get_connection()
+    cur = conn.cursor()
+
+    params = {
+        "da": data_inizio,
+        "a": data_fine,
+        "cliente_id": cliente_id,
+        "dipendente_id": dipendente_id,
+        "stato": stato,
+    }
+
+    filtri_singoli = [_FILTRO_PERIODO_SINGOLI]
+    filtri_ricorrenti = [_FILTRO_PERIODO_RICORRENTI]
+
+    if cliente_id is not None:
+        filtri_singoli.append("i.cliente_id = :cliente_id")
+        filtri_ricorrenti.append("r.cliente_id = :cliente_id")
+
+    if dipendente_id is not None:
+        filtri_singoli.append(_FILTRO_DIPENDENTE_SINGOLI)
+        filtri_ricorrenti.append(_FILTRO_DIPENDENTE_RICORRENTI)
 
-    cur.execute(sql)
-    return cur.fetchall()
+    if stato is not None:
+        filtri_singoli.append("i.stato = :stato")
+        filtri_ricorrenti.append("(CASE WHEN r.attivo=1 THEN 'Attivo' ELSE 'Sospeso' END) = :stato")
+
+    return (_righe_singoli(cur, " AND ".join(filtri_singoli), params)
+            + _righe_ricorrenti(cur, " AND ".join(filtri_ricorrenti), params))
+
+
+def get_riga_intervento(intervento_id: int) -> RigaIntervento | None:
+    """Riga strutturata di un singolo intervento (per aggiornare la tabella senza ricaricarla)."""
+    cur = get_connection().cursor()
+    righe = _righe_singoli(cur, "i.id = :id", {"id": intervento_id})
+    return righe[0] if righe else None
+
+
+def get_riga_ricorrente(ricorrente_id: int) -> RigaIntervento | None:
+    """Riga strutturata di una regola ricorrente."""
+    cur = get_connection().cursor()
+    righe = _righe_ricorrenti(cur, "r.id = :id", {"id": ricorrente_id})
+    return righe[0] if righe else None
 
 
 def get_intervento_by_id(intervento_id: int):
@@ -75,83 +313,182 @@ def get_intervento_dipendenti_ids(intervento_id: int) -> list[int]:
 
 
 def set_intervento_dipendenti(intervento_id: int, dipendente_ids: list[int]):
-    conn = get_connection()
-    cur = conn.cursor()
-
-    # reset
-    cur.execute("DELETE FROM interventi_dipendenti WHERE intervento_id = ?", (intervento_id,))
+    with transaction() as conn:
+        # reset
+        conn.execute("DELETE FROM interventi_dipendenti WHERE intervento_id = ?", (intervento_id,))
 
-    # insert nuovi
-    for did in dipendente_ids:
-        cur.execute("""
+        # insert nuovi (un solo statement preparato)
+        conn.executemany("""
             INSERT OR IGNORE INTO interventi_dipendenti(intervento_id, dipendente_id)
             VALUES (?, ?)
-        """, (intervento_id, did))
-
-    conn.commit()
+        """, [(intervento_id, int(did)) for did in dipendente_ids])
 
 
-def create_intervento(dati: dict) -> int:
+def create_intervento(dati: dict) -> RigaIntervento:
     """
     dati: cliente_id, servizio_id, data, ora_inizio, durata_ore, stato, note, dipendente_ids (lista)
+    Intervento e dipendenti collegati vengono salvati in un'unica transazione.
+    Restituisce la riga appena creata.
     """
-    conn = get_connection()
-    cur = conn.cursor()
-
     dip_ids = dati.pop("dipendente_ids", [])  # tolgo dal dict
 
-    cur.execute("""
-        INSERT INTO interventi(cliente_id, servizio_id, data, ora_inizio, durata_ore, stato, note)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (
-        dati["cliente_id"],
-        dati["servizio_id"],
-        dati["data"],
-        dati["ora_inizio"],
-        dati.get("durata_ore"),
-        dati.get("stato", "Programmato"),
-        dati.get("note"),
-    ))
+    with transaction() as conn:
+        cur = conn.execute("""
+            INSERT INTO interventi(cliente_id, servizio_id, data, ora_inizio, durata_ore, stato, note)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (
+            dati["cliente_id"],
+            dati["servizio_id"],
+            dati["data"],
+            dati["ora_inizio"],
+            dati.get("durata_ore"),
+            dati.get("stato", "Programmato"),
+            dati.get("note"),
+        ))
+        intervento_id = cur.lastrowid
 
-    intervento_id = cur.lastrowid
-    conn.commit()
+        # link dipendenti
+        set_intervento_dipendenti(intervento_id, dip_ids)
 
-    # link dipendenti
-    set_intervento_dipendenti(intervento_id, dip_ids)
+    invalida_date(dati["data"])
+    return get_riga_intervento(intervento_id)
 
-    return intervento_id
 
+def update_intervento(intervento_id: int, dati: dict) -> RigaIntervento | None:
+    dip_ids = dati.pop("dipendente_ids", [])
 
-def update_intervento(intervento_id: int, dati: dict):
-    conn = get_connection()
-    cur = conn.cursor()
+    with transaction() as conn:
+        prima = conn.execute("SELECT data FROM interventi WHERE id = ?", (intervento_id,)).fetchone()
+        conn.execute("""
+            UPDATE interventi
+            SET cliente_id=?, servizio_id=?, data=?, ora_inizio=?, durata_ore=?, stato=?, note=?
+            WHERE id=?
+        """, (
+            dati["cliente_id"],
+            dati["servizio_id"],
+            dati["data"],
+            dati["ora_inizio"],
+            dati.get("durata_ore"),
+            dati.get("stato", "Programmato"),
+            dati.get("note"),
+            intervento_id
+        ))
 
-    dip_ids = dati.pop("dipendente_ids", [])
+        set_intervento_dipendenti(intervento_id, dip_ids)
 
-    cur.execute("""
-        UPDATE interventi
-        SET cliente_id=?, servizio_id=?, data=?, ora_inizio=?, durata_ore=?, stato=?, note=?
-        WHERE id=?
-    """, (
-        dati["cliente_id"],
-        dati["servizio_id"],
-        dati["data"],
-        dati["ora_inizio"],
-        dati.get("durata_ore"),
-        dati.get("stato", "Programmato"),
-        dati.get("note"),
-        intervento_id
-    ))
-    conn.commit()
-
-    set_intervento_dipendenti(intervento_id, dip_ids)
+    # mese vecchio e mese nuovo (dopo il commit: vedi services.cache_calendario)
+    invalida_date(prima["data"] if prima else None, dati["data"])
+    return get_riga_intervento(intervento_id)
 
 
 def delete_intervento(intervento_id: int):
-    conn = get_connection()
-    cur = conn.cursor()
+    with transaction() as conn:
+        prima = conn.execute("SELECT data FROM interventi WHERE id = ?", (intervento_id,)).fetchone()
+        # cancella link (anche se con FK+CASCADE dovrebbe bastare)
+        conn.execute("DELETE FROM interventi_dipendenti WHERE intervento_id = ?", (intervento_id,))
+        conn.execute("DELETE FROM interventi WHERE id = ?", (intervento_id,))
+
+    if prima:
+        invalida_date(prima["data"])
+
+
+# ---------------------------------------------------------
+#  CARICHI DI LAVORO (services.carichi)
+# ---------------------------------------------------------
+_SQL_ORE_SINGOLI = registra_query("ore_singoli_dipendente_giorno", """
+    SELECT x.dipendente_id, i.data, SUM(i.durata_ore) AS ore
+    FROM interventi i
+    JOIN interventi_dipendenti x ON x.intervento_id = i.id
+    WHERE i.data BETWEEN :da AND :a AND i.stato <> 'Annullato'
+    GROUP BY x.dipendente_id, i.data
+""")
+
+
+def ore_singoli_per_giorno(data_inizio: str, data_fine: str) -> list[tuple[int, str, float]]:
+    """(dipendente_id, data, ore) dei SINGOLI non annullati nel periodo, già sommati in SQL."""
+    cur = get_connection().execute(_SQL_ORE_SINGOLI, {"da": data_inizio, "a": data_fine})
+    return [(r["dipendente_id"], r["data"], r["ore"] or 0.0) for r in cur.fetchall()]
+
+
+def get_ricorrenti_periodo(data_inizio: str, data_fine: str) -> list[RigaIntervento]:
+    """Solo le regole RICORRENTI il cui periodo si sovrappone a [data_inizio, data_fine]."""
+    cur = get_connection().cursor()
+    return _righe_ricorrenti(cur, _FILTRO_PERIODO_RICORRENTI, {"da": data_inizio, "a": data_fine})
+
+
+# ---------------------------------------------------------
+#  ASSEGNAZIONE AUTOMATICA (services.assegnazione)
+# ---------------------------------------------------------
+# quante volte ogni dipendente ha lavorato per il cliente: i ricorrenti valgono di più,
+# sono un'assegnazione stabile
+_SQL_AFFINITA = registra_query("affinita_clienti_dipendenti", """
+    SELECT cliente_id, dipendente_id, SUM(n) AS n FROM (
+        SELECT i.cliente_id, x.dipendente_id, COUNT(*) AS n
+        FROM interventi i
+        JOIN interventi_dipendenti x ON x.intervento_id = i.id
+        WHERE i.cliente_id IN (SELECT value FROM json_each(:clienti))
+        GROUP BY i.cliente_id, x.dipendente_id
+        UNION ALL
+        SELECT r.cliente_id, x.dipendente_id, 10 * COUNT(*) AS n
+        FROM interventi_ricorrenti r
+        JOIN ricorrenti_dipendenti x ON x.ricorrente_id = r.id
+        WHERE r.cliente_id IN (SELECT value FROM json_each(:clienti))
+        GROUP BY r.cliente_id, x.dipendente_id
+    )
+    GROUP BY cliente_id, dipendente_id
+""")
+
+
+def affinita_clienti(cliente_ids) -> dict:
+    """(cliente_id, dipendente_id) -> numero di assegnazioni passate (ricorrenti x10)."""
+    cur = get_connection().execute(_SQL_AFFINITA, {"clienti": json.dumps(sorted(set(cliente_ids)))})
+    return {(r["cliente_id"], r["dipendente_id"]): r["n"] for r in cur.fetchall()}
+
+
+def aggiungi_dipendenti(coppie) -> int:
+    """
+    coppie: [(intervento_id, dipendente_id)] da aggiungere (quelli già presenti restano).
+    Tutto in un'unica transazione; restituisce quante assegnazioni sono state inserite.
+    """
+    coppie = [(int(i), int(d)) for i, d in coppie]
+    if not coppie:
+        return 0
+
+    ids = json.dumps(sorted({i for i, _ in coppie}))
+    with transaction() as conn:
+        prima = conn.total_changes
+        conn.executemany("""
+            INSERT OR IGNORE INTO interventi_dipendenti(intervento_id, dipendente_id)
+            VALUES (?, ?)
+        """, coppie)
+        inseriti = conn.total_changes - prima
+        giorni = [r["data"] for r in conn.execute(
+            "SELECT DISTINCT data FROM interventi WHERE id IN (SELECT value FROM json_each(?))", (ids,))]
+
+    invalida_date(*giorni)
+    return inseriti
+
 
-    # cancella link (anche se con FK+CASCADE dovrebbe bastare)
-    cur.execute("DELETE FROM interventi_dipendenti WHERE intervento_id = ?", (intervento_id,))
-    cur.execute("DELETE FROM interventi WHERE id = ?", (intervento_id,))
-    conn.commit()
\ No newline at end of file
+# ---------------------------------------------------------
+#  QUERY CONTROLLATE DALL'INDEX ADVISOR (python -m database.index_advisor)
+# ---------------------------------------------------------
+# i ricorrenti sono poche decine di regole e il filtro sul periodo ammette NULL:
+# la SCAN di interventi_ricorrenti è voluta
+registra_query("interventi_pagina_singoli",
+               _SQL_SINGOLI.format(where=_WHERE_PAGINA_SINGOLI, limit="LIMIT :limite"))
+registra_query("interventi_pagina_ricorrenti",
+               _SQL_RICORRENTI.format(where=_WHERE_PAGINA_RICORRENTI, limit="LIMIT :limite"))
+registra_query("interventi_pagina_dipendenti",
+               _SQL_SINGOLI_DIPENDENTI.format(where="i.id IN (SELECT value FROM json_each(:ids))"))
+registra_query("interventi_periodo_singoli",
+               _SQL_SINGOLI.format(where=_FILTRO_PERIODO_SINGOLI, limit=""))
+registra_query("interventi_periodo_singoli_dipendente",
+               _SQL_SINGOLI.format(where=f"{_FILTRO_PERIODO_SINGOLI} AND {_FILTRO_DIPENDENTE_SINGOLI}",
+                                   limit=""))
+registra_query("interventi_periodo_dipendenti",
+               _SQL_SINGOLI_DIPENDENTI.format(where=_FILTRO_PERIODO_SINGOLI))
+registra_query("interventi_periodo_ricorrenti",
+               _SQL_RICORRENTI.format(where=_FILTRO_PERIODO_RICORRENTI, limit=""),
+               scansioni_ammesse=("r",))
+registra_query("interventi_periodo_cliente",
+               _SQL_SINGOLI.format(where="i.cliente_id = :cliente_id", limit=""))
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+
+from database.database import get_connection
+from database.migrations import TIPI_RICERCA
+
+
+@dataclass(slots=True)
+class RisultatoRicerca:
+    tipo: str        # 'cliente' | 'dipendente' | 'servizio' | 'intervento' | 'ricorrente'
+    id: int
+    titolo: str      # testo da mostrare nella lista dei risultati
+    dettaglio: str = ""
+
+
+# titolo/dettaglio di ogni tipo, caricati solo per gli id trovati
+_SQL_ETICHETTE = {
+    "cliente": """
+        SELECT id, nome || ' ' || cognome AS titolo, coalesce(indirizzo, '') AS dettaglio
+        FROM clienti WHERE id IN (SELECT value FROM json_each(:ids))
+    """,
+    "dipendente": """
+        SELECT id, nome || ' ' || cognome AS titolo, coalesce(mansione, '') AS dettaglio
+        FROM dipendenti WHERE id IN (SELECT value FROM json_each(:ids))
+    """,
+    "servizio": """
+        SELECT id, nome AS titolo, coalesce(descrizione, '') AS dettaglio
+        FROM servizi WHERE id IN (SELECT value FROM json_each(:ids))
+    """,
+    "intervento": """
+        SELECT i.id, c.nome || ' ' || c.cognome || ' - ' || i.data AS titolo, i.note AS dettaglio
+        FROM interventi i JOIN clienti c ON c.id = i.cliente_id
+        WHERE i.id IN (SELECT value FROM json_each(:ids))
+    """,
+    "ricorrente": """
+        SELECT r.id, c.nome || ' ' || c.cognome || ' - ricorrente' AS titolo, r.note AS dettaglio
+        FROM interventi_ricorrenti r JOIN clienti c ON c.id = r.cliente_id
+        WHERE r.id IN (SELECT value FROM json_each(:ids))
+    """,
+}
+
+_RE_PAROLE = re.compile(r"\w+", re.UNICODE)
+
+
+def query_fts(testo: str) -> str:
+    """
+    Trasforma il testo digitato in una query FTS5 "a prefisso":
+    'mar ros' -> '"mar"* "ros"*' (tutte le parole, ognuna come prefisso).
+    Le parole sono tra virgolette, quindi la sintassi FTS5 dell'utente non viene interpretata.
+    """
+    return " ".join(f'"{p}"*' for p in _RE_PAROLE.findall(testo or ""))
+
+
+def cerca(testo: str, limite: int = 20) -> list[RisultatoRicerca]:
+    """
+    Ricerca globale (clienti, dipendenti, servizi, note degli interventi) per prefisso
+    di parola, ordinata per rilevanza (il titolo pesa più del resto).
+    """
+    match = query_fts(testo)
+    if not match:
+        return []
+
+    # con prefissi di 1-2 lettere i risultati possono essere decine di migliaia:
+    # ordinarli tutti per bm25 costa troppo, si prendono i primi in ordine di rowid
+    ordina = max(len(p) for p in _RE_PAROLE.findall(testo)) >= 3
+
+    conn = get_connection()
+    rows = conn.execute(f"""
+        SELECT rowid FROM ricerca
+        WHERE ricerca MATCH :match
+        {"ORDER BY bm25(ricerca, 5.0, 1.0)" if ordina else ""}
+        LIMIT :limite
+    """, {"match": match, "limite": limite}).fetchall()
+
+    # rowid = id * 8 + codice tipo (vedi migrazione 4)
+    trovati = [(TIPI_RICERCA[r["rowid"] % 8], r["rowid"] // 8) for r in rows]
+
+    per_tipo = {}
+    for tipo, ref in trovati:
+        per_tipo.setdefault(tipo, []).append(ref)
+
+    etichette = {}
+    for tipo, ids in per_tipo.items():
+        for r in conn.execute(_SQL_ETICHETTE[tipo], {"ids": json.dumps(ids)}):
+            etichette[(tipo, r["id"])] = (r["titolo"], r["dettaglio"] or "")
+
+    out = []
+    for tipo, ref in trovati:
+        if (tipo, ref) in etichette:
+            titolo, dettaglio = etichette[(tipo, ref)]
+            out.append(RisultatoRicerca(tipo, ref, titolo, dettaglio))
+    return out
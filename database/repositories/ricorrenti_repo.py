@@ -2,8 +2,10 @@ from __future__ import annotations
 from datetime import date, datetime, timedelta
 from typing import List, Optional
 
-from database.database import get_connection
-from database.repositories.interventi_repo import set_intervento_dipendenti
+from database.database import get_connection, transaction
+from database.repositories.interventi_repo import RigaIntervento, get_riga_ricorrente
+from services import cache_calendario
+from services.ricorrenze import invalida_regola, invalida_tutto
 
 def _fine_anno(d: date) -> date:
     return date(d.year, 12, 31)
@@ -49,33 +51,41 @@ def get_ricorrente_dipendenti_ids(ricorrente_id: int) -> List[int]:
 
 
 def set_ricorrente_giorni(ricorrente_id: int, giorni: List[int]):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM interventi_ricorrenti_giorni WHERE ricorrente_id=?", (ricorrente_id,))
-    for g in sorted(set(giorni)):
-        cur.execute("""
+    with transaction() as conn:
+        conn.execute("DELETE FROM interventi_ricorrenti_giorni WHERE ricorrente_id=?", (ricorrente_id,))
+        conn.executemany("""
             INSERT INTO interventi_ricorrenti_giorni(ricorrente_id, giorno_settimana)
             VALUES (?, ?)
-        """, (ricorrente_id, int(g)))
-    conn.commit()
+        """, [(ricorrente_id, int(g)) for g in sorted(set(giorni))])
 
 
 def set_ricorrente_dipendenti(ricorrente_id: int, dipendente_ids: List[int]):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM ricorrenti_dipendenti WHERE ricorrente_id=?", (ricorrente_id,))
-    for did in sorted(set(dipendente_ids)):
-        cur.execute("""
+    with transaction() as conn:
+        conn.execute("DELETE FROM ricorrenti_dipendenti WHERE ricorrente_id=?", (ricorrente_id,))
+        conn.executemany("""
             INSERT OR IGNORE INTO ricorrenti_dipendenti(ricorrente_id, dipendente_id)
             VALUES (?, ?)
-        """, (ricorrente_id, int(did)))
-    conn.commit()
+        """, [(ricorrente_id, int(did)) for did in sorted(set(dipendente_ids))])
 
 
-def create_ricorrente(dati: dict) -> int:
-    conn = get_connection()
-    cur = conn.cursor()
-
+def _registra_sospensione(conn, ricorrente_id: int, attivo: int):
+    """
+    Sospensione: apre un periodo da oggi. Riattivazione: chiude quello aperto a ieri.
+    La fatturazione toglie questi periodi anche dai mesi passati.
+    """
+    if attivo:
+        conn.execute("""
+            UPDATE ricorrenti_sospensioni SET al = date(?, '-1 day')
+            WHERE ricorrente_id = ? AND al IS NULL
+        """, (_today_str(), ricorrente_id))
+        # sospesa e riattivata in giornata: nessun giorno sospeso
+        conn.execute("DELETE FROM ricorrenti_sospensioni WHERE ricorrente_id = ? AND al < dal", (ricorrente_id,))
+    else:
+        conn.execute("INSERT INTO ricorrenti_sospensioni(ricorrente_id, dal) VALUES (?, ?)",
+                     (ricorrente_id, _today_str()))
+
+
+def create_ricorrente(dati: dict) -> RigaIntervento:
     giorni = dati.pop("giorni_settimana", [])
     dip_ids = dati.pop("dipendente_ids", [])
 
@@ -84,73 +94,89 @@ def create_ricorrente(dati: dict) -> int:
     data_inizio = dati.get("data_inizio") or start.strftime("%Y-%m-%d")
     data_fine = dati.get("data_fine") or _fine_anno(start).strftime("%Y-%m-%d")
 
-    cur.execute("""
-        INSERT INTO interventi_ricorrenti(
-            cliente_id, servizio_id, ora_inizio, durata_ore, attivo, note, data_inizio, data_fine
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        dati["cliente_id"],
-        dati["servizio_id"],
-        dati["ora_inizio"],
-        dati.get("durata_ore"),
-        1 if dati.get("attivo", True) else 0,
-        dati.get("note"),
-        data_inizio,
-        data_fine
-    ))
-    ric_id = cur.lastrowid
-    conn.commit()
-
-    set_ricorrente_giorni(ric_id, giorni)
-    set_ricorrente_dipendenti(ric_id, dip_ids)
-
-    return ric_id
-
-
-
-def update_ricorrente(ricorrente_id: int, dati: dict):
-    conn = get_connection()
-    cur = conn.cursor()
-
+    # regola + giorni + dipendenti: un'unica transazione
+    with transaction() as conn:
+        cur = conn.execute("""
+            INSERT INTO interventi_ricorrenti(
+                cliente_id, servizio_id, ora_inizio, durata_ore, attivo, note, data_inizio, data_fine
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            dati["cliente_id"],
+            dati["servizio_id"],
+            dati["ora_inizio"],
+            dati.get("durata_ore"),
+            1 if dati.get("attivo", True) else 0,
+            dati.get("note"),
+            data_inizio,
+            data_fine
+        ))
+        ric_id = cur.lastrowid
+        if not dati.get("attivo", True):
+            # creata già sospesa: nessun giorno da fatturare finché non viene riattivata
+            conn.execute("INSERT INTO ricorrenti_sospensioni(ricorrente_id) VALUES (?)", (ric_id,))
+
+        set_ricorrente_giorni(ric_id, giorni)
+        set_ricorrente_dipendenti(ric_id, dip_ids)
+
+    cache_calendario.invalida_periodo(data_inizio, data_fine)
+    return get_riga_ricorrente(ric_id)
+
+
+
+def update_ricorrente(ricorrente_id: int, dati: dict) -> RigaIntervento | None:
     giorni = dati.pop("giorni_settimana", [])
     dip_ids = dati.pop("dipendente_ids", [])
 
-    # se non arrivano, non le tocchiamo
-    r = get_ricorrente_by_id(ricorrente_id)
-    if r is None:
-        return
-
-    data_inizio = dati.get("data_inizio") or r["data_inizio"] or _today_str()
-    data_fine = dati.get("data_fine") or r["data_fine"] or _fine_anno(date.today()).strftime("%Y-%m-%d")
-
-    cur.execute("""
-        UPDATE interventi_ricorrenti
-        SET cliente_id=?, servizio_id=?, ora_inizio=?, durata_ore=?, attivo=?, note=?, data_inizio=?, data_fine=?
-        WHERE id=?
-    """, (
-        dati["cliente_id"],
-        dati["servizio_id"],
-        dati["ora_inizio"],
-        dati.get("durata_ore"),
-        1 if dati.get("attivo", True) else 0,
-        dati.get("note"),
-        data_inizio,
-        data_fine,
-        ricorrente_id
-    ))
-    conn.commit()
-
-    set_ricorrente_giorni(ricorrente_id, giorni)
-    set_ricorrente_dipendenti(ricorrente_id, dip_ids)
+    with transaction() as conn:
+        # se non arrivano, non le tocchiamo
+        r = get_ricorrente_by_id(ricorrente_id)
+        if r is None:
+            return
+
+        data_inizio = dati.get("data_inizio") or r["data_inizio"] or _today_str()
+        data_fine = dati.get("data_fine") or r["data_fine"] or _fine_anno(date.today()).strftime("%Y-%m-%d")
+
+        attivo = 1 if dati.get("attivo", True) else 0
+        conn.execute("""
+            UPDATE interventi_ricorrenti
+            SET cliente_id=?, servizio_id=?, ora_inizio=?, durata_ore=?, attivo=?, note=?, data_inizio=?, data_fine=?
+            WHERE id=?
+        """, (
+            dati["cliente_id"],
+            dati["servizio_id"],
+            dati["ora_inizio"],
+            dati.get("durata_ore"),
+            attivo,
+            dati.get("note"),
+            data_inizio,
+            data_fine,
+            ricorrente_id
+        ))
+        if attivo != r["attivo"]:
+            _registra_sospensione(conn, ricorrente_id, attivo)
+
+        set_ricorrente_giorni(ricorrente_id, giorni)
+        set_ricorrente_dipendenti(ricorrente_id, dip_ids)
+
+    # le occorrenze già espanse per questa regola non sono più valide,
+    # così come i mesi del periodo vecchio e di quello nuovo
+    invalida_regola(ricorrente_id)
+    cache_calendario.invalida_periodo(r["data_inizio"], r["data_fine"])
+    cache_calendario.invalida_periodo(data_inizio, data_fine)
+
+    return get_riga_ricorrente(ricorrente_id)
 
 
 def delete_ricorrente(ricorrente_id: int):
-    conn = get_connection()
-    cur = conn.cursor()
-    # cascata su giorni e ricorrenti_dipendenti (se hai FK + ON DELETE CASCADE)
-    cur.execute("DELETE FROM interventi_ricorrenti WHERE id=?", (ricorrente_id,))
-    conn.commit()
+    with transaction() as conn:
+        r = get_ricorrente_by_id(ricorrente_id)
+        # cascata su giorni e ricorrenti_dipendenti (se hai FK + ON DELETE CASCADE)
+        conn.execute("DELETE FROM interventi_ricorrenti WHERE id=?", (ricorrente_id,))
+
+    invalida_regola(ricorrente_id)
+    if r is not None:
+        cache_calendario.invalida_periodo(r["data_inizio"], r["data_fine"])
 
 
 def rinnova_ricorrenti_scaduti():
@@ -158,19 +184,21 @@ def rinnova_ricorrenti_scaduti():
     Se un ricorrente è attivo e la sua data_fine è passata,
     estende data_fine al 31/12 dell'anno corrente.
     """
-    conn = get_connection()
-    cur = conn.cursor()
-
     today = date.today()
     today_str = today.strftime("%Y-%m-%d")
     fine_anno_str = _fine_anno(today).strftime("%Y-%m-%d")
 
-    cur.execute("""
-        UPDATE interventi_ricorrenti
-        SET data_fine = ?
-        WHERE attivo = 1
-          AND data_fine IS NOT NULL
-          AND data_fine < ?
-    """, (fine_anno_str, today_str))
-
-    conn.commit()
+    with transaction() as conn:
+        cur = conn.execute("""
+            UPDATE interventi_ricorrenti
+            SET data_fine = ?
+            WHERE attivo = 1
+              AND data_fine IS NOT NULL
+              AND data_fine < ?
+        """, (fine_anno_str, today_str))
+
+    if cur.rowcount:
+        invalida_tutto()
+        cache_calendario.invalida_tutto()
+
+    return cur.rowcount
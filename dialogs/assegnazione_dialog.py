@@ -0,0 +1,158 @@
+from datetime import timedelta
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QDateEdit, QPushButton, QLabel, QSpinBox,
+    QTableWidget, QTableWidgetItem, QDialogButtonBox, QMessageBox, QHeaderView, QAbstractItemView
+)
+from PyQt6.QtCore import QDate, Qt
+
+from services.assegnazione import proponi, applica
+
+
+class AssegnazioneDialog(QDialog):
+    """
+    Anteprima dell'assegnazione automatica: il piano si calcola nel worker, l'utente
+    toglie la spunta alle proposte che non vuole e conferma; si salva in una transazione.
+    """
+
+    COLONNE = ["Data", "Ora", "Cliente", "Servizio", "Dipendente", "Abituale"]
+
+    def __init__(self, parent=None, executor=None):
+        super().__init__(parent)
+        self.executor = executor
+        self.piano = None
+        self.applicate = 0
+
+        self.setWindowTitle("Assegnazione automatica dipendenti")
+        self.resize(820, 520)
+
+        # periodo: settimana corrente
+        oggi = QDate.currentDate()
+        lunedi = oggi.addDays(-(oggi.dayOfWeek() - 1))
+        self.dateDa = QDateEdit(lunedi)
+        self.dateA = QDateEdit(lunedi.addDays(6))
+        for d in (self.dateDa, self.dateA):
+            d.setCalendarPopup(True)
+            d.setDisplayFormat("dd-MM-yyyy")
+
+        self.spinMinimo = QSpinBox()
+        self.spinMinimo.setRange(1, 10)
+        self.spinMinimo.setPrefix("Dipendenti per intervento: ")
+
+        self.btnCalcola = QPushButton("Calcola proposte")
+        self.btnCalcola.clicked.connect(self.calcola)
+
+        filtri = QHBoxLayout()
+        filtri.addWidget(QLabel("Dal:"))
+        filtri.addWidget(self.dateDa)
+        filtri.addWidget(QLabel("al:"))
+        filtri.addWidget(self.dateA)
+        filtri.addWidget(self.spinMinimo)
+        filtri.addStretch()
+        filtri.addWidget(self.btnCalcola)
+
+        self.table = QTableWidget(0, len(self.COLONNE))
+        self.table.setHorizontalHeaderLabels(self.COLONNE)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+
+        self.lblEsito = QLabel("Scegli il periodo e calcola le proposte.")
+        self.lblEsito.setWordWrap(True)
+
+        self.buttons = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok |
+            QDialogButtonBox.StandardButton.Cancel
+        )
+        self.buttons.button(QDialogButtonBox.StandardButton.Ok).setText("Applica")
+        self.buttons.button(QDialogButtonBox.StandardButton.Ok).setEnabled(False)
+        self.buttons.accepted.connect(self._on_accept)
+        self.buttons.rejected.connect(self.reject)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(filtri)
+        layout.addWidget(self.table)
+        layout.addWidget(self.lblEsito)
+        layout.addWidget(self.buttons)
+
+    # ---------------- CALCOLO ----------------
+    def calcola(self):
+        da = self.dateDa.date().toPyDate()
+        a = self.dateA.date().toPyDate()
+        if a < da:
+            QMessageBox.warning(self, "Periodo non valido", "La data finale precede quella iniziale.")
+            return
+        if a - da > timedelta(days=62):
+            QMessageBox.warning(self, "Periodo troppo lungo", "Calcola al massimo due mesi alla volta.")
+            return
+
+        self.btnCalcola.setEnabled(False)
+        self.buttons.button(QDialogButtonBox.StandardButton.Ok).setEnabled(False)
+        self.lblEsito.setText("Calcolo in corso…")
+
+        if self.executor is None:
+            self._mostra_piano(proponi(da, a, self.spinMinimo.value()))
+        else:
+            self.executor.submit("assegnazione", proponi, da, a, self.spinMinimo.value(),
+                                 on_done=self._mostra_piano, on_error=self._on_errore)
+
+    def _on_errore(self, e):
+        self.btnCalcola.setEnabled(True)
+        self.lblEsito.setText("")
+        QMessageBox.critical(self, "Errore", f"Errore durante il calcolo:\n{e}")
+
+    def _mostra_piano(self, piano):
+        self.piano = piano
+        self.btnCalcola.setEnabled(True)
+
+        self.table.setRowCount(len(piano.proposte))
+        for r, p in enumerate(piano.proposte):
+            data = p.riga.data or ""
+            valori = [
+                "-".join(reversed(data.split("-"))),
+                p.riga.ora,
+                p.riga.cliente,
+                p.riga.servizio,
+                p.dipendente,
+                "Sì" if p.abituale else "",
+            ]
+            for c, v in enumerate(valori):
+                item = QTableWidgetItem("" if v is None else str(v))
+                if c == 0:
+                    item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+                    item.setCheckState(Qt.CheckState.Checked)
+                self.table.setItem(r, c, item)
+
+        testo = f"{len(piano.proposte)} proposte calcolate in {piano.secondi:.2f} s."
+        if piano.scoperti:
+            testo += (f" {len(piano.scoperti)} interventi restano senza personale sufficiente "
+                      f"(nessun dipendente libero o ore settimanali esaurite).")
+        self.lblEsito.setText(testo)
+        self.buttons.button(QDialogButtonBox.StandardButton.Ok).setEnabled(bool(piano.proposte))
+
+    # ---------------- APPLICA ----------------
+    def proposte_scelte(self) -> list:
+        if self.piano is None:
+            return []
+        return [p for r, p in enumerate(self.piano.proposte)
+                if self.table.item(r, 0).checkState() == Qt.CheckState.Checked]
+
+    def _on_accept(self):
+        scelte = self.proposte_scelte()
+        if not scelte:
+            QMessageBox.warning(self, "Nessuna proposta", "Seleziona almeno una proposta da applicare.")
+            return
+        try:
+            self.applicate = applica(scelte)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            QMessageBox.critical(self, "Errore", f"Errore durante il salvataggio:\n{e}")
+            return
+        self.accept()
+
+    def done(self, r):
+        if self.executor is not None:
+            self.executor.annulla("assegnazione")
+        super().done(r)
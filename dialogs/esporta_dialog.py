@@ -0,0 +1,130 @@
+from PyQt6.QtWidgets import (
+    QDialog, QFormLayout, QComboBox, QDateEdit, QCheckBox, QDialogButtonBox, QFileDialog, QMessageBox
+)
+from PyQt6.QtCore import QDate
+
+from models.dipendenti import Dipendente
+from services.esporta import esporta_file
+
+
+class EsportaDialog(QDialog):
+    """
+    Esportazione in CSV o JSON Lines. Si sceglie cosa esportare e i filtri,
+    poi il file; la scrittura (in streaming) gira nel worker.
+    """
+
+    ENTITA = [
+        ("Clienti", "clienti"),
+        ("Dipendenti", "dipendenti"),
+        ("Servizi", "servizi"),
+        ("Interventi (singoli)", "interventi"),
+        ("Occorrenze dei ricorrenti", "occorrenze"),
+    ]
+    FORMATI = [("CSV", "csv", "File CSV (*.csv)"), ("JSON Lines", "jsonl", "JSON Lines (*.jsonl)")]
+
+    def __init__(self, parent=None, executor=None):
+        super().__init__(parent)
+        self.executor = executor
+        self.esportate = None
+
+        self.setWindowTitle("Esporta dati")
+
+        self.comboEntita = QComboBox()
+        for testo, chiave in self.ENTITA:
+            self.comboEntita.addItem(testo, chiave)
+        self.comboEntita.currentIndexChanged.connect(self._aggiorna_filtri)
+
+        self.comboFormato = QComboBox()
+        for testo, chiave, _ in self.FORMATI:
+            self.comboFormato.addItem(testo, chiave)
+
+        # periodo: anno corrente
+        anno = QDate.currentDate().year()
+        self.chkPeriodo = QCheckBox("Solo nel periodo")
+        self.chkPeriodo.toggled.connect(self._aggiorna_filtri)
+        self.dateDa = QDateEdit(QDate(anno, 1, 1))
+        self.dateA = QDateEdit(QDate(anno, 12, 31))
+        for d in (self.dateDa, self.dateA):
+            d.setCalendarPopup(True)
+            d.setDisplayFormat("dd-MM-yyyy")
+
+        self.comboDipendente = QComboBox()
+        self.comboDipendente.addItem("Tutti", None)
+        for d in Dipendente.all():
+            self.comboDipendente.addItem(f"{d.nome} {d.cognome}", d.id)
+
+        form = QFormLayout(self)
+        form.addRow("Dati:", self.comboEntita)
+        form.addRow("Formato:", self.comboFormato)
+        form.addRow("", self.chkPeriodo)
+        form.addRow("Dal:", self.dateDa)
+        form.addRow("Al:", self.dateA)
+        form.addRow("Dipendente:", self.comboDipendente)
+
+        self.buttons = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok |
+            QDialogButtonBox.StandardButton.Cancel
+        )
+        self.buttons.button(QDialogButtonBox.StandardButton.Ok).setText("Esporta…")
+        self.buttons.accepted.connect(self._on_accept)
+        self.buttons.rejected.connect(self.reject)
+        form.addRow(self.buttons)
+
+        self._aggiorna_filtri()
+
+    def _aggiorna_filtri(self):
+        # periodo e dipendente valgono solo per interventi e occorrenze
+        agenda = self.comboEntita.currentData() in ("interventi", "occorrenze")
+        # le occorrenze hanno sempre bisogno di un periodo
+        if self.comboEntita.currentData() == "occorrenze":
+            self.chkPeriodo.setChecked(True)
+        self.chkPeriodo.setEnabled(self.comboEntita.currentData() == "interventi")
+        self.dateDa.setEnabled(agenda and self.chkPeriodo.isChecked())
+        self.dateA.setEnabled(agenda and self.chkPeriodo.isChecked())
+        self.comboDipendente.setEnabled(agenda)
+
+    def filtri(self) -> dict:
+        entita = self.comboEntita.currentData()
+        if entita not in ("interventi", "occorrenze"):
+            return {}
+        out = {"dipendente_id": self.comboDipendente.currentData()}
+        if self.chkPeriodo.isChecked():
+            out["da"] = self.dateDa.date().toPyDate()
+            out["a"] = self.dateA.date().toPyDate()
+        return out
+
+    def _on_accept(self):
+        entita = self.comboEntita.currentData()
+        _, formato, filtro_file = self.FORMATI[self.comboFormato.currentIndex()]
+        filtri = self.filtri()
+        if filtri.get("da") and filtri["a"] < filtri["da"]:
+            QMessageBox.warning(self, "Periodo non valido", "La data finale precede quella iniziale.")
+            return
+
+        percorso, _ = QFileDialog.getSaveFileName(self, "Esporta", f"{entita}.{formato}", filtro_file)
+        if not percorso:
+            return
+
+        self.buttons.setEnabled(False)
+        if self.executor is None:
+            try:
+                self._fatto(esporta_file(entita, percorso, formato, **filtri))
+            except Exception as e:
+                self._on_errore(e)
+        else:
+            self.executor.submit("esporta", esporta_file, entita, percorso, formato,
+                                 on_done=self._fatto, on_error=self._on_errore, **filtri)
+
+    def _fatto(self, n: int):
+        self.esportate = n
+        QMessageBox.information(self, "Esportazione completata", f"{n} righe esportate.")
+        self.accept()
+
+    def _on_errore(self, e):
+        self.buttons.setEnabled(True)
+        QMessageBox.critical(self, "Errore", f"Errore durante l'esportazione:\n{e}")
+
+    def done(self, r):
+        if self.executor is not None and self.esportate is None:
+            self.executor.annulla("esporta")
+        super().done(r)
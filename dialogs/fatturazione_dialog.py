@@ -0,0 +1,150 @@
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QDateEdit, QPushButton, QLabel,
+    QTableWidget, QTableWidgetItem, QDialogButtonBox, QMessageBox, QHeaderView, QAbstractItemView
+)
+from PyQt6.QtCore import QDate, Qt
+
+from services.fatturazione import chiudi_mese, fatturazione_mese, riapri_mese
+
+
+class FatturazioneDialog(QDialog):
+    """
+    Fatture del mese per cliente. Il mese aperto si calcola nel worker sui dati attuali;
+    "Chiudi mese" genera e salva tutte le fatture, che da lì in poi si rileggono dal DB.
+    """
+
+    COLONNE = ["Cliente", "Servizi", "Dettaglio", "Totale €"]
+
+    def __init__(self, parent=None, executor=None):
+        super().__init__(parent)
+        self.executor = executor
+        self.corrente = None
+
+        self.setWindowTitle("Fatturazione mensile")
+        self.resize(820, 560)
+
+        # default: mese precedente (quello da chiudere)
+        precedente = QDate.currentDate().addMonths(-1)
+        self.dateMese = QDateEdit(QDate(precedente.year(), precedente.month(), 1))
+        self.dateMese.setCalendarPopup(True)
+        self.dateMese.setDisplayFormat("MM-yyyy")
+        self.dateMese.dateChanged.connect(self.carica)
+
+        self.btnChiudi = QPushButton("Chiudi mese")
+        self.btnChiudi.clicked.connect(self.chiudi)
+        self.btnRiapri = QPushButton("Riapri")
+        self.btnRiapri.clicked.connect(self.riapri)
+
+        barra = QHBoxLayout()
+        barra.addWidget(QLabel("Mese:"))
+        barra.addWidget(self.dateMese)
+        barra.addStretch()
+        barra.addWidget(self.btnRiapri)
+        barra.addWidget(self.btnChiudi)
+
+        self.table = QTableWidget(0, len(self.COLONNE))
+        self.table.setHorizontalHeaderLabels(self.COLONNE)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setWordWrap(False)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+
+        self.lblEsito = QLabel("")
+        self.lblEsito.setWordWrap(True)
+
+        self.buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        self.buttons.rejected.connect(self.reject)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(barra)
+        layout.addWidget(self.table)
+        layout.addWidget(self.lblEsito)
+        layout.addWidget(self.buttons)
+
+        self.carica()
+
+    def _mese(self) -> tuple[int, int]:
+        d = self.dateMese.date()
+        return d.year(), d.month()
+
+    def _esegui(self, fn, *args):
+        self.btnChiudi.setEnabled(False)
+        self.btnRiapri.setEnabled(False)
+        self.lblEsito.setText("Calcolo in corso…")
+        if self.executor is None:
+            try:
+                self._mostra(fn(*args))
+            except Exception as e:
+                self._on_errore(e)
+        else:
+            self.executor.submit("fatturazione", fn, *args, on_done=self._mostra, on_error=self._on_errore)
+
+    # ---------------- AZIONI ----------------
+    def carica(self):
+        self._esegui(fatturazione_mese, *self._mese())
+
+    def chiudi(self):
+        anno, mese = self._mese()
+        risposta = QMessageBox.question(
+            self, "Chiudi mese",
+            f"Generare e salvare le fatture di {mese:02d}/{anno}?\n"
+            "Le modifiche successive agli interventi non cambieranno più questo mese."
+        )
+        if risposta == QMessageBox.StandardButton.Yes:
+            self._esegui(chiudi_mese, anno, mese)
+
+    def riapri(self):
+        anno, mese = self._mese()
+        risposta = QMessageBox.question(
+            self, "Riapri mese",
+            f"Eliminare le fatture salvate di {mese:02d}/{anno}? Il mese verrà ricalcolato."
+        )
+        if risposta == QMessageBox.StandardButton.Yes:
+            riapri_mese(anno, mese)
+            self.carica()
+
+    def _on_errore(self, e):
+        self.lblEsito.setText("")
+        self._aggiorna_pulsanti()
+        QMessageBox.warning(self, "Fatturazione", str(e))
+
+    # ---------------- TABELLA ----------------
+    def _mostra(self, risultato):
+        if (risultato.anno, risultato.mese) != self._mese():
+            return  # nel frattempo è stato scelto un altro mese
+        self.corrente = risultato
+        fatture = risultato.fatture()
+
+        self.table.setUpdatesEnabled(False)
+        try:
+            self.table.setRowCount(len(fatture))
+            for r, f in enumerate(fatture):
+                dettaglio = ", ".join(
+                    riga.servizio if riga.quota >= 1 else f"{riga.servizio} ({riga.quota:.0%})"
+                    for riga in f.righe
+                )
+                valori = [f.cliente, str(len(f.righe)), dettaglio, f"{f.totale:,.2f}"]
+                for c, v in enumerate(valori):
+                    item = QTableWidgetItem(v)
+                    if c == 3:
+                        item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                    self.table.setItem(r, c, item)
+        finally:
+            self.table.setUpdatesEnabled(True)
+
+        stato = f"chiuso il {risultato.chiuso_il}" if risultato.chiuso else "aperto (calcolato sui dati attuali)"
+        self.lblEsito.setText(f"{len(fatture)} clienti, totale {risultato.totale:,.2f} € — mese {stato}.")
+        self._aggiorna_pulsanti()
+
+    def _aggiorna_pulsanti(self):
+        chiuso = self.corrente is not None and self.corrente.chiuso
+        self.btnChiudi.setEnabled(not chiuso)
+        self.btnRiapri.setEnabled(chiuso)
+
+    def done(self, r):
+        if self.executor is not None:
+            self.executor.annulla("fatturazione")
+        super().done(r)
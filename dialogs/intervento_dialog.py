@@ -1,19 +1,26 @@
+import calendar
+from datetime import date
+
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QFormLayout, QComboBox,
     QDateEdit, QTimeEdit, QDoubleSpinBox,
-    QDialogButtonBox, QMessageBox, QListWidget, QListWidgetItem, QAbstractItemView
+    QDialogButtonBox, QMessageBox, QListWidget, QListWidgetItem, QAbstractItemView, QLabel
 )
 from PyQt6.QtCore import QDate, QTime, Qt
 
 from models.cliente import Cliente
 from models.dipendenti import Dipendente
 from models.servizi import Servizio
+from services.conflitti import STATI_IGNORATI
+from services.timeline import DURATA_DEFAULT_MIN
+from widgets.conflitti_live import ControlloConflitti
 
 
 class InterventoDialog(QDialog):
-    def __init__(self, parent=None, intervento=None):
+    def __init__(self, parent=None, intervento=None, executor=None):
         super().__init__(parent)
         self._dati = None
+        self._escludi = None  # in modifica: ("SINGOLO", id), non confligge con se stesso
 
         self.setWindowTitle("Intervento")
 
@@ -38,6 +45,8 @@ class InterventoDialog(QDialog):
         self.timeDurata.setDisplayFormat("HH:mm")
         self.timeDurata.setTime(QTime(0, 0))
 
+        self.lblConflitti = QLabel()
+
         # popolamento combo da DB
         self._load_combo()
 
@@ -49,6 +58,7 @@ class InterventoDialog(QDialog):
         form.addRow("Ora inizio:", self.timeOra)
         form.addRow("Durata:", self.timeDurata)
         form.addRow("Stato:", self.comboStato)
+        form.addRow("Conflitti:", self.lblConflitti)
 
         buttons = QDialogButtonBox(
             QDialogButtonBox.StandardButton.Ok |
@@ -69,6 +79,37 @@ class InterventoDialog(QDialog):
         else:
             self.setWindowTitle("Aggiungi intervento")
 
+        # verifica live dei conflitti: indice del mese della data, poi solo verifiche
+        self.controllo = ControlloConflitti(self.listDipendenti, self.lblConflitti,
+                                            self._verifica_conflitti, executor, parent=self)
+        self.listDipendenti.itemSelectionChanged.connect(self.controllo.aggiorna)
+        self.timeOra.timeChanged.connect(self.controllo.aggiorna)
+        self.timeDurata.timeChanged.connect(self.controllo.aggiorna)
+        self.comboStato.currentIndexChanged.connect(self.controllo.aggiorna)
+        self.dateData.dateChanged.connect(self._carica_conflitti)
+        self._carica_conflitti()
+
+    # ---------------- CONFLITTI ----------------
+    def _carica_conflitti(self):
+        d = self.dateData.date().toPyDate()
+        self.controllo.carica(date(d.year, d.month, 1), date(d.year, d.month, calendar.monthrange(d.year, d.month)[1]))
+
+    def _verifica_conflitti(self, indice, dipendente_ids, limite=None):
+        if self.comboStato.currentText() in STATI_IGNORATI:
+            return []
+        t = self.timeOra.time()
+        durata = self.timeDurata.time()
+        return indice.verifica_singolo(
+            dipendente_ids, self.dateData.date().toPyDate(),
+            t.hour() * 60 + t.minute(),
+            (durata.hour() * 60 + durata.minute()) or DURATA_DEFAULT_MIN,
+            self._escludi, limite,
+        )
+
+    def done(self, r):
+        self.controllo.chiudi()
+        super().done(r)
+
     def _load_combo(self):
         # Clienti
         self.comboCliente.clear()
@@ -97,6 +138,9 @@ class InterventoDialog(QDialog):
                 return
 
     def set_dati(self, x: dict):
+        if x.get("id") is not None:
+            self._escludi = ("SINGOLO", x["id"])
+
         self._select_by_data(self.comboCliente, x.get("cliente_id"))
         self._select_by_data(self.comboServizio, x.get("servizio_id"))
 
@@ -154,6 +198,17 @@ class InterventoDialog(QDialog):
             QMessageBox.warning(self, "Dati mancanti", "La durata è obbligatoria (es. 00:30).")
             return
 
+        conflitti = self.controllo.conflitti_prima_di_salvare()
+        if conflitti:
+            elenco = "\n".join(c.descrizione() for c in conflitti[:5])
+            scelta = QMessageBox.question(
+                self, "Conflitti",
+                f"Alcuni dipendenti sono già impegnati:\n{elenco}\n\nSalvare comunque?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if scelta != QMessageBox.StandardButton.Yes:
+                return
+
         self._dati = {
             "cliente_id": self.comboCliente.currentData(),
             "servizio_id": self.comboServizio.currentData(),
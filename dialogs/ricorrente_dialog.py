@@ -1,19 +1,24 @@
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QFormLayout, QComboBox,
     QTimeEdit, QDoubleSpinBox, QDialogButtonBox, QMessageBox,
-    QListWidget, QListWidgetItem, QAbstractItemView, QCheckBox, QWidget, QHBoxLayout
+    QListWidget, QListWidgetItem, QAbstractItemView, QCheckBox, QWidget, QHBoxLayout, QLabel
 )
 from PyQt6.QtCore import QTime, Qt
 
 from models.cliente import Cliente
 from models.dipendenti import Dipendente
 from models.servizi import Servizio
+from services.conflitti import periodo_ricorrente
+from services.timeline import DURATA_DEFAULT_MIN
+from widgets.conflitti_live import ControlloConflitti
 
 
 class RicorrenteDialog(QDialog):
-    def __init__(self, parent=None, ricorrente=None):
+    def __init__(self, parent=None, ricorrente=None, executor=None):
         super().__init__(parent)
         self._dati = None
+        self._escludi = None   # in modifica: ("RICORRENTE", id)
+        self._periodo = (None, None)  # data_inizio, data_fine della regola (None = default)
 
         self.setWindowTitle("Ricorrente")
 
@@ -45,6 +50,8 @@ class RicorrenteDialog(QDialog):
             self.chk[val] = c
             giorni_layout.addWidget(c)
 
+        self.lblConflitti = QLabel()
+
         # popolo da DB
         self._load_combo()
 
@@ -56,6 +63,7 @@ class RicorrenteDialog(QDialog):
         form.addRow("Ora inizio:", self.timeOra)
         form.addRow("Durata:", self.timeDurata)
         form.addRow("Stato:", self.chkAttivo)
+        form.addRow("Conflitti:", self.lblConflitti)
 
         buttons = QDialogButtonBox(
             QDialogButtonBox.StandardButton.Ok |
@@ -75,6 +83,35 @@ class RicorrenteDialog(QDialog):
         else:
             self.setWindowTitle("Aggiungi ricorrente")
 
+        # verifica live dei conflitti su tutte le occorrenze del periodo della regola
+        self.controllo = ControlloConflitti(self.listDipendenti, self.lblConflitti,
+                                            self._verifica_conflitti, executor, parent=self)
+        self.listDipendenti.itemSelectionChanged.connect(self.controllo.aggiorna)
+        self.timeOra.timeChanged.connect(self.controllo.aggiorna)
+        self.timeDurata.timeChanged.connect(self.controllo.aggiorna)
+        self.chkAttivo.toggled.connect(self.controllo.aggiorna)
+        for cb in self.chk.values():
+            cb.toggled.connect(self.controllo.aggiorna)
+        self.controllo.carica(*periodo_ricorrente(*self._periodo))
+
+    # ---------------- CONFLITTI ----------------
+    def _verifica_conflitti(self, indice, dipendente_ids, limite=None):
+        giorni = [val for val, cb in self.chk.items() if cb.isChecked()]
+        if not self.chkAttivo.isChecked() or not giorni:
+            return []
+        t = self.timeOra.time()
+        durata = self.timeDurata.time()
+        return indice.verifica_ricorrente(
+            dipendente_ids, giorni, *periodo_ricorrente(*self._periodo),
+            t.hour() * 60 + t.minute(),
+            (durata.hour() * 60 + durata.minute()) or DURATA_DEFAULT_MIN,
+            self._escludi, limite,
+        )
+
+    def done(self, r):
+        self.controllo.chiudi()
+        super().done(r)
+
     def _load_combo(self):
         # Clienti
         self.comboCliente.clear()
@@ -100,6 +137,10 @@ class RicorrenteDialog(QDialog):
                 return
 
     def set_dati(self, r: dict):
+        if r.get("id") is not None:
+            self._escludi = ("RICORRENTE", r["id"])
+        self._periodo = (r.get("data_inizio"), r.get("data_fine"))
+
         self._select_by_data(self.comboCliente, r.get("cliente_id"))
         self._select_by_data(self.comboServizio, r.get("servizio_id"))
 
@@ -158,6 +199,18 @@ class RicorrenteDialog(QDialog):
 
         dip_ids = [item.data(Qt.ItemDataRole.UserRole) for item in self.listDipendenti.selectedItems()]
 
+        conflitti = self.controllo.conflitti_prima_di_salvare()
+        if conflitti:
+            n = len(conflitti)
+            elenco = "\n".join(c.descrizione() for c in conflitti[:5])
+            scelta = QMessageBox.question(
+                self, "Conflitti",
+                f"{n} occorrenze si sovrappongono a impegni già presenti:\n{elenco}\n\nSalvare comunque?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if scelta != QMessageBox.StandardButton.Yes:
+                return
+
         self._dati = {
             "cliente_id": self.comboCliente.currentData(),
             "servizio_id": self.comboServizio.currentData(),
@@ -0,0 +1,5 @@
+import sys
+
+from gestione.cli import main
+
+sys.exit(main())
@@ -0,0 +1,283 @@
+"""
+Riga di comando per i lavori senza interfaccia (cron, server dell'ufficio):
+
+    python -m gestione migra
+    python -m gestione rinnova
+    python -m gestione importa clienti nuovi_clienti.csv --lotto 5000
+    python -m gestione esporta interventi agenda.jsonl --da 2026-01-01 --a 2026-03-31 --dipendente 4
+    python -m gestione ics --cartella /srv/calendari
+    python -m gestione report carichi --da 2026-01-05 --a 2026-03-29 --formato csv
+    python -m gestione report fatturazione --mese 2026-02 --chiudi
+    python -m gestione benchmark
+
+Non importa mai PyQt6: usa solo database/, models/ e services/. I moduli di ogni comando
+si importano dentro il comando, così l'avvio costa pochi millisecondi.
+Il DB si sceglie con --db (default: quello dell'app); il profilo di default è "batch".
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+import time
+from datetime import date, timedelta
+
+
+# ---------------------------------------------------------
+#  OUTPUT
+# ---------------------------------------------------------
+def _stampa(intestazioni: list, righe: list, formato: str = "testo", out=None):
+    out = out or sys.stdout
+    if formato == "csv":
+        w = csv.writer(out, lineterminator="\n")
+        w.writerow(intestazioni)
+        w.writerows(righe)
+        return
+
+    testi = [[str(v) for v in r] for r in righe]
+    larghezze = [max([len(h)] + [len(r[i]) for r in testi]) for i, h in enumerate(intestazioni)]
+    print("  ".join(h.ljust(n) for h, n in zip(intestazioni, larghezze)).rstrip(), file=out)
+    print("  ".join("-" * n for n in larghezze), file=out)
+    for r in testi:
+        print("  ".join(v.ljust(n) for v, n in zip(r, larghezze)).rstrip(), file=out)
+
+
+def _data(testo: str) -> date:
+    try:
+        return date.fromisoformat(testo)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"data non valida: {testo!r} (atteso YYYY-MM-DD)")
+
+
+def _mese(testo: str) -> tuple[int, int]:
+    try:
+        anno, mese = (int(x) for x in testo.split("-"))
+        date(anno, mese, 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"mese non valido: {testo!r} (atteso YYYY-MM)")
+    return anno, mese
+
+
+# ---------------------------------------------------------
+#  COMANDI
+# ---------------------------------------------------------
+def cmd_migra(args) -> int:
+    from database.migrations import migrate, versione_corrente
+
+    applicate = migrate()
+    if applicate:
+        print(f"Migrazioni applicate: {', '.join(map(str, applicate))}")
+    print(f"Schema alla versione {versione_corrente()}")
+    return 0
+
+
+def cmd_rinnova(args) -> int:
+    from database.repositories.ricorrenti_repo import rinnova_ricorrenti_scaduti
+
+    print(f"Ricorrenti rinnovati: {rinnova_ricorrenti_scaduti()}")
+    return 0
+
+
+def cmd_importa(args) -> int:
+    from services.importa import importa_file
+
+    esito = importa_file(args.entita, args.file, args.lotto)
+    for riga, messaggio in esito.errori:
+        print(f"riga {riga}: {messaggio}", file=sys.stderr)
+    if esito.n_errori > len(esito.errori):
+        print(f"... e altri {esito.n_errori - len(esito.errori)} errori", file=sys.stderr)
+    print(esito.riepilogo())
+    return 1 if esito.n_errori else 0
+
+
+def cmd_esporta(args) -> int:
+    from services.esporta import esporta, esporta_file, formato_da_percorso
+
+    filtri = {"da": args.da, "a": args.a, "dipendente_id": args.dipendente}
+    if args.file in (None, "-"):
+        n = esporta(args.entita, sys.stdout, args.formato or "csv", **filtri)
+    else:
+        n = esporta_file(args.entita, args.file, args.formato or formato_da_percorso(args.file), **filtri)
+    print(f"Righe esportate: {n}", file=sys.stderr)
+    return 0
+
+
+def cmd_ics(args) -> int:
+    from services.calendario_ics import aggiorna_feed, genera_ics
+
+    if args.cartella:
+        print(aggiorna_feed(args.cartella).riepilogo())
+        return 0
+
+    testo = genera_ics(args.dipendente)
+    if args.file in (None, "-"):
+        sys.stdout.write(testo)
+    else:
+        with open(args.file, "w", encoding="utf-8", newline="") as f:
+            f.write(testo)
+    return 0
+
+
+def cmd_report_carichi(args) -> int:
+    from services.carichi import report_carichi
+
+    oggi = date.today()
+    da = args.da or oggi - timedelta(days=oggi.weekday())
+    a = args.a or da + timedelta(weeks=args.settimane, days=-1)
+    report = report_carichi(da, a)
+
+    intestazioni = ["Dipendente", "Contratto"] + [f"{anno}-W{s:02d}" for anno, s in report.settimane] + ["Totale"]
+    righe = []
+    for r in report.righe:
+        celle = []
+        for i, ore in enumerate(r.ore):
+            segno = {"sopra": "+", "sotto": "-"}.get(r.stato(i), "") if args.formato == "testo" else ""
+            celle.append(f"{ore:.1f}{segno}")
+        righe.append([r.nome, "" if r.ore_contratto is None else f"{r.ore_contratto:g}"]
+                     + celle + [f"{r.totale:.1f}"])
+    _stampa(intestazioni, righe, args.formato)
+    return 0
+
+
+def cmd_report_fatturazione(args) -> int:
+    from services.fatturazione import chiudi_mese, fatturazione_mese
+
+    if args.mese:
+        anno, mese = args.mese
+    else:
+        precedente = date.today().replace(day=1) - timedelta(days=1)
+        anno, mese = precedente.year, precedente.month
+
+    risultato = chiudi_mese(anno, mese) if args.chiudi else fatturazione_mese(anno, mese)
+
+    if args.dettaglio:
+        _stampa(["Cliente", "Servizio", "Prezzo", "Quota", "Singoli", "Importo"],
+                [[r.cliente, r.servizio, f"{r.prezzo_mensile:.2f}", f"{r.quota:.4f}", r.n_singoli,
+                  f"{r.importo:.2f}"] for r in risultato.righe],
+                args.formato)
+    else:
+        _stampa(["Cliente", "Servizi", "Totale"],
+                [[f.cliente, len(f.righe), f"{f.totale:.2f}"] for f in risultato.fatture()],
+                args.formato)
+
+    stato = f"chiuso il {risultato.chiuso_il}" if risultato.chiuso else "aperto"
+    print(f"{mese:02d}/{anno}: {len(risultato.fatture())} clienti, totale {risultato.totale:.2f} ({stato})",
+          file=sys.stderr)
+    return 0
+
+
+def cmd_benchmark(args) -> int:
+    """Tempi delle operazioni principali a cache vuota (sola lettura)."""
+    from services import ricorrenze
+    from services.cache_calendario import invalida_tutto
+    from services.calendario import eventi_mese
+    from services.carichi import cache_settimane, report_carichi
+    from services.conflitti import indice_periodo
+    from services.fatturazione import calcola_mese
+
+    oggi = date.today()
+    lunedi = oggi - timedelta(days=oggi.weekday())
+    precedente = oggi.replace(day=1) - timedelta(days=1)
+
+    prove = [
+        ("calendario: 12 mesi", lambda: [eventi_mese(oggi.year, m) for m in range(1, 13)]),
+        ("conflitti: indice annuale",
+         lambda: indice_periodo(date(oggi.year, 1, 1), date(oggi.year, 12, 31))),
+        ("carichi: 52 settimane", lambda: report_carichi(lunedi, lunedi + timedelta(weeks=52, days=-1))),
+        ("fatturazione: mese precedente", lambda: calcola_mese(precedente.year, precedente.month)),
+    ]
+
+    righe = []
+    for nome, fn in prove:
+        tempi = []
+        for _ in range(args.ripetizioni):
+            invalida_tutto()
+            ricorrenze.invalida_tutto()
+            cache_settimane.clear()
+            t0 = time.perf_counter()
+            fn()
+            tempi.append((time.perf_counter() - t0) * 1000)
+        tempi.sort()
+        righe.append([nome, f"{tempi[0]:.1f}", f"{tempi[len(tempi) // 2]:.1f}"])
+    _stampa(["Operazione", "min ms", "mediana ms"], righe)
+    return 0
+
+
+# ---------------------------------------------------------
+#  PARSER
+# ---------------------------------------------------------
+def crea_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="python -m gestione", description="Gestione pulizie: comandi batch.")
+    p.add_argument("--db", help="file del database (default: quello dell'app)")
+    p.add_argument("--profilo", default="batch", help="profilo di tuning SQLite (default: batch)")
+    sub = p.add_subparsers(dest="comando", required=True, metavar="COMANDO")
+
+    c = sub.add_parser("migra", aliases=["migrate"], help="porta lo schema all'ultima versione")
+    c.set_defaults(fn=cmd_migra)
+
+    c = sub.add_parser("rinnova", aliases=["renew"], help="rinnova i ricorrenti attivi scaduti")
+    c.set_defaults(fn=cmd_rinnova)
+
+    c = sub.add_parser("importa", aliases=["import"], help="importa clienti/dipendenti/servizi da CSV")
+    c.add_argument("entita", choices=("clienti", "dipendenti", "servizi"))
+    c.add_argument("file", help="file CSV con intestazione (separatore , o ;)")
+    c.add_argument("--lotto", type=int, default=1000, help="righe per transazione (default: 1000)")
+    c.set_defaults(fn=cmd_importa)
+
+    c = sub.add_parser("esporta", aliases=["export"], help="esporta anagrafiche, interventi o occorrenze")
+    c.add_argument("entita", choices=("clienti", "dipendenti", "servizi", "interventi", "occorrenze"))
+    c.add_argument("file", nargs="?", help="file di destinazione (default o '-': standard output)")
+    c.add_argument("--formato", choices=("csv", "jsonl"), help="default: dall'estensione del file, altrimenti csv")
+    c.add_argument("--da", type=_data, help="solo interventi/occorrenze: primo giorno")
+    c.add_argument("--a", type=_data, help="solo interventi/occorrenze: ultimo giorno")
+    c.add_argument("--dipendente", type=int, help="solo interventi/occorrenze: id del dipendente")
+    c.set_defaults(fn=cmd_esporta)
+
+    c = sub.add_parser("ics", help="calendario iCalendar: un file o i feed per dipendente")
+    c.add_argument("file", nargs="?", help="file .ics di destinazione (default o '-': standard output)")
+    c.add_argument("--dipendente", type=int, help="solo gli interventi di questo dipendente")
+    c.add_argument("--cartella", help="aggiorna i feed per dipendente in questa cartella (solo i cambiati)")
+    c.set_defaults(fn=cmd_ics)
+
+    report = sub.add_parser("report", help="report carichi o fatturazione")
+    tipi = report.add_subparsers(dest="tipo", required=True, metavar="TIPO")
+
+    c = tipi.add_parser("carichi", help="ore per dipendente e settimana ISO")
+    c.add_argument("--da", type=_data, help="primo giorno (default: lunedì corrente)")
+    c.add_argument("--a", type=_data, help="ultimo giorno (default: da + --settimane)")
+    c.add_argument("--settimane", type=int, default=52)
+    c.add_argument("--formato", choices=("testo", "csv"), default="testo")
+    c.set_defaults(fn=cmd_report_carichi)
+
+    c = tipi.add_parser("fatturazione", help="fatture del mese per cliente")
+    c.add_argument("--mese", type=_mese, help="YYYY-MM (default: mese precedente)")
+    c.add_argument("--chiudi", action="store_true", help="chiude il mese e salva le fatture")
+    c.add_argument("--dettaglio", action="store_true", help="una riga per cliente e servizio")
+    c.add_argument("--formato", choices=("testo", "csv"), default="testo")
+    c.set_defaults(fn=cmd_report_fatturazione)
+
+    c = sub.add_parser("benchmark", help="tempi delle operazioni principali")
+    c.add_argument("--ripetizioni", type=int, default=3)
+    c.set_defaults(fn=cmd_benchmark)
+
+    return p
+
+
+def main(argv=None) -> int:
+    args = crea_parser().parse_args(argv)
+
+    from database import database as db
+    if args.profilo not in db.PROFILI:
+        print(f"Profilo sconosciuto: {args.profilo} (disponibili: {', '.join(db.PROFILI)})", file=sys.stderr)
+        return 2
+    db.configure(db_path=args.db, profilo=args.profilo)
+
+    try:
+        if args.fn is not cmd_migra:
+            db.init_db()
+        return args.fn(args)
+    except (ValueError, OSError) as e:
+        print(f"Errore: {e}", file=sys.stderr)
+        return 1
+    finally:
+        db.close_all()
@@ -1,4 +1,8 @@
 import sys
+
+# per primo: il cronometro parte all'import
+from services.avvio import cronometro
+
 from PyQt6.QtWidgets import QApplication
 
 from database.database import init_db
@@ -6,8 +10,11 @@ from windows.main_window import MainWindow
 
 
 if __name__ == "__main__":
+    cronometro.segna("import moduli")
+
     # 1) Inizializzo il DB (crea file + tabelle se mancano)
     init_db()
+    cronometro.segna("init_db")
 
     # 2) Avvio l'app
     app = QApplication(sys.argv)
@@ -16,6 +23,3 @@ if __name__ == "__main__":
     window.show()
 
     sys.exit(app.exec())
-
-
-
@@ -2,7 +2,22 @@ import sqlite3
 from dataclasses import dataclass
 from typing import List, Optional
 
-from database.database import get_connection
+from database.database import get_connection, transaction
+from database.index_advisor import registra_query
+from services import cache_calendario
+from services.normalizza import norm_nome
+
+
+_SQL_IN_INTERVENTI = registra_query(
+    "cliente_in_interventi", "SELECT 1 FROM interventi WHERE cliente_id = ? LIMIT 1"
+)
+_SQL_IN_RICORRENTI = registra_query(
+    "cliente_in_interventi_ricorrenti", "SELECT 1 FROM interventi_ricorrenti WHERE cliente_id = ? LIMIT 1"
+)
+_SQL_DUPLICATO = registra_query(
+    "cliente_duplicato",
+    "SELECT 1 FROM clienti WHERE cognome_norm = ? AND nome_norm = ? AND id IS NOT ? LIMIT 1"
+)
 
 
 @dataclass
@@ -38,16 +53,16 @@ class Cliente:
     def create(nome: str, cognome: str,
                telefono: str = "", indirizzo: str = "",
                email: str = "") -> "Cliente":
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO clienti (nome, cognome, telefono, indirizzo, email)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """,
-            (nome, cognome, telefono, indirizzo, email),
-        )
-        conn.commit()
+        with transaction() as conn:
+            cur = conn.execute(
+                """
+                INSERT INTO clienti (nome, cognome, telefono, indirizzo, email,
+                                     nome_norm, cognome_norm)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (nome, cognome, telefono, indirizzo, email,
+                 norm_nome(nome), norm_nome(cognome)),
+            )
         new_id = cur.lastrowid
         return Cliente(new_id, nome, cognome, telefono, indirizzo, email)
 
@@ -68,26 +83,47 @@ class Cliente:
             email=row["email"],
         )
 
-    def update(self):
+    def update(self) -> "Cliente":
         if self.id is None:
             raise ValueError("Cliente senza id, impossibile aggiornare")
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute(
-            """
-            UPDATE clienti
-            SET nome = ?, cognome = ?, telefono = ?, indirizzo = ?, email = ?
-            WHERE id = ?
-            """,
-            (self.nome, self.cognome, self.telefono,
-             self.indirizzo, self.email, self.id),
-        )
-        conn.commit()
+        with transaction() as conn:
+            conn.execute(
+                """
+                UPDATE clienti
+                SET nome = ?, cognome = ?, telefono = ?, indirizzo = ?, email = ?,
+                    nome_norm = ?, cognome_norm = ?
+                WHERE id = ?
+                """,
+                (self.nome, self.cognome, self.telefono,
+                 self.indirizzo, self.email,
+                 norm_nome(self.nome), norm_nome(self.cognome), self.id),
+            )
+        # gli eventi del calendario in cache riportano il nome del cliente
+        cache_calendario.invalida_tutto()
+        return self
 
     def delete(self):
         if self.id is None:
             return
+        with transaction() as conn:
+            conn.execute("DELETE FROM clienti WHERE id = ?;", (self.id,))
+
+    @staticmethod
+    def in_uso(cliente_id: int):
+        """
+        'intervento' o 'ricorrente' se il cliente è ancora referenziato (quindi non eliminabile),
+        altrimenti None. Le due query usano gli indici su cliente_id (migrazione 2).
+        """
         conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM clienti WHERE id = ?;", (self.id,))
-        conn.commit()
+        if conn.execute(_SQL_IN_INTERVENTI, (cliente_id,)).fetchone():
+            return "intervento"
+        if conn.execute(_SQL_IN_RICORRENTI, (cliente_id,)).fetchone():
+            return "ricorrente"
+        return None
+
+    @staticmethod
+    def esiste(nome: str, cognome: str, escludi_id: int | None = None) -> bool:
+        """Duplicato secondo norm_nome (ricerca sull'indice idx_clienti_norm)."""
+        conn = get_connection()
+        row = conn.execute(_SQL_DUPLICATO, (norm_nome(cognome), norm_nome(nome), escludi_id)).fetchone()
+        return row is not None
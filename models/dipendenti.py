@@ -1,4 +1,19 @@
-from database.database import get_connection
+from database.database import get_connection, transaction
+from database.index_advisor import registra_query
+from services import cache_calendario
+from services.normalizza import norm_nome
+
+
+_SQL_IN_INTERVENTI = registra_query(
+    "dipendente_in_interventi_dipendenti", "SELECT 1 FROM interventi_dipendenti WHERE dipendente_id = ? LIMIT 1"
+)
+_SQL_IN_RICORRENTI = registra_query(
+    "dipendente_in_ricorrenti_dipendenti", "SELECT 1 FROM ricorrenti_dipendenti WHERE dipendente_id = ? LIMIT 1"
+)
+_SQL_DUPLICATO = registra_query(
+    "dipendente_duplicato",
+    "SELECT 1 FROM dipendenti WHERE cognome_norm = ? AND nome_norm = ? AND id IS NOT ? LIMIT 1"
+)
 
 
 class Dipendente:
@@ -81,57 +96,80 @@ class Dipendente:
     # ---------------------------------------------------------
     @staticmethod
     def create(dati):
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO dipendenti
-                (nome, cognome, telefono, email, mansione,
-                 ore_settimanali, stipendio, scadenza_contratto)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            dati["nome"],
-            dati["cognome"],
-            dati.get("telefono"),
-            dati.get("email"),
-            dati.get("mansione"),
-            dati.get("ore_settimanali"),
-            dati.get("stipendio"),
-            dati.get("scadenza_contratto"),
-        ))
-        conn.commit()
-        return cur.lastrowid
+        with transaction() as conn:
+            cur = conn.execute("""
+                INSERT INTO dipendenti
+                    (nome, cognome, telefono, email, mansione,
+                     ore_settimanali, stipendio, scadenza_contratto,
+                     nome_norm, cognome_norm)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                dati["nome"],
+                dati["cognome"],
+                dati.get("telefono"),
+                dati.get("email"),
+                dati.get("mansione"),
+                dati.get("ore_settimanali"),
+                dati.get("stipendio"),
+                dati.get("scadenza_contratto"),
+                norm_nome(dati["nome"]),
+                norm_nome(dati["cognome"]),
+            ))
+        return Dipendente.get(cur.lastrowid)
 
     # ---------------------------------------------------------
     #  UPDATE
     # ---------------------------------------------------------
     @staticmethod
     def update(id, dati):
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            UPDATE dipendenti
-            SET nome = ?, cognome = ?, telefono = ?, email = ?,
-                mansione = ?, ore_settimanali = ?, stipendio = ?, scadenza_contratto = ?
-            WHERE id = ?
-        """, (
-            dati["nome"],
-            dati["cognome"],
-            dati.get("telefono"),
-            dati.get("email"),
-            dati.get("mansione"),
-            dati.get("ore_settimanali"),
-            dati.get("stipendio"),
-            dati.get("scadenza_contratto"),
-            id
-        ))
-        conn.commit()
+        with transaction() as conn:
+            conn.execute("""
+                UPDATE dipendenti
+                SET nome = ?, cognome = ?, telefono = ?, email = ?,
+                    mansione = ?, ore_settimanali = ?, stipendio = ?, scadenza_contratto = ?,
+                    nome_norm = ?, cognome_norm = ?
+                WHERE id = ?
+            """, (
+                dati["nome"],
+                dati["cognome"],
+                dati.get("telefono"),
+                dati.get("email"),
+                dati.get("mansione"),
+                dati.get("ore_settimanali"),
+                dati.get("stipendio"),
+                dati.get("scadenza_contratto"),
+                norm_nome(dati["nome"]),
+                norm_nome(dati["cognome"]),
+                id
+            ))
+        # gli eventi del calendario in cache riportano i nomi dei dipendenti
+        cache_calendario.invalida_tutto()
+        return Dipendente.get(id)
 
     # ---------------------------------------------------------
     #  DELETE
     # ---------------------------------------------------------
     @staticmethod
     def delete(id):
+        with transaction() as conn:
+            conn.execute("DELETE FROM dipendenti WHERE id = ?", (id,))
+
+    @staticmethod
+    def in_uso(dipendente_id: int):
+        """
+        'intervento' o 'ricorrente' se il dipendente è ancora referenziato (quindi non eliminabile),
+        altrimenti None. Le due query usano gli indici su dipendente_id (migrazione 2).
+        """
         conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM dipendenti WHERE id = ?", (id,))
-        conn.commit()
+        if conn.execute(_SQL_IN_INTERVENTI, (dipendente_id,)).fetchone():
+            return "intervento"
+        if conn.execute(_SQL_IN_RICORRENTI, (dipendente_id,)).fetchone():
+            return "ricorrente"
+        return None
+
+    @staticmethod
+    def esiste(nome, cognome, escludi_id=None) -> bool:
+        """Duplicato secondo norm_nome (ricerca sull'indice idx_dipendenti_norm)."""
+        conn = get_connection()
+        row = conn.execute(_SQL_DUPLICATO, (norm_nome(cognome), norm_nome(nome), escludi_id)).fetchone()
+        return row is not None
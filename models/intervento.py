@@ -1,24 +1,35 @@
 from database.database import get_connection
+from database.repositories.interventi_repo import (
+    create_intervento, update_intervento, delete_intervento
+)
 
 
 class Intervento:
-    def __init__(self, id, cliente_id, servizio_id, dipendente_id, data, ora_inizio, durata_ore, stato, note):
+    # i dipendenti sono N-N (tabella interventi_dipendenti): non esiste una colonna dipendente_id
+    def __init__(self, id, cliente_id, servizio_id, data, ora_inizio, durata_ore, stato, note,
+                 dipendente_ids=None):
         self.id = id
         self.cliente_id = cliente_id
         self.servizio_id = servizio_id
-        self.dipendente_id = dipendente_id
         self.data = data
         self.ora_inizio = ora_inizio
         self.durata_ore = durata_ore
         self.stato = stato
         self.note = note
+        self.dipendente_ids = list(dipendente_ids or [])
 
     @staticmethod
     def all():
         conn = get_connection()
         cur = conn.cursor()
+
+        dip = {}
+        cur.execute("SELECT intervento_id, dipendente_id FROM interventi_dipendenti ORDER BY dipendente_id")
+        for r in cur.fetchall():
+            dip.setdefault(r["intervento_id"], []).append(r["dipendente_id"])
+
         cur.execute("""
-            SELECT id, cliente_id, servizio_id, dipendente_id,
+            SELECT id, cliente_id, servizio_id,
                    data, ora_inizio, durata_ore, stato, note
             FROM interventi
             ORDER BY data DESC, ora_inizio DESC
@@ -31,61 +42,24 @@ class Intervento:
                 id=r["id"],
                 cliente_id=r["cliente_id"],
                 servizio_id=r["servizio_id"],
-                dipendente_id=r["dipendente_id"],
                 data=r["data"],
                 ora_inizio=r["ora_inizio"],
                 durata_ore=r["durata_ore"],
                 stato=r["stato"],
                 note=r["note"],
+                dipendente_ids=dip.get(r["id"]),
             ))
         return out
 
+    # le scritture passano dal repository (intervento + dipendenti in un'unica transazione)
     @staticmethod
     def create(dati: dict):
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO interventi
-                (cliente_id, servizio_id, dipendente_id, data, ora_inizio, durata_ore, stato, note)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            dati["cliente_id"],
-            dati["servizio_id"],
-            dati.get("dipendente_id"),
-            dati["data"],
-            dati["ora_inizio"],
-            dati.get("durata_ore"),
-            dati.get("stato", "Programmato"),
-            dati.get("note"),
-        ))
-        conn.commit()
-        return cur.lastrowid
+        return create_intervento(dict(dati)).id_ref
 
     @staticmethod
     def update(intervento_id: int, dati: dict):
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            UPDATE interventi
-            SET cliente_id = ?, servizio_id = ?, dipendente_id = ?,
-                data = ?, ora_inizio = ?, durata_ore = ?, stato = ?, note = ?
-            WHERE id = ?
-        """, (
-            dati["cliente_id"],
-            dati["servizio_id"],
-            dati.get("dipendente_id"),
-            dati["data"],
-            dati["ora_inizio"],
-            dati.get("durata_ore"),
-            dati.get("stato", "Programmato"),
-            dati.get("note"),
-            intervento_id
-        ))
-        conn.commit()
+        update_intervento(intervento_id, dict(dati))
 
     @staticmethod
     def delete(intervento_id: int):
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM interventi WHERE id = ?", (intervento_id,))
-        conn.commit()
+        delete_intervento(intervento_id)
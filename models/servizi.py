@@ -1,4 +1,18 @@
-from database.database import get_connection
+from database.database import get_connection, transaction
+from database.index_advisor import registra_query
+from services import cache_calendario
+from services.normalizza import norm_nome
+
+
+_SQL_IN_INTERVENTI = registra_query(
+    "servizio_in_interventi", "SELECT 1 FROM interventi WHERE servizio_id = ? LIMIT 1"
+)
+_SQL_IN_RICORRENTI = registra_query(
+    "servizio_in_interventi_ricorrenti", "SELECT 1 FROM interventi_ricorrenti WHERE servizio_id = ? LIMIT 1"
+)
+_SQL_DUPLICATO = registra_query(
+    "servizio_duplicato", "SELECT 1 FROM servizi WHERE nome_norm = ? AND id IS NOT ? LIMIT 1"
+)
 
 
 class Servizio:
@@ -30,39 +44,78 @@ class Servizio:
         return servizi
 
     @staticmethod
-    def create(dati: dict):
+    def get(servizio_id: int):
         conn = get_connection()
         cur = conn.cursor()
         cur.execute("""
-            INSERT INTO servizi (nome, descrizione, prezzo_mensile)
-            VALUES (?, ?, ?)
-        """, (
-            dati["nome"],
-            dati.get("descrizione"),
-            dati.get("prezzo_mensile"),
-        ))
-        conn.commit()
-        return cur.lastrowid
+            SELECT id, nome, descrizione, prezzo_mensile
+            FROM servizi
+            WHERE id = ?
+        """, (servizio_id,))
+        r = cur.fetchone()
+
+        if r is None:
+            return None
+
+        return Servizio(
+            id=r["id"],
+            nome=r["nome"],
+            descrizione=r["descrizione"],
+            prezzo_mensile=r["prezzo_mensile"],
+        )
+
+    @staticmethod
+    def create(dati: dict):
+        with transaction() as conn:
+            cur = conn.execute("""
+                INSERT INTO servizi (nome, descrizione, prezzo_mensile, nome_norm)
+                VALUES (?, ?, ?, ?)
+            """, (
+                dati["nome"],
+                dati.get("descrizione"),
+                dati.get("prezzo_mensile"),
+                norm_nome(dati["nome"]),
+            ))
+        return Servizio.get(cur.lastrowid)
 
     @staticmethod
     def update(servizio_id: int, dati: dict):
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            UPDATE servizi
-            SET nome = ?, descrizione = ?, prezzo_mensile = ?
-            WHERE id = ?
-        """, (
-            dati["nome"],
-            dati.get("descrizione"),
-            dati.get("prezzo_mensile"),
-            servizio_id
-        ))
-        conn.commit()
+        with transaction() as conn:
+            conn.execute("""
+                UPDATE servizi
+                SET nome = ?, descrizione = ?, prezzo_mensile = ?, nome_norm = ?
+                WHERE id = ?
+            """, (
+                dati["nome"],
+                dati.get("descrizione"),
+                dati.get("prezzo_mensile"),
+                norm_nome(dati["nome"]),
+                servizio_id
+            ))
+        # gli eventi del calendario in cache riportano il nome del servizio
+        cache_calendario.invalida_tutto()
+        return Servizio.get(servizio_id)
 
     @staticmethod
     def delete(servizio_id: int):
+        with transaction() as conn:
+            conn.execute("DELETE FROM servizi WHERE id = ?", (servizio_id,))
+
+    @staticmethod
+    def in_uso(servizio_id: int):
+        """
+        'intervento' o 'ricorrente' se il servizio è ancora referenziato (quindi non eliminabile),
+        altrimenti None. Le due query usano gli indici su servizio_id (migrazione 2).
+        """
         conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM servizi WHERE id = ?", (servizio_id,))
-        conn.commit()
+        if conn.execute(_SQL_IN_INTERVENTI, (servizio_id,)).fetchone():
+            return "intervento"
+        if conn.execute(_SQL_IN_RICORRENTI, (servizio_id,)).fetchone():
+            return "ricorrente"
+        return None
+
+    @staticmethod
+    def esiste(nome: str, escludi_id: int | None = None) -> bool:
+        """Duplicato secondo norm_nome (ricerca sull'indice idx_servizi_norm)."""
+        conn = get_connection()
+        return conn.execute(_SQL_DUPLICATO, (norm_nome(nome), escludi_id)).fetchone() is not None
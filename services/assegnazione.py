@@ -0,0 +1,298 @@
+"""
+Assegnazione automatica dei dipendenti agli interventi SINGOLI di un periodo.
+
+Si propongono dipendenti per gli interventi "Programmato" senza abbastanza personale,
+rispettando:
+  - nessuna sovrapposizione con altri impegni (indice di services.conflitti, che contiene
+    singoli e occorrenze dei ricorrenti) né con le altre proposte;
+  - ore_settimanali di ciascun dipendente (NULL = nessun limite), settimana lun-dom;
+e preferendo chi lavora già per quel cliente, poi chi è meno carico.
+
+1) greedy: prima gli interventi con meno candidati possibili, a ciascuno il candidato
+   che costa meno;
+2) ricerca locale: spostamenti di una proposta su un altro dipendente e, per gli
+   interventi rimasti scoperti, catene di un passo (si libera un dipendente spostando
+   una sua proposta su un altro) finché il costo scende o finisce il tempo.
+
+Il risultato è un Piano da mostrare in anteprima; applica() lo salva in una transazione.
+Nessuna dipendenza da Qt.
+"""
+from __future__ import annotations
+
+import time
+from bisect import bisect_left, insort
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from database.repositories.interventi_repo import affinita_clienti, aggiungi_dipendenti
+from models.dipendenti import Dipendente
+from services.conflitti import IndiceImpegni, eventi_mesi, indice_periodo, settimana_di
+from services.timeline import MINUTI_GIORNO, intervallo
+
+PESO_ABITUALE = 3.0      # preferenza per chi serve già il cliente (affinità normalizzata 0..1)
+PESO_CARICO = 1.0        # bilanciamento: quota delle ore settimanali dopo l'assegnazione
+PENALITA_SCOPERTO = 100.0
+ORE_RIFERIMENTO = 40     # per chi non ha ore_settimanali: serve solo a bilanciare
+
+
+@dataclass(frozen=True, slots=True)
+class Proposta:
+    intervento_id: int
+    dipendente_id: int
+    dipendente: str
+    riga: object        # RigaIntervento
+    abituale: bool      # il dipendente ha già lavorato per il cliente
+
+
+@dataclass(slots=True)
+class Piano:
+    proposte: list = field(default_factory=list)
+    scoperti: list = field(default_factory=list)  # RigaIntervento ancora senza abbastanza personale
+    costo: float = 0.0
+    secondi: float = 0.0
+
+
+@dataclass(slots=True)
+class Risorsa:
+    id: int
+    nome: str
+    capacita_min: int | None  # minuti a settimana, None = nessun limite
+
+
+@dataclass(slots=True)
+class _Compito:
+    riga: object
+    inizio: int
+    fine: int
+    settimana: int
+    mancanti: int
+    assegnati: set              # dipendenti già sull'intervento (DB)
+    proposti: list = field(default_factory=list)
+
+
+class _Stato:
+    """Proposte correnti: intervalli e carichi aggiunti per dipendente, costo incrementale."""
+
+    def __init__(self, compiti, risorse, indice: IndiceImpegni, affinita: dict):
+        self.compiti = compiti
+        self.risorse = {r.id: r for r in risorse}
+        self.indice = indice
+        self.carico = indice.carico_settimanale()
+        self.nuovi = {r.id: [] for r in risorse}   # dip -> [(inizio, fine, idx compito)] ordinati
+
+        # affinità normalizzata per cliente: il più abituale vale 1
+        massimi = {}
+        for (cliente_id, _), n in affinita.items():
+            massimi[cliente_id] = max(massimi.get(cliente_id, 0), n)
+        self.affinita = {k: n / massimi[k[0]] for k, n in affinita.items()}
+
+    # ---------------- VINCOLI ----------------
+    def libero(self, dip_id: int, c: _Compito, ignora: int | None = None) -> bool:
+        if dip_id in c.assegnati or dip_id in c.proposti:
+            return False
+
+        r = self.risorse[dip_id]
+        if r.capacita_min is not None:
+            durata = c.fine - c.inizio
+            liberato = 0
+            if ignora is not None:
+                altro = self.compiti[ignora]
+                if altro.settimana == c.settimana:
+                    liberato = altro.fine - altro.inizio
+            if self.carico.get((dip_id, c.settimana), 0) - liberato + durata > r.capacita_min:
+                return False
+
+        if self.indice.sovrapposti(dip_id, c.inizio, c.fine):
+            return False
+
+        nuovi = self.nuovi[dip_id]
+        i = bisect_left(nuovi, (c.fine,))
+        while i > 0:
+            i -= 1
+            inizio, fine, idx = nuovi[i]
+            if inizio < c.inizio - MINUTI_GIORNO:
+                break  # nessun intervento dura più di un giorno: più indietro non c'è niente
+            if fine > c.inizio and idx != ignora:
+                return False
+        return True
+
+    # ---------------- COSTO ----------------
+    # obiettivo: PESO_CARICO * somma (carico/capacità)^2 per dipendente e settimana
+    #            - PESO_ABITUALE * affinità delle proposte + PENALITA_SCOPERTO per posto scoperto.
+    # costo() è la variazione dell'obiettivo aggiungendo dip_id a c: ogni mossa accettata lo
+    # abbassa davvero, quindi la ricerca locale termina.
+    def _capacita(self, dip_id: int) -> int:
+        return self.risorse[dip_id].capacita_min or ORE_RIFERIMENTO * 60
+
+    def costo(self, dip_id: int, c: _Compito) -> float:
+        cap = self._capacita(dip_id)
+        carico = self.carico.get((dip_id, c.settimana), 0)
+        durata = c.fine - c.inizio
+        bilancio = ((carico + durata) ** 2 - carico ** 2) / (cap * cap)
+        return PESO_CARICO * bilancio - PESO_ABITUALE * self.affinita.get((c.riga.cliente_id, dip_id), 0.0)
+
+    def obiettivo(self) -> float:
+        settimane = {(d, c.settimana) for c in self.compiti for d in c.proposti}
+        totale = sum(PESO_CARICO * (self.carico[k] / self._capacita(k[0])) ** 2 for k in settimane)
+        for c in self.compiti:
+            totale -= PESO_ABITUALE * sum(self.affinita.get((c.riga.cliente_id, d), 0.0) for d in c.proposti)
+            totale += PENALITA_SCOPERTO * max(self.scoperti(c), 0)
+        return totale
+
+    # ---------------- MOSSE ----------------
+    def assegna(self, idx: int, dip_id: int):
+        c = self.compiti[idx]
+        c.proposti.append(dip_id)
+        insort(self.nuovi[dip_id], (c.inizio, c.fine, idx))
+        chiave = (dip_id, c.settimana)
+        self.carico[chiave] = self.carico.get(chiave, 0) + c.fine - c.inizio
+
+    def togli(self, idx: int, dip_id: int):
+        c = self.compiti[idx]
+        c.proposti.remove(dip_id)
+        self.nuovi[dip_id].remove((c.inizio, c.fine, idx))
+        self.carico[(dip_id, c.settimana)] -= c.fine - c.inizio
+
+    def scoperti(self, c: _Compito) -> int:
+        return c.mancanti - len(c.proposti)
+
+
+def risolvi(compiti: list, risorse: list, indice: IndiceImpegni, affinita: dict,
+            tempo_max: float = 3.0) -> Piano:
+    """Parte pura del solver (senza DB): la usano proponi() e i test."""
+    t0 = time.perf_counter()
+    stato = _Stato(compiti, risorse, indice, affinita)
+    ids = [r.id for r in risorse]
+
+    # ---------------- 1) GREEDY ----------------
+    def n_candidati(idx):
+        return sum(stato.libero(d, compiti[idx]) for d in ids)
+
+    ordine = sorted(range(len(compiti)), key=lambda i: (n_candidati(i), compiti[i].inizio))
+    for idx in ordine:
+        c = compiti[idx]
+        while stato.scoperti(c) > 0:
+            candidati = [d for d in ids if stato.libero(d, c)]
+            if not candidati:
+                break
+            stato.assegna(idx, min(candidati, key=lambda d: stato.costo(d, c)))
+
+    # ---------------- 2) RICERCA LOCALE ----------------
+    migliorato = True
+    while migliorato and time.perf_counter() - t0 < tempo_max:
+        migliorato = False
+
+        # a) interventi scoperti: catena di un passo
+        for idx, c in enumerate(compiti):
+            if stato.scoperti(c) <= 0:
+                continue
+            if _riempi_con_catena(stato, idx, ids):
+                migliorato = True
+
+        # b) spostamento di una proposta su un dipendente che costa meno
+        for idx, c in enumerate(compiti):
+            for dip_id in list(c.proposti):
+                stato.togli(idx, dip_id)
+                attuale = stato.costo(dip_id, c)
+                migliore = min((d for d in ids if d != dip_id and stato.libero(d, c)),
+                               key=lambda d: stato.costo(d, c), default=None)
+                if migliore is not None and stato.costo(migliore, c) < attuale - 1e-9:
+                    stato.assegna(idx, migliore)
+                    migliorato = True
+                else:
+                    stato.assegna(idx, dip_id)
+            if time.perf_counter() - t0 >= tempo_max:
+                break
+
+    # ---------------- RISULTATO ----------------
+    piano = Piano(secondi=time.perf_counter() - t0)
+    for idx, c in enumerate(compiti):
+        for dip_id in c.proposti:
+            piano.proposte.append(Proposta(
+                intervento_id=c.riga.id_ref,
+                dipendente_id=dip_id,
+                dipendente=stato.risorse[dip_id].nome,
+                riga=c.riga,
+                abituale=(c.riga.cliente_id, dip_id) in stato.affinita,
+            ))
+        if stato.scoperti(c) > 0:
+            piano.scoperti.append(c.riga)
+    piano.costo = stato.obiettivo()
+    piano.proposte.sort(key=lambda p: (p.riga.data or "", p.riga.ora or "", p.dipendente.casefold()))
+    return piano
+
+
+def _riempi_con_catena(stato: _Stato, idx: int, ids: list) -> bool:
+    """
+    L'intervento idx è scoperto: cerca un dipendente d occupato solo da una proposta q
+    che può passare a un altro dipendente libero; sposta q e assegna d a idx.
+    """
+    c = stato.compiti[idx]
+    for d in ids:
+        if d in c.assegnati or d in c.proposti:
+            continue
+        bloccanti = [q for (i, f, q) in stato.nuovi[d] if i < c.fine and f > c.inizio]
+        if len(bloccanti) != 1 or stato.indice.sovrapposti(d, c.inizio, c.fine):
+            continue
+        q = bloccanti[0]
+        if not stato.libero(d, c, ignora=q):
+            continue
+
+        altro = stato.compiti[q]
+        stato.togli(q, d)
+        sostituto = next((e for e in ids if e != d and stato.libero(e, altro)), None)
+        if sostituto is None:
+            stato.assegna(q, d)
+            continue
+        stato.assegna(q, sostituto)
+        stato.assegna(idx, d)
+        return True
+    return False
+
+
+# ---------------- DB ----------------
+def compiti_periodo(da: date, a: date, personale_minimo: int = 1) -> list:
+    compiti = []
+    for giorno, evs in eventi_mesi(da, a).items():
+        if not da <= giorno <= a:
+            continue
+        base = giorno.toordinal() * MINUTI_GIORNO
+        for r in evs:
+            if r.tipo != "SINGOLO" or r.stato != "Programmato":
+                continue
+            mancanti = personale_minimo - len(r.dipendente_ids)
+            iv = intervallo(r)
+            if mancanti <= 0 or iv is None:
+                continue
+            compiti.append(_Compito(r, base + iv[0], base + iv[1], settimana_di(base + iv[0]),
+                                    mancanti, set(r.dipendente_ids)))
+    compiti.sort(key=lambda c: (c.inizio, c.riga.id_ref))
+    return compiti
+
+
+def risorse_dipendenti() -> list:
+    return [
+        Risorsa(d.id, f"{d.nome} {d.cognome}",
+                None if not d.ore_settimanali else int(d.ore_settimanali) * 60)
+        for d in Dipendente.all()
+    ]
+
+
+def proponi(da: date, a: date, personale_minimo: int = 1, tempo_max: float = 3.0) -> Piano:
+    """Piano di assegnazione per [da, a]. Gira nel worker: legge, non scrive."""
+    # i carichi si contano su settimane intere
+    lunedi = da - timedelta(days=da.weekday())
+    domenica = a + timedelta(days=6 - a.weekday())
+
+    compiti = compiti_periodo(da, a, personale_minimo)
+    if not compiti:
+        return Piano()
+
+    indice = indice_periodo(lunedi, domenica)
+    affinita = affinita_clienti({c.riga.cliente_id for c in compiti})
+    return risolvi(compiti, risorse_dipendenti(), indice, affinita, tempo_max)
+
+
+def applica(proposte) -> int:
+    """Salva le proposte scelte (anteprima confermata) in un'unica transazione."""
+    return aggiungi_dipendenti([(p.intervento_id, p.dipendente_id) for p in proposte])
@@ -0,0 +1,29 @@
+"""
+Tempi di avvio: ogni fase segna un traguardo, alla fine si stampa il riepilogo
+se è impostata la variabile d'ambiente GESTIONE_CRONOMETRO (es. GESTIONE_CRONOMETRO=1).
+
+    from services.avvio import cronometro
+    cronometro.segna("init_db")
+"""
+import time
+
+
+class Cronometro:
+    def __init__(self):
+        self.inizio = time.perf_counter()
+        self.traguardi = []  # [(nome, secondi dall'inizio)]
+
+    def segna(self, nome: str):
+        self.traguardi.append((nome, time.perf_counter() - self.inizio))
+
+    def report(self) -> str:
+        righe = ["Tempi di avvio:"]
+        precedente = 0.0
+        for nome, t in self.traguardi:
+            righe.append(f"  {nome:<28} {t * 1000:8.1f} ms  (+{(t - precedente) * 1000:.1f})")
+            precedente = t
+        return "\n".join(righe)
+
+
+# parte all'import: main.py lo importa per primo
+cronometro = Cronometro()
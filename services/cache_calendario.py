@@ -0,0 +1,96 @@
+"""
+Cache LRU degli eventi del calendario per mese: (anno, mese) -> {date: [RigaIntervento]}.
+
+Le scritture su interventi/ricorrenti invalidano solo i mesi che toccano (vedi repository);
+le modifiche ai nomi (clienti, servizi, dipendenti) invalidano tutto, perché le righe
+in cache portano anche i nomi.
+
+Thread-safe: i mesi vengono calcolati anche nei worker. Per non rimettere in cache dati
+letti prima di una scrittura, chi calcola prende generazione() prima di leggere dal DB e
+la ripassa a salva(): se nel frattempo c'è stata un'invalidazione il valore viene scartato.
+Nessuna dipendenza da Qt né dai repository (li importa services.calendario).
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from datetime import date
+
+
+def _data(value) -> date | None:
+    if value is None or isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+class CacheMesi:
+    def __init__(self, maxsize: int = 24):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[tuple, dict]" = OrderedDict()
+        self._generazione = 0
+        self._lock = threading.Lock()
+
+    def get(self, anno: int, mese: int) -> dict | None:
+        with self._lock:
+            hit = self._data.get((anno, mese))
+            if hit is not None:
+                self._data.move_to_end((anno, mese))
+            return hit
+
+    def generazione(self) -> int:
+        with self._lock:
+            return self._generazione
+
+    def salva(self, anno: int, mese: int, eventi: dict, generazione: int) -> bool:
+        with self._lock:
+            if generazione != self._generazione:
+                return False  # calcolato su dati nel frattempo modificati
+            self._data[(anno, mese)] = eventi
+            self._data.move_to_end((anno, mese))
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return True
+
+    def invalida_periodo(self, da: date | None, a: date | None):
+        """Toglie i mesi che si sovrappongono a [da, a]; None = periodo aperto."""
+        with self._lock:
+            self._generazione += 1
+            da_key = (da.year, da.month) if da else (0, 0)
+            a_key = (a.year, a.month) if a else (9999, 12)
+            for key in [k for k in self._data if da_key <= k <= a_key]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._generazione += 1
+            self._data.clear()
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+# cache condivisa dall'applicazione
+cache_mesi = CacheMesi()
+
+
+def invalida_date(*giorni):
+    """Dopo la scrittura di interventi singoli: mesi delle date vecchie e nuove."""
+    for g in {_data(g) for g in giorni} - {None}:
+        cache_mesi.invalida_periodo(g, g)
+
+
+def invalida_periodo(data_inizio, data_fine):
+    """Dopo la scrittura di un ricorrente: mesi del suo periodo di validità (None = aperto)."""
+    cache_mesi.invalida_periodo(_data(data_inizio), _data(data_fine))
+
+
+def invalida_tutto():
+    cache_mesi.clear()
@@ -0,0 +1,175 @@
+"""
+Eventi del calendario per giorno, senza dipendenze da Qt (si può calcolare in un worker).
+I mesi calcolati restano in services.cache_calendario finché una scrittura non li invalida.
+"""
+from __future__ import annotations
+
+import calendar
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from database.repositories.interventi_repo import get_interventi_periodo
+from services.cache_calendario import cache_mesi
+from services.ricorrenze import occorrenze
+from services.timeline import STATI_IGNORATI, intervallo
+
+CELLE_GRIGLIA = 42  # 6 righe x 7 giorni, come QCalendarWidget
+
+
+def eventi_periodo(da: date, a: date) -> dict:
+    """
+    date -> list[RigaIntervento] ordinata per ora: SINGOLI con data nel periodo
+    e occorrenze delle regole RICORRENTI attive.
+    """
+    eventi = {}
+    for r in get_interventi_periodo(da.isoformat(), a.isoformat()):
+        if r.tipo == "SINGOLO":
+            try:
+                giorno = date.fromisoformat(r.data or "")
+            except ValueError:
+                continue
+            eventi.setdefault(giorno, []).append(r)
+            continue
+
+        # solo regole attive; le occorrenze arrivano (in cache) dal motore delle ricorrenze
+        if not r.attivo:
+            continue
+        for giorno in occorrenze(r.regola(), da, a):
+            eventi.setdefault(giorno, []).append(r)
+
+    for evs in eventi.values():
+        evs.sort(key=lambda e: e.ora or "")
+    return eventi
+
+
+def eventi_mese(anno: int, mese: int) -> dict:
+    """
+    Eventi del mese, dalla cache se validi. Il dizionario restituito è condiviso:
+    va trattato come sola lettura.
+    """
+    hit = cache_mesi.get(anno, mese)
+    if hit is not None:
+        return hit
+
+    generazione = cache_mesi.generazione()
+    ultimo = calendar.monthrange(anno, mese)[1]
+    eventi = eventi_periodo(date(anno, mese, 1), date(anno, mese, ultimo))
+    cache_mesi.salva(anno, mese, eventi, generazione)
+    return eventi
+
+
+def eventi_mese_in_cache(anno: int, mese: int) -> dict | None:
+    """Solo lettura della cache (None se il mese va calcolato): non tocca il DB."""
+    return cache_mesi.get(anno, mese)
+
+
+def mese_adiacente(anno: int, mese: int, delta: int) -> tuple[int, int]:
+    n = anno * 12 + (mese - 1) + delta
+    return n // 12, n % 12 + 1
+
+
+def eventi_settimana(lunedi: date) -> dict:
+    """
+    Eventi dei 7 giorni da `lunedi`, ricavati dai mesi (uno o due) che la settimana tocca:
+    così anche la vista settimana usa la cache mensile.
+    """
+    domenica = lunedi + timedelta(days=6)
+    eventi = {}
+    for anno, mese in {(lunedi.year, lunedi.month), (domenica.year, domenica.month)}:
+        for giorno, evs in eventi_mese(anno, mese).items():
+            if lunedi <= giorno <= domenica:
+                eventi[giorno] = evs
+    return eventi
+
+
+# ---------------- GRIGLIA DEL MESE (heat-map) ----------------
+@dataclass(slots=True)
+class GrigliaMese:
+    """
+    Dati di disegno delle 42 celle del calendario, indicizzati per posizione nella griglia
+    (0 = lunedì della prima riga): il paintCell fa solo accessi per indice.
+    """
+    inizio: date
+    conteggi: list
+    minuti: list
+    conflitti: list
+    max_minuti: int = 0
+
+    def indice(self, giorno: date) -> int:
+        """Posizione di `giorno` nella griglia, -1 se fuori."""
+        i = (giorno - self.inizio).days
+        return i if 0 <= i < CELLE_GRIGLIA else -1
+
+
+def inizio_griglia(anno: int, mese: int) -> date:
+    primo = date(anno, mese, 1)
+    return primo - timedelta(days=primo.weekday())
+
+
+def _mesi_griglia(anno: int, mese: int):
+    # le 42 celle toccano il mese, spesso la coda del precedente e l'inizio del successivo
+    inizio = inizio_griglia(anno, mese)
+    fine = inizio + timedelta(days=CELLE_GRIGLIA - 1)
+    mesi = [(inizio.year, inizio.month)]
+    while mesi[-1] != (fine.year, fine.month):
+        mesi.append(mese_adiacente(*mesi[-1], 1))
+    return inizio, fine, mesi
+
+
+def _unisci(inizio: date, fine: date, per_mese) -> dict:
+    eventi = {}
+    for ev in per_mese:
+        eventi.update((g, evs) for g, evs in ev.items() if inizio <= g <= fine)
+    return eventi
+
+
+def eventi_griglia(anno: int, mese: int) -> dict:
+    """
+    Eventi delle 42 celle del mese mostrato, compresi i giorni dei mesi adiacenti,
+    dalla cache mensile (i mesi mancanti si calcolano). Sola lettura, come eventi_mese.
+    """
+    inizio, fine, mesi = _mesi_griglia(anno, mese)
+    return _unisci(inizio, fine, (eventi_mese(a, m) for a, m in mesi))
+
+
+def eventi_griglia_in_cache(anno: int, mese: int) -> dict | None:
+    """Come eventi_griglia ma solo dalla cache: None se manca uno dei mesi."""
+    inizio, fine, mesi = _mesi_griglia(anno, mese)
+    per_mese = [cache_mesi.get(a, m) for a, m in mesi]
+    if any(ev is None for ev in per_mese):
+        return None
+    return _unisci(inizio, fine, per_mese)
+
+
+def griglia_mese(eventi: dict, anno: int, mese: int) -> GrigliaMese:
+    """
+    eventi: date -> [RigaIntervento] delle 42 celle (eventi_griglia). Calcolata una volta
+    per mese mostrato. Gli interventi in STATI_IGNORATI contano tra gli eventi del giorno
+    ma non nelle ore né nei conflitti, che sono quelli di services.conflitti.
+    """
+    # import locale: services.conflitti importa questo modulo
+    from services.conflitti import IndiceImpegni
+
+    griglia = GrigliaMese(
+        inizio=inizio_griglia(anno, mese),
+        conteggi=[0] * CELLE_GRIGLIA,
+        minuti=[0] * CELLE_GRIGLIA,
+        conflitti=[False] * CELLE_GRIGLIA,
+    )
+    for giorno, evs in eventi.items():
+        i = griglia.indice(giorno)
+        if i < 0 or not evs:
+            continue
+        griglia.conteggi[i] = len(evs)
+        griglia.minuti[i] = sum(iv[1] - iv[0] for iv in
+                                (intervallo(r) for r in evs if r.stato not in STATI_IGNORATI)
+                                if iv is not None)
+
+    fine = griglia.inizio + timedelta(days=CELLE_GRIGLIA - 1)
+    for c in IndiceImpegni(eventi, griglia.inizio, fine).conflitti():
+        for imp in (c.primo, c.secondo):
+            i = griglia.indice(imp.giorno)
+            if i >= 0:
+                griglia.conflitti[i] = True
+    griglia.max_minuti = max(griglia.minuti)
+    return griglia
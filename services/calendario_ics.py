@@ -0,0 +1,271 @@
+"""
+Calendari iCalendar (.ics) da aprire o sottoscrivere sul telefono.
+
+  - ogni SINGOLO è un VEVENT (gli annullati restano con STATUS:CANCELLED, così
+    spariscono anche dai calendari che li avevano già scaricati);
+  - ogni regola RICORRENTE attiva è UN solo VEVENT con
+    RRULE:FREQ=WEEKLY;BYDAY=...;UNTIL=..., non un evento per occorrenza:
+    la dimensione del file dipende dal numero di regole, non delle occorrenze.
+
+Orari "floating" (ora locale, senza fuso): sono quelli scritti nel gestionale.
+
+aggiorna_feed() scrive in una cartella un file per dipendente più tutti.ics e tiene
+in manifest.json l'impronta degli eventi di ciascun file: un file si riscrive solo
+se i suoi eventi sono cambiati (DTSTAMP escluso), così data di modifica ed ETag
+restano uguali e i telefoni non riscaricano calendari identici.
+Nessuna dipendenza da Qt.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+
+from database.database import get_connection
+from database.repositories.interventi_repo import get_interventi_periodo
+from models.dipendenti import Dipendente
+from services.ricorrenze import espandi_ordinali
+from services.timeline import DURATA_DEFAULT_MIN
+
+PRODID = "-//Gestione pulizie//Calendario interventi//IT"
+DOMINIO_UID = "gestione-pulizie"
+GIORNI_PASSATI = 30            # i singoli più vecchi di così non entrano nei calendari
+BYDAY = {1: "MO", 2: "TU", 3: "WE", 4: "TH", 5: "FR", 6: "SA", 7: "SU"}
+MANIFEST = "manifest.json"
+FEED_TUTTI = "tutti.ics"
+
+
+# ---------------------------------------------------------
+#  FORMATO
+# ---------------------------------------------------------
+def _testo(s) -> str:
+    """Escape dei valori TEXT (RFC 5545, 3.3.11)."""
+    return (str(s or "").replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def _piega(riga: str) -> str:
+    """Righe oltre 75 byte spezzate con CRLF + spazio, senza tagliare un carattere UTF-8."""
+    b = riga.encode("utf-8")
+    if len(b) <= 75:
+        return riga
+    parti, limite = [], 75
+    while len(b) > limite:
+        taglio = limite
+        while b[taglio] & 0xC0 == 0x80:  # byte di continuazione: si arretra
+            taglio -= 1
+        parti.append(b[:taglio].decode("utf-8"))
+        b = b[taglio:]
+        limite = 74  # lo spazio iniziale conta
+    parti.append(b.decode("utf-8"))
+    return "\r\n ".join(parti)
+
+
+def _dt(giorno: date, minuti: int) -> str:
+    d = datetime(giorno.year, giorno.month, giorno.day) + timedelta(minutes=minuti)
+    return d.strftime("%Y%m%dT%H%M%S")
+
+
+def _minuti(ora: str | None) -> int | None:
+    try:
+        h, m = (ora or "").split(":")[:2]
+        return int(h) * 60 + int(m)
+    except ValueError:
+        return None
+
+
+def _comuni(r, indirizzi: dict) -> list[str]:
+    righe = [f"SUMMARY:{_testo(f'{r.servizio} - {r.cliente}')}"]
+    if indirizzi.get(r.cliente_id):
+        righe.append(f"LOCATION:{_testo(indirizzi[r.cliente_id])}")
+    descrizione = []
+    if r.dipendenti:
+        descrizione.append("Personale: " + ", ".join(r.dipendenti))
+    if r.note:
+        descrizione.append(r.note)
+    if descrizione:
+        righe.append(f"DESCRIPTION:{_testo(chr(10).join(descrizione))}")
+    return righe
+
+
+def evento_singolo(r, indirizzi: dict) -> list[str] | None:
+    inizio = _minuti(r.ora)
+    try:
+        giorno = date.fromisoformat(r.data or "")
+    except ValueError:
+        return None
+    if inizio is None:
+        return None
+    durata = r.durata_min or DURATA_DEFAULT_MIN
+    righe = [
+        f"UID:intervento-{r.id_ref}@{DOMINIO_UID}",
+        f"DTSTART:{_dt(giorno, inizio)}",
+        f"DTEND:{_dt(giorno, inizio + durata)}",
+    ]
+    if r.stato == "Annullato":
+        righe.append("STATUS:CANCELLED")
+    return righe + _comuni(r, indirizzi)
+
+
+def evento_ricorrente(r, indirizzi: dict, ancora: date) -> list[str] | None:
+    """
+    Una regola = un VEVENT con RRULE. DTSTART è la prima occorrenza da data_inizio
+    (o da `ancora` se la regola non ha inizio): RFC 5545 la conta come prima istanza.
+    """
+    inizio = _minuti(r.ora)
+    if not r.attivo or not r.giorni or inizio is None:
+        return None
+    da = date.fromisoformat(r.data_inizio) if r.data_inizio else ancora
+    prima = espandi_ordinali(r.regola(), da, da + timedelta(days=6))
+    if not prima:
+        return None  # la regola finisce prima della sua prima occorrenza
+    giorno = date.fromordinal(prima[0])
+
+    regola = f"RRULE:FREQ=WEEKLY;BYDAY={','.join(BYDAY[g] for g in r.giorni)}"
+    if r.data_fine:
+        regola += f";UNTIL={date.fromisoformat(r.data_fine):%Y%m%d}T235959"
+    durata = r.durata_min or DURATA_DEFAULT_MIN
+    return [
+        f"UID:ricorrente-{r.id_ref}@{DOMINIO_UID}",
+        f"DTSTART:{_dt(giorno, inizio)}",
+        f"DTEND:{_dt(giorno, inizio + durata)}",
+        regola,
+    ] + _comuni(r, indirizzi)
+
+
+def _impronta(eventi: list) -> str:
+    h = hashlib.sha256()
+    for ev in eventi:
+        h.update("\n".join(ev).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def componi(nome: str, eventi: list, dtstamp: str) -> str:
+    """Testo del VCALENDAR (CRLF) con gli eventi già costruiti."""
+    righe = ["BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:{PRODID}", "CALSCALE:GREGORIAN",
+             f"X-WR-CALNAME:{_testo(nome)}"]
+    for ev in eventi:
+        righe.append("BEGIN:VEVENT")
+        righe.append(ev[0])  # UID
+        righe.append(f"DTSTAMP:{dtstamp}")
+        righe.extend(ev[1:])
+        righe.append("END:VEVENT")
+    righe.append("END:VCALENDAR")
+    return "".join(_piega(r) + "\r\n" for r in righe)
+
+
+# ---------------------------------------------------------
+#  EVENTI DAL DB
+# ---------------------------------------------------------
+def eventi(oggi: date | None = None) -> list:
+    """
+    [(evento, dipendente_ids)] di tutti i feed: singoli da oggi - GIORNI_PASSATI in poi
+    e regole ricorrenti attive non ancora concluse. Ogni evento si costruisce una volta sola
+    e si riusa nei feed di tutti i suoi dipendenti.
+    """
+    oggi = oggi or date.today()
+    da = oggi - timedelta(days=GIORNI_PASSATI)
+    ancora = date(oggi.year, 1, 1)  # stabile per tutto l'anno: non cambia l'impronta ogni giorno
+    indirizzi = {r["id"]: r["indirizzo"] for r in get_connection().execute(
+        "SELECT id, indirizzo FROM clienti WHERE coalesce(indirizzo, '') != ''")}
+
+    out = []
+    for r in get_interventi_periodo(da.isoformat(), "9999-12-31"):
+        ev = (evento_singolo(r, indirizzi) if r.tipo == "SINGOLO"
+              else evento_ricorrente(r, indirizzi, ancora))
+        if ev is not None:
+            out.append((ev, r.dipendente_ids))
+    out.sort(key=lambda x: x[0][0])  # per UID: ordine stabile, impronta stabile
+    return out
+
+
+def genera_ics(dipendente_id: int | None = None, oggi: date | None = None) -> str:
+    """Un solo calendario: tutti gli interventi o quelli di un dipendente."""
+    evs = [ev for ev, dip in eventi(oggi) if dipendente_id is None or dipendente_id in dip]
+    nome = "Interventi"
+    if dipendente_id is not None:
+        d = Dipendente.get(dipendente_id)
+        nome = f"Interventi - {d.nome} {d.cognome}" if d else nome
+    return componi(nome, evs, _adesso())
+
+
+def _adesso() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+# ---------------------------------------------------------
+#  FEED PER DIPENDENTE (incrementali)
+# ---------------------------------------------------------
+@dataclass
+class EsitoFeed:
+    scritti: list = field(default_factory=list)
+    invariati: int = 0
+    rimossi: list = field(default_factory=list)
+
+    def riepilogo(self) -> str:
+        return (f"{len(self.scritti)} calendari aggiornati, {self.invariati} invariati, "
+                f"{len(self.rimossi)} rimossi")
+
+
+def nome_feed(dipendente_id: int) -> str:
+    return f"dipendente-{dipendente_id}.ics"
+
+
+def _scrivi_atomico(percorso: str, testo: str):
+    tmp = percorso + ".tmp"
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        f.write(testo)
+    os.replace(tmp, percorso)
+
+
+def aggiorna_feed(cartella: str, oggi: date | None = None) -> EsitoFeed:
+    """
+    Un .ics per dipendente (nome_feed) più FEED_TUTTI. Si riscrivono solo i file i cui
+    eventi sono cambiati dall'ultima volta (o che mancano); quelli di dipendenti eliminati
+    vengono rimossi.
+    """
+    os.makedirs(cartella, exist_ok=True)
+    percorso_manifest = os.path.join(cartella, MANIFEST)
+    try:
+        with open(percorso_manifest, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    tutti = eventi(oggi)
+    per_dipendente = {}
+    for ev, dip_ids in tutti:
+        for d in dip_ids:
+            per_dipendente.setdefault(d, []).append(ev)
+
+    feed = {FEED_TUTTI: ("Interventi", [ev for ev, _ in tutti])}
+    for d in Dipendente.all():
+        feed[nome_feed(d.id)] = (f"Interventi - {d.nome} {d.cognome}", per_dipendente.get(d.id, []))
+
+    esito = EsitoFeed()
+    dtstamp = _adesso()
+    nuovo = {}
+    for nome_file, (titolo, evs) in feed.items():
+        # il titolo entra nell'impronta: un dipendente rinominato va riscritto
+        impronta = _impronta([[titolo]] + evs)
+        nuovo[nome_file] = impronta
+        percorso = os.path.join(cartella, nome_file)
+        if manifest.get(nome_file) == impronta and os.path.exists(percorso):
+            esito.invariati += 1
+            continue
+        _scrivi_atomico(percorso, componi(titolo, evs, dtstamp))
+        esito.scritti.append(nome_file)
+
+    for nome_file in manifest.keys() - nuovo.keys():
+        try:
+            os.remove(os.path.join(cartella, nome_file))
+        except FileNotFoundError:
+            pass
+        esito.rimossi.append(nome_file)
+
+    if nuovo != manifest:
+        _scrivi_atomico(percorso_manifest, json.dumps(nuovo, indent=1, sort_keys=True))
+    return esito
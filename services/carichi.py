@@ -0,0 +1,158 @@
+"""
+Carichi di lavoro per dipendente e settimana ISO: ore pianificate contro ore_settimanali.
+
+Ore pianificate = SINGOLI non annullati (sommati in SQL per dipendente e giorno)
++ occorrenze dei RICORRENTI attivi (espanse in memoria, services.ricorrenze) x durata_ore.
+
+Il risultato è in cache per settimana: una richiesta calcola in un solo passaggio solo
+l'intervallo che copre le settimane mancanti. Le voci valgono finché non cambia la
+generazione della cache del calendario (le scritture su interventi e ricorrenti la
+aggiornano già); le ore_settimanali si leggono sempre fresche.
+Nessuna dipendenza da Qt: la usano la pagina report e la CLI.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from database.repositories.interventi_repo import get_ricorrenti_periodo, ore_singoli_per_giorno
+from models.dipendenti import Dipendente
+from services.cache_calendario import cache_mesi
+from services.ricorrenze import espandi_ordinali
+
+SOGLIA_SOTTO = 0.8   # sotto l'80% del contratto la settimana è sotto-allocata
+
+
+def settimana_iso(giorno: date) -> tuple[int, int]:
+    anno, sett, _ = giorno.isocalendar()
+    return anno, sett
+
+
+def lunedi_iso(settimana: tuple[int, int]) -> date:
+    return date.fromisocalendar(settimana[0], settimana[1], 1)
+
+
+def settimane_periodo(da: date, a: date) -> list[tuple[int, int]]:
+    """Settimane ISO che toccano [da, a], in ordine."""
+    lunedi = da - timedelta(days=da.weekday())
+    out = []
+    while lunedi <= a:
+        out.append(settimana_iso(lunedi))
+        lunedi += timedelta(days=7)
+    return out
+
+
+# ---------------- CALCOLO ----------------
+def calcola_ore(da: date, a: date) -> dict:
+    """
+    {settimana ISO: {dipendente_id: ore}} per [da, a] (estremi inclusi), senza cache.
+    da/a vanno allineati a lunedì/domenica se si vogliono settimane complete.
+    """
+    out = {s: {} for s in settimane_periodo(da, a)}
+
+    for dip_id, giorno, ore in ore_singoli_per_giorno(da.isoformat(), a.isoformat()):
+        per_dip = out[settimana_iso(date.fromisoformat(giorno))]
+        per_dip[dip_id] = per_dip.get(dip_id, 0.0) + ore
+
+    for r in get_ricorrenti_periodo(da.isoformat(), a.isoformat()):
+        if not r.attivo or not r.durata_min or not r.dipendente_ids:
+            continue
+        ore = r.durata_min / 60.0
+        # occorrenze contate per settimana (ordinali: date.fromordinal(1) è un lunedì)
+        conteggi = {}
+        for o in espandi_ordinali(r.regola(), da, a):
+            n = (o - 1) // 7
+            conteggi[n] = conteggi.get(n, 0) + 1
+        for n, volte in conteggi.items():
+            per_dip = out[settimana_iso(date.fromordinal(n * 7 + 1))]
+            for dip_id in r.dipendente_ids:
+                per_dip[dip_id] = per_dip.get(dip_id, 0.0) + ore * volte
+    return out
+
+
+class CacheSettimane:
+    def __init__(self, maxsize: int = 160):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[tuple, dict]" = OrderedDict()
+        self._generazione = None
+        self._lock = threading.Lock()
+
+    def ore(self, settimane: list) -> dict:
+        """{settimana: {dipendente_id: ore}} per le settimane richieste, calcolando le mancanti."""
+        generazione = cache_mesi.generazione()
+        with self._lock:
+            if generazione != self._generazione:
+                self._data.clear()
+                self._generazione = generazione
+            trovate = {s: self._data[s] for s in settimane if s in self._data}
+            for s in trovate:
+                self._data.move_to_end(s)
+
+        mancanti = [s for s in settimane if s not in trovate]
+        if mancanti:
+            calcolate = calcola_ore(lunedi_iso(min(mancanti)), lunedi_iso(max(mancanti)) + timedelta(days=6))
+            with self._lock:
+                # una scrittura durante il calcolo cambia la generazione: non si salva
+                if generazione == self._generazione == cache_mesi.generazione():
+                    for s in mancanti:
+                        self._data[s] = calcolate[s]
+                    while len(self._data) > self.maxsize:
+                        self._data.popitem(last=False)
+            trovate.update({s: calcolate[s] for s in mancanti})
+        return trovate
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+cache_settimane = CacheSettimane()
+
+
+# ---------------- REPORT ----------------
+@dataclass(slots=True)
+class RigaCarico:
+    dipendente_id: int
+    nome: str
+    ore_contratto: float | None          # ore_settimanali (None = non indicato)
+    ore: list = field(default_factory=list)  # per settimana, ordine di ReportCarichi.settimane
+
+    def stato(self, i: int) -> str:
+        """'sopra' | 'sotto' | 'ok' | '' (senza contratto) per la settimana i."""
+        if not self.ore_contratto:
+            return ""
+        if self.ore[i] > self.ore_contratto + 1e-9:
+            return "sopra"
+        if self.ore[i] < self.ore_contratto * SOGLIA_SOTTO:
+            return "sotto"
+        return "ok"
+
+    @property
+    def totale(self) -> float:
+        return sum(self.ore)
+
+
+@dataclass(slots=True)
+class ReportCarichi:
+    settimane: list = field(default_factory=list)  # [(anno ISO, settimana ISO)]
+    righe: list = field(default_factory=list)      # [RigaCarico], per cognome/nome
+
+    def lunedi(self, i: int) -> date:
+        return lunedi_iso(self.settimane[i])
+
+
+def report_carichi(da: date, a: date) -> ReportCarichi:
+    settimane = settimane_periodo(da, a)
+    ore = cache_settimane.ore(settimane)
+
+    report = ReportCarichi(settimane=settimane)
+    for d in Dipendente.all():
+        report.righe.append(RigaCarico(
+            dipendente_id=d.id,
+            nome=f"{d.cognome} {d.nome}",
+            ore_contratto=float(d.ore_settimanali) if d.ore_settimanali else None,
+            ore=[ore[s].get(d.id, 0.0) for s in settimane],
+        ))
+    return report
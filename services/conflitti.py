@@ -0,0 +1,240 @@
+"""
+Conflitti di assegnazione: lo stesso dipendente in due interventi che si sovrappongono.
+
+L'indice tiene, per dipendente, gli impegni di un periodo (SINGOLI + occorrenze dei
+RICORRENTI) come intervalli in minuti assoluti (ordinale del giorno * 1440 + minuti),
+ordinati per inizio, con il massimo progressivo delle fini. Una verifica fa due bisezioni
+e guarda solo i candidati: O(log n + k) per giorno, anche con un anno di calendario.
+
+Si costruisce dai mesi di services.calendario (quindi dalla cache mensile) e resta valido
+finché una scrittura non cambia la generazione della cache.
+Nessuna dipendenza da Qt: la usano i dialog (in un worker), il solver e la CLI.
+"""
+from __future__ import annotations
+
+import heapq
+import threading
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Iterable, Optional
+
+from services.cache_calendario import cache_mesi
+from services.calendario import eventi_mese, mese_adiacente
+from services.ricorrenze import Regola, espandi
+from services.timeline import MINUTI_GIORNO, STATI_IGNORATI, intervallo
+
+
+@dataclass(frozen=True, slots=True)
+class Impegno:
+    inizio: int                     # minuti assoluti
+    fine: int
+    riga: object = field(default=None, compare=False)  # RigaIntervento; None = proposta
+
+    @property
+    def giorno(self) -> date:
+        return date.fromordinal(self.inizio // MINUTI_GIORNO)
+
+    @property
+    def ora(self) -> str:
+        m = self.inizio % MINUTI_GIORNO
+        return f"{m // 60:02d}:{m % 60:02d}"
+
+
+@dataclass(frozen=True, slots=True)
+class Conflitto:
+    dipendente_id: int
+    dipendente: str
+    primo: Impegno
+    secondo: Impegno
+
+    def descrizione(self) -> str:
+        altro = self.secondo.riga
+        cosa = f"{altro.cliente} — {altro.servizio}" if altro is not None else "nuovo intervento"
+        return f"{self.dipendente}: {self.secondo.giorno:%d-%m-%Y} {self.secondo.ora} ({cosa})"
+
+
+def settimana_di(minuti: int) -> int:
+    """Numero progressivo della settimana (lunedì-domenica) di un istante in minuti assoluti."""
+    # date.fromordinal(1) è un lunedì
+    return (minuti // MINUTI_GIORNO - 1) // 7
+
+
+class _Corsia:
+    __slots__ = ("impegni", "inizi", "max_fini")
+
+    def __init__(self, impegni: list):
+        impegni.sort(key=lambda i: (i.inizio, i.fine))
+        self.impegni = impegni
+        self.inizi = [i.inizio for i in impegni]
+        self.max_fini = []
+        m = -1
+        for i in impegni:
+            m = max(m, i.fine)
+            self.max_fini.append(m)
+
+    def sovrapposti(self, inizio: int, fine: int) -> list:
+        # candidati: iniziano prima di `fine` e (massimo progressivo) finiscono dopo `inizio`
+        stop = bisect_left(self.inizi, fine)
+        start = bisect_right(self.max_fini, inizio, 0, stop)
+        return [i for i in self.impegni[start:stop] if i.fine > inizio]
+
+
+class IndiceImpegni:
+    def __init__(self, eventi: dict, da: date, a: date):
+        """eventi: date -> [RigaIntervento] (come eventi_mese); si indicizza solo [da, a]."""
+        self.da, self.a = da, a
+        self.nomi = {}
+        per_dip = {}
+        for giorno, evs in eventi.items():
+            if not da <= giorno <= a:
+                continue
+            base = giorno.toordinal() * MINUTI_GIORNO
+            for r in evs:
+                if r.stato in STATI_IGNORATI:
+                    continue
+                iv = intervallo(r)
+                if iv is None:
+                    continue
+                imp = Impegno(base + iv[0], base + iv[1], r)
+                for dip_id, nome in zip(r.dipendente_ids, r.dipendenti):
+                    per_dip.setdefault(dip_id, []).append(imp)
+                    self.nomi[dip_id] = nome
+        self._corsie = {dip_id: _Corsia(imps) for dip_id, imps in per_dip.items()}
+
+    def copre(self, da: date, a: date) -> bool:
+        return self.da <= da and a <= self.a
+
+    def __len__(self):
+        return sum(len(c.impegni) for c in self._corsie.values())
+
+    def carico_settimanale(self) -> dict:
+        """(dipendente_id, settimana) -> minuti già impegnati; settimana come settimana_di()."""
+        carico = {}
+        for dip_id, corsia in self._corsie.items():
+            for imp in corsia.impegni:
+                chiave = (dip_id, settimana_di(imp.inizio))
+                carico[chiave] = carico.get(chiave, 0) + imp.fine - imp.inizio
+        return carico
+
+    # ---------------- VERIFICA DI UNA PROPOSTA ----------------
+    def sovrapposti(self, dipendente_id: int, inizio: int, fine: int, escludi=None) -> list[Impegno]:
+        """Impegni del dipendente che si sovrappongono a [inizio, fine); escludi = (tipo, id_ref)."""
+        corsia = self._corsie.get(dipendente_id)
+        if corsia is None:
+            return []
+        out = corsia.sovrapposti(inizio, fine)
+        if escludi is not None:
+            out = [i for i in out if (i.riga.tipo, i.riga.id_ref) != escludi]
+        return out
+
+    def verifica(self, dipendente_ids: Iterable[int], giorni: Iterable[date],
+                 inizio_min: int, durata_min: int, escludi=None,
+                 limite: int | None = None) -> list[Conflitto]:
+        """
+        Conflitti che nascerebbero assegnando i dipendenti a un intervento che si ripete
+        nei `giorni` dati, dalle inizio_min (minuti dalla mezzanotte) per durata_min.
+        limite: massimo di conflitti per dipendente (1 = basta sapere se è occupato).
+        """
+        out = []
+        durata = max(durata_min, 1)
+        inizi_proposta = [g.toordinal() * MINUTI_GIORNO + inizio_min
+                          for g in giorni if self.da <= g <= self.a]
+        for dip_id in dipendente_ids:
+            corsia = self._corsie.get(dip_id)
+            if corsia is None:
+                continue
+            # ciclo caldo (un giro per occorrenza): solo bisezioni, oggetti creati solo sui conflitti
+            inizi, max_fini, impegni = corsia.inizi, corsia.max_fini, corsia.impegni
+            trovati = 0
+            for inizio in inizi_proposta:
+                fine = inizio + durata
+                stop = bisect_left(inizi, fine)
+                start = bisect_right(max_fini, inizio, 0, stop)
+                if start >= stop:
+                    continue
+                for imp in impegni[start:stop]:
+                    if imp.fine > inizio and (escludi is None or (imp.riga.tipo, imp.riga.id_ref) != escludi):
+                        out.append(Conflitto(dip_id, self.nomi[dip_id], Impegno(inizio, fine), imp))
+                        trovati += 1
+                if limite is not None and trovati >= limite:
+                    break
+        return out
+
+    def verifica_singolo(self, dipendente_ids, giorno: date, inizio_min: int, durata_min: int,
+                         escludi=None, limite: int | None = None) -> list[Conflitto]:
+        return self.verifica(dipendente_ids, (giorno,), inizio_min, durata_min, escludi, limite)
+
+    def verifica_ricorrente(self, dipendente_ids, giorni_settimana, data_inizio, data_fine,
+                            inizio_min: int, durata_min: int, escludi=None,
+                            limite: int | None = None) -> list[Conflitto]:
+        """giorni_settimana nella convenzione del DB (1=Lun ... 7=Dom); date come in Regola.crea."""
+        regola = Regola.crea(0, giorni_settimana, data_inizio, data_fine)
+        return self.verifica(dipendente_ids, espandi(regola, self.da, self.a),
+                             inizio_min, durata_min, escludi, limite)
+
+    # ---------------- ELENCO COMPLETO ----------------
+    def conflitti(self) -> list[Conflitto]:
+        """
+        Tutte le coppie di impegni sovrapposti dello stesso dipendente, in un passaggio per
+        corsia: heap degli impegni ancora aperti, ognuno confligge con quelli rimasti.
+        """
+        out = []
+        for dip_id, corsia in self._corsie.items():
+            nome = self.nomi.get(dip_id, str(dip_id))
+            aperti = []  # heap (fine, indice)
+            for idx, imp in enumerate(corsia.impegni):
+                while aperti and aperti[0][0] <= imp.inizio:
+                    heapq.heappop(aperti)
+                for _, j in aperti:
+                    out.append(Conflitto(dip_id, nome, corsia.impegni[j], imp))
+                heapq.heappush(aperti, (imp.fine, idx))
+        out.sort(key=lambda c: (c.primo.inizio, c.dipendente.casefold()))
+        return out
+
+
+# ---------------- INDICE CONDIVISO ----------------
+_lock = threading.Lock()
+_ultimo: Optional[tuple] = None  # (generazione cache, IndiceImpegni)
+
+
+def eventi_mesi(da: date, a: date) -> dict:
+    """date -> righe dei mesi che coprono [da, a], dalla cache mensile."""
+    eventi = {}
+    anno, mese = da.year, da.month
+    while (anno, mese) <= (a.year, a.month):
+        eventi.update(eventi_mese(anno, mese))
+        anno, mese = mese_adiacente(anno, mese, 1)
+    return eventi
+
+
+def indice_periodo(da: date, a: date) -> IndiceImpegni:
+    """
+    Indice degli impegni in [da, a]. Se l'ultimo indice costruito copre il periodo e
+    nessuna scrittura l'ha invalidato, si riusa (costruirlo è la parte costosa).
+    """
+    global _ultimo
+    generazione = cache_mesi.generazione()
+    with _lock:
+        if _ultimo is not None and _ultimo[0] == generazione and _ultimo[1].copre(da, a):
+            return _ultimo[1]
+
+    indice = IndiceImpegni(eventi_mesi(da, a), da, a)
+    with _lock:
+        _ultimo = (generazione, indice)
+    return indice
+
+
+def periodo_ricorrente(data_inizio=None, data_fine=None) -> tuple[date, date]:
+    """Periodo da controllare per un ricorrente: come create_ricorrente, default oggi -> 31/12."""
+    oggi = date.today()
+    da = Regola.crea(0, (), data_inizio).data_inizio or oggi
+    a = Regola.crea(0, (), None, data_fine).data_fine or date(da.year, 12, 31)
+    return da, max(a, da)
+
+
+def conflitti_periodo(da: date, a: date) -> list[Conflitto]:
+    if da > a:
+        return []
+    # l'indice riusato può coprire più del periodo richiesto
+    return [c for c in indice_periodo(da, a).conflitti() if da <= c.secondo.giorno <= a]
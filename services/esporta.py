@@ -0,0 +1,128 @@
+"""
+Esportazione in streaming verso CSV o JSON Lines.
+
+Entità: clienti, dipendenti, servizi (anagrafiche complete), interventi (SINGOLI) e
+occorrenze (RICORRENTI espansi giorno per giorno). Le righe passano da generatori e
+si scrivono appena lette, quindi la memoria non dipende dalla dimensione delle tabelle:
+le tabelle si leggono a blocchi con fetchmany, le occorrenze si espandono un mese alla
+volta. Filtri su periodo e dipendente solo per interventi e occorrenze.
+Nessuna dipendenza da Qt: la usano il dialog di esportazione e la CLI.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import os
+from datetime import date, timedelta
+
+from database.repositories.esportazione_repo import (
+    COLONNE_ANAGRAFICHE, COLONNE_INTERVENTI, scorri_anagrafica, scorri_interventi
+)
+from database.repositories.interventi_repo import get_ricorrenti_periodo
+from services.ricorrenze import espandi_ordinali
+
+ENTITA = ("clienti", "dipendenti", "servizi", "interventi", "occorrenze")
+FORMATI = ("csv", "jsonl")
+
+COLONNE_OCCORRENZE = ("ricorrente_id", "data", "ora_inizio", "durata_ore", "cliente_id", "cliente",
+                      "servizio_id", "servizio", "dipendenti", "note")
+
+
+def _limiti_mesi(da: date, a: date):
+    """[(primo, ultimo)] dei mesi che coprono [da, a], tagliati agli estremi."""
+    inizio = da
+    while inizio <= a:
+        prossimo = (inizio.replace(day=1) + timedelta(days=32)).replace(day=1)
+        yield inizio, min(a, prossimo - timedelta(days=1))
+        inizio = prossimo
+
+
+def scorri_occorrenze(da: date, a: date, dipendente_id: int | None = None):
+    """Occorrenze dei ricorrenti attivi in [da, a], in ordine di data e ora (COLONNE_OCCORRENZE)."""
+    # le regole sono poche: si tengono in memoria, si espandono un mese alla volta
+    regole = [
+        r for r in get_ricorrenti_periodo(da.isoformat(), a.isoformat())
+        if r.attivo and (dipendente_id is None or dipendente_id in r.dipendente_ids)
+    ]
+    regole.sort(key=lambda r: (r.ora or "", r.id_ref))
+    statiche = {
+        r.id_ref: (r.ora, r.durata_ore, r.cliente_id, r.cliente, r.servizio_id, r.servizio,
+                   ", ".join(r.dipendenti), r.note)
+        for r in regole
+    }
+
+    for primo, ultimo in _limiti_mesi(da, a):
+        mese = []
+        for r in regole:
+            mese.extend((o, r.id_ref) for o in espandi_ordinali(r.regola(), primo, ultimo))
+        mese.sort(key=lambda x: x[0])  # stabile: a parità di giorno resta l'ordine per ora
+        for o, ref in mese:
+            yield (ref, date.fromordinal(o).isoformat()) + statiche[ref]
+
+
+def righe(entita: str, da: date | None = None, a: date | None = None, dipendente_id: int | None = None):
+    """(colonne, generatore di tuple) per l'entità richiesta."""
+    if entita in COLONNE_ANAGRAFICHE:
+        if da or a or dipendente_id is not None:
+            raise ValueError(f"I filtri su periodo e dipendente non valgono per {entita}.")
+        return COLONNE_ANAGRAFICHE[entita], scorri_anagrafica(entita)
+
+    if entita == "interventi":
+        return COLONNE_INTERVENTI, scorri_interventi(
+            da.isoformat() if da else "0000-01-01", a.isoformat() if a else "9999-12-31", dipendente_id)
+
+    if entita == "occorrenze":
+        # le occorrenze sono infinite senza un periodo: default anno corrente
+        oggi = date.today()
+        da = da or date(oggi.year, 1, 1)
+        a = a or date(da.year, 12, 31)
+        return COLONNE_OCCORRENZE, scorri_occorrenze(da, a, dipendente_id)
+
+    raise ValueError(f"Entità sconosciuta: {entita} (disponibili: {', '.join(ENTITA)})")
+
+
+# ---------------------------------------------------------
+#  SCRITTURA
+# ---------------------------------------------------------
+def scrivi_csv(colonne, righe, f) -> int:
+    w = csv.writer(f, lineterminator="\n")
+    w.writerow(colonne)
+    n = 0
+    for r in righe:
+        w.writerow(r)
+        n += 1
+    return n
+
+
+def scrivi_jsonl(colonne, righe, f) -> int:
+    n = 0
+    for r in righe:
+        f.write(json.dumps(dict(zip(colonne, r)), ensure_ascii=False))
+        f.write("\n")
+        n += 1
+    return n
+
+
+def esporta(entita: str, f, formato: str = "csv", da: date | None = None, a: date | None = None,
+            dipendente_id: int | None = None) -> int:
+    """Scrive l'entità su un file di testo già aperto; restituisce le righe scritte."""
+    if a and da and a < da:
+        raise ValueError("La data finale precede quella iniziale.")
+    colonne, gen = righe(entita, da, a, dipendente_id)
+    if formato == "csv":
+        return scrivi_csv(colonne, gen, f)
+    if formato == "jsonl":
+        return scrivi_jsonl(colonne, gen, f)
+    raise ValueError(f"Formato sconosciuto: {formato} (disponibili: {', '.join(FORMATI)})")
+
+
+def formato_da_percorso(percorso: str) -> str:
+    return "jsonl" if os.path.splitext(percorso)[1].lower() in (".jsonl", ".json", ".ndjson") else "csv"
+
+
+def esporta_file(entita: str, percorso: str, formato: str | None = None, **filtri) -> int:
+    formato = formato or formato_da_percorso(percorso)
+    # utf-8-sig per il CSV: Excel riconosce gli accenti solo con il BOM
+    encoding = "utf-8-sig" if formato == "csv" else "utf-8"
+    with open(percorso, "w", newline="", encoding=encoding) as f:
+        return esporta(entita, f, formato, **filtri)
@@ -0,0 +1,195 @@
+"""
+Fatturazione mensile per cliente a partire da servizi.prezzo_mensile.
+
+Una riga per (cliente, servizio, mese):
+  - RICORRENTI: si fattura la quota del mese coperta dal periodo della regola
+    (data_inizio/data_fine, NULL = senza limite) meno i suoi periodi di sospensione
+    (ricorrenti_sospensioni), non il flag di oggi: così rifatturare un mese passato dà lo
+    stesso importo anche dopo una sospensione o una riattivazione;
+  - SINGOLI non annullati: ogni giorno con almeno un singolo è un giorno coperto.
+quota = giorni coperti dall'unione di periodi e singoli / giorni del mese (più regole dello
+stesso servizio non si sommano; un singolo in un giorno già coperto non aggiunge nulla).
+importo = prezzo_mensile x quota, arrotondato al centesimo.
+
+Un mese chiuso (chiudi_mese) viene salvato con nomi e prezzi del momento e da lì in poi
+si legge dal DB, senza ricalcolarlo. Il calcolo di un mese aperto sono tre query e un
+passaggio in memoria per tutti i clienti. Nessuna dipendenza da Qt.
+"""
+from __future__ import annotations
+
+import calendar
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from database.repositories.fatturazione_repo import (
+    elimina_mese_chiuso, get_mese_chiuso, get_righe_chiuse, ricorrenti_mese, salva_mese_chiuso, singoli_mese,
+    sospensioni_mese
+)
+
+
+@dataclass(slots=True)
+class RigaFattura:
+    cliente_id: int
+    cliente: str
+    servizio_id: int
+    servizio: str
+    prezzo_mensile: float
+    quota: float          # frazione del mese fatturata (0..1)
+    importo: float
+    n_singoli: int = 0
+
+    def valori(self) -> tuple:
+        """Nell'ordine delle colonne di fatturazione_repo.salva_mese_chiuso."""
+        return (self.cliente_id, self.cliente, self.servizio_id, self.servizio,
+                self.prezzo_mensile, self.quota, self.importo, self.n_singoli)
+
+
+@dataclass(slots=True)
+class Fattura:
+    cliente_id: int
+    cliente: str
+    righe: list = field(default_factory=list)
+
+    @property
+    def totale(self) -> float:
+        return round(sum(r.importo for r in self.righe), 2)
+
+
+@dataclass(slots=True)
+class MeseFatturazione:
+    anno: int
+    mese: int
+    righe: list = field(default_factory=list)   # [RigaFattura] per cliente, servizio
+    chiuso_il: str | None = None                # None = mese aperto (calcolato ora)
+
+    @property
+    def chiuso(self) -> bool:
+        return self.chiuso_il is not None
+
+    @property
+    def totale(self) -> float:
+        return round(sum(r.importo for r in self.righe), 2)
+
+    def fatture(self) -> list[Fattura]:
+        """Righe raggruppate per cliente (le righe sono già ordinate per cliente)."""
+        out = []
+        for r in self.righe:
+            if not out or out[-1].cliente_id != r.cliente_id:
+                out.append(Fattura(r.cliente_id, r.cliente))
+            out[-1].righe.append(r)
+        return out
+
+
+# ---------------- MESE ----------------
+def chiave_mese(anno: int, mese: int) -> str:
+    return f"{anno:04d}-{mese:02d}"
+
+
+def limiti_mese(anno: int, mese: int) -> tuple[date, date]:
+    return date(anno, mese, 1), date(anno, mese, calendar.monthrange(anno, mese)[1])
+
+
+def quota_coperta(periodi, primo: date, ultimo: date) -> float:
+    """
+    Frazione di [primo, ultimo] coperta dall'unione dei periodi (data_inizio, data_fine),
+    stringhe ISO o None = senza limite.
+    """
+    intervalli = sorted(
+        (max(primo, date.fromisoformat(i)) if i else primo,
+         min(ultimo, date.fromisoformat(f)) if f else ultimo)
+        for i, f in periodi
+    )
+    coperti = 0
+    fine_prec = primo - timedelta(days=1)
+    for inizio, fine in intervalli:
+        inizio = max(inizio, fine_prec + timedelta(days=1))
+        if fine >= inizio:
+            coperti += (fine - inizio).days + 1
+            fine_prec = fine
+    return coperti / ((ultimo - primo).days + 1)
+
+
+def periodi_attivi(data_inizio, data_fine, sospensioni, primo: date, ultimo: date) -> list[tuple[str, str]]:
+    """
+    Periodo della regola dentro [primo, ultimo] senza le sospensioni [(dal, al)]:
+    stringhe ISO o None = senza limite. Restituisce i pezzi rimasti (ISO).
+    """
+    da = max(primo, date.fromisoformat(data_inizio)) if data_inizio else primo
+    a = min(ultimo, date.fromisoformat(data_fine)) if data_fine else ultimo
+    pezzi = []
+    for dal, al in sorted(sospensioni, key=lambda s: s[0] or ""):
+        if da > a:
+            break
+        if dal and date.fromisoformat(dal) > da:
+            pezzi.append((da, min(a, date.fromisoformat(dal) - timedelta(days=1))))
+        if not al or date.fromisoformat(al) >= a:
+            da = a + timedelta(days=1)   # sospesa fino alla fine del periodo
+        else:
+            da = max(da, date.fromisoformat(al) + timedelta(days=1))
+    if da <= a:
+        pezzi.append((da, a))
+    return [(i.isoformat(), f.isoformat()) for i, f in pezzi]
+
+
+def calcola_mese(anno: int, mese: int) -> list[RigaFattura]:
+    """Righe del mese calcolate dai dati attuali (anche per un mese già chiuso)."""
+    primo, ultimo = limiti_mese(anno, mese)
+    da, a = primo.isoformat(), ultimo.isoformat()
+
+    sospensioni = sospensioni_mese(da, a)
+    voci = {}  # (cliente_id, servizio_id) -> [cliente, servizio, prezzo, periodi e giorni, n_singoli]
+    for r in ricorrenti_mese(da, a):
+        periodi = periodi_attivi(r["data_inizio"], r["data_fine"], sospensioni.get(r["id"], ()), primo, ultimo)
+        if not periodi:
+            continue  # sospesa per tutto il mese
+        v = voci.setdefault((r["cliente_id"], r["servizio_id"]),
+                            [r["cliente"], r["servizio"], r["prezzo_mensile"], [], 0])
+        v[3].extend(periodi)
+    for r in singoli_mese(da, a):
+        v = voci.setdefault((r["cliente_id"], r["servizio_id"]),
+                            [r["cliente"], r["servizio"], r["prezzo_mensile"], [], 0])
+        v[3].extend((g, g) for g in r["giorni"].split(","))
+        v[4] = r["n"]
+
+    righe = []
+    for (cliente_id, servizio_id), (cliente, servizio, prezzo, periodi, n_singoli) in voci.items():
+        quota = quota_coperta(periodi, primo, ultimo)
+        prezzo = prezzo or 0.0
+        righe.append(RigaFattura(cliente_id, cliente, servizio_id, servizio, prezzo,
+                                 round(quota, 4), round(prezzo * quota, 2), n_singoli))
+    righe.sort(key=lambda r: (r.cliente.casefold(), r.cliente_id, r.servizio.casefold()))
+    return righe
+
+
+# ---------------- MESI CHIUSI ----------------
+def fatturazione_mese(anno: int, mese: int) -> MeseFatturazione:
+    """Mese chiuso: righe salvate. Mese aperto: calcolo sui dati attuali."""
+    testata = get_mese_chiuso(chiave_mese(anno, mese))
+    if testata is None:
+        return MeseFatturazione(anno, mese, calcola_mese(anno, mese))
+
+    righe = [
+        RigaFattura(r["cliente_id"], r["cliente"], r["servizio_id"], r["servizio"],
+                    r["prezzo_mensile"], r["quota"], r["importo"], r["n_singoli"])
+        for r in get_righe_chiuse(testata["mese"])
+    ]
+    righe.sort(key=lambda r: (r.cliente.casefold(), r.cliente_id, r.servizio.casefold()))
+    return MeseFatturazione(anno, mese, righe, testata["chiuso_il"])
+
+
+def chiudi_mese(anno: int, mese: int, oggi: date | None = None) -> MeseFatturazione:
+    """
+    Genera in un solo passaggio le fatture di tutti i clienti del mese e le salva.
+    Si può chiudere solo un mese concluso; se è già chiuso restituisce quello salvato.
+    """
+    if limiti_mese(anno, mese)[1] >= (oggi or date.today()):
+        raise ValueError(f"Il mese {mese:02d}/{anno} non è ancora concluso.")
+
+    if get_mese_chiuso(chiave_mese(anno, mese)) is None:
+        salva_mese_chiuso(chiave_mese(anno, mese), [r.valori() for r in calcola_mese(anno, mese)])
+    return fatturazione_mese(anno, mese)
+
+
+def riapri_mese(anno: int, mese: int) -> bool:
+    """Elimina il riepilogo salvato: il mese torna a essere calcolato (es. per correggerlo)."""
+    return elimina_mese_chiuso(chiave_mese(anno, mese))
@@ -0,0 +1,227 @@
+"""
+Import in blocco di clienti / dipendenti / servizi da CSV.
+
+Il file si legge in streaming (generatori, una riga alla volta): ogni riga viene
+validata e normalizzata con norm_nome come nei model. Le righe valide si inseriscono
+a lotti con executemany, una transazione per lotto, con INSERT ... WHERE NOT EXISTS
+sulla chiave (cognome_norm, nome_norm) o nome_norm: il controllo dei doppioni è una
+ricerca sugli indici idx_*_norm, che vede anche le righe già inserite dal file.
+In memoria resta solo il lotto corrente, qualunque sia la dimensione di tabella e file;
+gli errori sono riportati per numero di riga (i primi MAX_ERRORI, gli altri solo contati).
+
+Intestazioni: i nomi delle colonne del DB (maiuscole/minuscole e spazi non contano);
+separatore "," o ";" (rilevato), UTF-8 con o senza BOM. Nessuna dipendenza da Qt.
+"""
+from __future__ import annotations
+
+import csv
+import io
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from database.database import transaction
+from database.index_advisor import registra_query
+from services.normalizza import norm_nome
+
+LOTTO_DEFAULT = 1000
+MAX_ERRORI = 1000
+
+
+# ---------------------------------------------------------
+#  CONVERSIONI
+# ---------------------------------------------------------
+def _testo(v: str):
+    return v or None
+
+
+def _intero(v: str):
+    if not v:
+        return None
+    n = int(v)
+    if n < 0:
+        raise ValueError("deve essere >= 0")
+    return n
+
+
+def _decimale(v: str):
+    if not v:
+        return None
+    n = float(v.replace(",", "."))  # "12,50" dai fogli di calcolo italiani
+    if n < 0:
+        raise ValueError("deve essere >= 0")
+    return n
+
+
+def _prezzo(v: str):
+    n = _decimale(v)
+    if not n:
+        raise ValueError("deve essere > 0")
+    return n
+
+
+def _data(v: str):
+    if not v:
+        return None
+    for formato in ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y"):
+        try:
+            return datetime.strptime(v, formato).date().isoformat()
+        except ValueError:
+            pass
+    raise ValueError("data non valida (YYYY-MM-DD o GG/MM/AAAA)")
+
+
+@dataclass(frozen=True)
+class Schema:
+    tabella: str
+    colonne: dict           # colonna -> conversione (stringa già "strip"-ata -> valore)
+    obbligatorie: tuple
+    chiave: tuple           # colonne normalizzate con norm_nome (-> <colonna>_norm)
+
+
+SCHEMI = {
+    "clienti": Schema(
+        "clienti",
+        {"nome": _testo, "cognome": _testo, "telefono": _testo, "indirizzo": _testo, "email": _testo},
+        obbligatorie=("nome", "cognome"),
+        chiave=("cognome", "nome"),
+    ),
+    "dipendenti": Schema(
+        "dipendenti",
+        {"nome": _testo, "cognome": _testo, "telefono": _testo, "email": _testo, "mansione": _testo,
+         "ore_settimanali": _intero, "stipendio": _decimale, "scadenza_contratto": _data},
+        obbligatorie=("nome", "cognome"),
+        chiave=("cognome", "nome"),
+    ),
+    "servizi": Schema(
+        "servizi",
+        {"nome": _testo, "descrizione": _testo, "prezzo_mensile": _prezzo, "durata_default_ore": _decimale},
+        obbligatorie=("nome", "prezzo_mensile"),   # come nella finestra Servizi
+        chiave=("nome",),
+    ),
+}
+
+
+@dataclass
+class EsitoImport:
+    lette: int = 0
+    inserite: int = 0
+    duplicate: int = 0
+    n_errori: int = 0
+    errori: list = field(default_factory=list)   # [(numero riga, messaggio)], al massimo MAX_ERRORI
+
+    def errore(self, riga: int, messaggio: str):
+        self.n_errori += 1
+        if len(self.errori) < MAX_ERRORI:
+            self.errori.append((riga, messaggio))
+
+    def riepilogo(self) -> str:
+        return (f"{self.lette} righe lette: {self.inserite} inserite, "
+                f"{self.duplicate} già presenti, {self.n_errori} con errori")
+
+
+# ---------------------------------------------------------
+#  LETTURA (generatori)
+# ---------------------------------------------------------
+def leggi_csv(f):
+    """(numero riga, {colonna: testo}) per ogni riga dati; la riga 1 è l'intestazione."""
+    inizio = f.read(4096)
+    try:
+        dialetto = csv.Sniffer().sniff(inizio, delimiters=",;\t")
+    except csv.Error:
+        dialetto = csv.excel
+    reader = csv.reader(_concatena(inizio, f), dialetto)
+
+    intestazione = next(reader, None)
+    if intestazione is None:
+        return
+    nomi = [norm_nome(h).replace(" ", "_") for h in intestazione]
+    for valori in reader:
+        if not any(v.strip() for v in valori):
+            continue  # righe vuote in fondo ai file esportati da Excel
+        yield reader.line_num, dict(zip(nomi, (v.strip() for v in valori)))
+
+
+def _concatena(inizio: str, f):
+    # il campione per lo Sniffer è già stato letto: lo si rimette davanti al resto
+    yield from io.StringIO(inizio + f.readline())
+    yield from f
+
+
+def valida(schema: Schema, righe, esito: EsitoImport):
+    """(numero riga, valori in ordine di schema.colonne, chiave normalizzata) delle righe valide."""
+    for n, dati in righe:
+        esito.lette += 1
+        mancanti = [c for c in schema.obbligatorie if not dati.get(c)]
+        if mancanti:
+            esito.errore(n, f"campi obbligatori mancanti: {', '.join(mancanti)}")
+            continue
+        try:
+            valori = []
+            for colonna, converti in schema.colonne.items():
+                try:
+                    valori.append(converti(dati.get(colonna, "")))
+                except ValueError as e:
+                    raise ValueError(f"{colonna}: {e}") from None
+        except ValueError as e:
+            esito.errore(n, str(e))
+            continue
+        yield n, tuple(valori), tuple(norm_nome(dati[c]) for c in schema.chiave)
+
+
+def _sql_inserisci(schema: Schema) -> str:
+    """INSERT della riga solo se la sua chiave normalizzata non c'è ancora (parametri: valori + chiave)."""
+    colonne = list(schema.colonne) + [f"{c}_norm" for c in schema.chiave]
+    filtro = " AND ".join(f"{c}_norm = ?" for c in schema.chiave)
+    return (f"INSERT INTO {schema.tabella} ({', '.join(colonne)}) "
+            f"SELECT {', '.join('?' * len(colonne))} "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {schema.tabella} WHERE {filtro})")
+
+
+# "SCAN CONSTANT ROW" è la SELECT senza FROM dei valori, non una tabella
+_SQL_INSERISCI = {
+    entita: registra_query(f"importa_{entita}", _sql_inserisci(schema), scansioni_ammesse=("CONSTANT",))
+    for entita, schema in SCHEMI.items()
+}
+
+
+def _lotti(righe, dimensione: int):
+    lotto = []
+    for r in righe:
+        lotto.append(r)
+        if len(lotto) >= dimensione:
+            yield lotto
+            lotto = []
+    if lotto:
+        yield lotto
+
+
+# ---------------------------------------------------------
+#  IMPORT
+# ---------------------------------------------------------
+def importa(entita: str, f, lotto: int = LOTTO_DEFAULT, avanzamento=None) -> EsitoImport:
+    """
+    Importa da un file di testo già aperto (newline="").
+    avanzamento(righe lette) viene chiamato dopo ogni lotto (dal thread che importa).
+    """
+    schema = SCHEMI[entita]
+    if lotto < 1:
+        raise ValueError("La dimensione del lotto deve essere almeno 1")
+
+    esito = EsitoImport()
+    sql = _SQL_INSERISCI[entita]
+    valide = (valori + chiave + chiave for _, valori, chiave in valida(schema, leggi_csv(f), esito))
+
+    for righe in _lotti(valide, lotto):
+        with transaction() as conn:
+            # rowcount di executemany: righe davvero inserite (i trigger FTS non contano)
+            inserite = conn.executemany(sql, righe).rowcount
+        esito.inserite += inserite
+        esito.duplicate += len(righe) - inserite
+        if avanzamento is not None:
+            avanzamento(esito.lette)
+    return esito
+
+
+def importa_file(entita: str, percorso: str, lotto: int = LOTTO_DEFAULT, avanzamento=None) -> EsitoImport:
+    with open(percorso, newline="", encoding="utf-8-sig") as f:
+        return importa(entita, f, lotto, avanzamento)
@@ -0,0 +1,11 @@
+"""
+Chiave normalizzata dei nomi, usata per i controlli di duplicato.
+
+Unica definizione condivisa da UI, model e migrazioni: le colonne *_norm del DB
+(nome_norm, cognome_norm) contengono sempre norm_nome(valore).
+"""
+
+
+def norm_nome(s) -> str:
+    """Spazi compressi/rimossi ai bordi e casefold ("  Rossì  DE " -> "rossì de")."""
+    return " ".join((s or "").strip().split()).casefold()
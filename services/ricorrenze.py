@@ -0,0 +1,153 @@
+"""
+Espansione delle regole ricorrenti (interventi_ricorrenti + interventi_ricorrenti_giorni)
+in date di occorrenza. Nessuna dipendenza da Qt: la usano calendario, report e batch.
+
+I giorni della settimana sono salvati come maschera di bit:
+convenzione DB 1=Lun ... 7=Dom  ->  bit (giorno - 1).
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
+
+GIORNI_MAP = {1: "Lun", 2: "Mar", 3: "Mer", 4: "Gio", 5: "Ven", 6: "Sab", 7: "Dom"}
+
+
+def maschera_da_giorni(giorni: Iterable[int]) -> int:
+    m = 0
+    for g in giorni:
+        g = int(g)
+        if 1 <= g <= 7:
+            m |= 1 << (g - 1)
+    return m
+
+
+def giorni_da_maschera(maschera: int) -> list[int]:
+    return [g for g in range(1, 8) if maschera & (1 << (g - 1))]
+
+
+def _parse_iso(s) -> Optional[date]:
+    if not s or str(s).strip() in ("", "-"):
+        return None
+    try:
+        return date.fromisoformat(str(s).strip()[:10])
+    except ValueError:
+        return None
+
+
+@dataclass(frozen=True, slots=True)
+class Regola:
+    id: int
+    maschera: int
+    data_inizio: Optional[date] = None
+    data_fine: Optional[date] = None
+    attivo: bool = True
+
+    @staticmethod
+    def crea(id: int, giorni: Iterable[int], data_inizio=None, data_fine=None, attivo=True) -> "Regola":
+        """Costruisce una regola a partire dai valori del DB (date come stringhe YYYY-MM-DD)."""
+        return Regola(
+            id=int(id),
+            maschera=maschera_da_giorni(giorni),
+            data_inizio=data_inizio if isinstance(data_inizio, date) else _parse_iso(data_inizio),
+            data_fine=data_fine if isinstance(data_fine, date) else _parse_iso(data_fine),
+            attivo=bool(attivo),
+        )
+
+
+@lru_cache(maxsize=None)
+def _offsets(maschera: int, weekday_inizio: int) -> Tuple[int, ...]:
+    # scostamenti (in giorni, 0..6) dei giorni attivi a partire da un giorno ISO weekday_inizio
+    return tuple(sorted((g - weekday_inizio) % 7 for g in giorni_da_maschera(maschera)))
+
+
+def espandi_ordinali(regola: Regola, da: date, a: date) -> list[int]:
+    """Occorrenze della regola in [da, a] come ordinali (date.toordinal), in ordine crescente."""
+    if not regola.attivo or not regola.maschera:
+        return []
+
+    start = da if regola.data_inizio is None or regola.data_inizio < da else regola.data_inizio
+    end = a if regola.data_fine is None or regola.data_fine > a else regola.data_fine
+    if start > end:
+        return []
+
+    base = start.toordinal()
+    last = end.toordinal()
+    offs = _offsets(regola.maschera, start.isoweekday())
+
+    out = []
+    for week in range(base, last + 1, 7):
+        for o in offs:
+            d = week + o
+            if d > last:
+                break
+            out.append(d)
+    return out
+
+
+def espandi(regola: Regola, da: date, a: date) -> list[date]:
+    """Occorrenze della regola in [da, a] (estremi inclusi)."""
+    return [date.fromordinal(o) for o in espandi_ordinali(regola, da, a)]
+
+
+class CacheOccorrenze:
+    """
+    LRU delle espansioni, chiave (regola, da, a): la Regola è frozen e contiene tutto ciò
+    da cui dipendono le date, quindi una voce non può mai essere vecchia (regola modificata,
+    altro file DB). invalida() e clear() servono solo a liberare le voci che non verranno
+    più chieste. Thread-safe: viene usata anche dai worker di caricamento.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[tuple, Tuple[date, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def occorrenze(self, regola: Regola, da: date, a: date) -> Tuple[date, ...]:
+        key = (regola, da, a)
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is not None:
+                self._data.move_to_end(key)
+                return hit
+
+        # espansione fuori dal lock: due thread al più calcolano lo stesso valore
+        value = tuple(espandi(regola, da, a))
+        with self._lock:
+            self._data[key] = value
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def invalida(self, regola_id: int):
+        regola_id = int(regola_id)
+        with self._lock:
+            for key in [k for k in self._data if k[0].id == regola_id]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# cache condivisa dall'applicazione
+_cache = CacheOccorrenze()
+
+
+def occorrenze(regola: Regola, da: date, a: date) -> Tuple[date, ...]:
+    return _cache.occorrenze(regola, da, a)
+
+
+def invalida_regola(regola_id: int):
+    _cache.invalida(regola_id)
+
+
+def invalida_tutto():
+    _cache.clear()
@@ -0,0 +1,105 @@
+"""
+Layout delle viste timeline (giorno / settimana), senza dipendenze da Qt.
+
+Asse orizzontale = tempo, una corsia per dipendente. Gli interventi che nella stessa
+corsia si sovrappongono vanno su sotto-righe diverse: l'assegnazione si fa in un solo
+passaggio sugli intervalli ordinati per inizio, con un heap delle sotto-righe che si
+liberano (O(n log n)). La vista deve solo trasformare minuti/sotto-righe in pixel.
+"""
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+MINUTI_GIORNO = 24 * 60
+DURATA_DEFAULT_MIN = 60      # interventi senza durata
+NON_ASSEGNATO = (0, "Non assegnato")
+STATI_IGNORATI = ("Annullato",)  # non occupano il dipendente: niente ore né conflitti
+
+
+@dataclass(slots=True)
+class Blocco:
+    riga: object          # RigaIntervento
+    corsia: int           # indice in Layout.corsie
+    inizio: int           # minuti dall'inizio del periodo (giorno o lunedì 00:00)
+    fine: int
+    sottoriga: int = 0
+
+
+@dataclass(slots=True)
+class Layout:
+    giorni: int                                    # 1 (giorno) o 7 (settimana)
+    corsie: list = field(default_factory=list)     # [(dipendente_id, nome)]
+    sottorighe: list = field(default_factory=list)  # per corsia: numero di sotto-righe (>= 1)
+    blocchi: list = field(default_factory=list)    # ordinati per corsia, inizio
+
+
+def _minuti(ora: str | None) -> int | None:
+    try:
+        h, m = (ora or "").split(":")[:2]
+        return int(h) * 60 + int(m)
+    except ValueError:
+        return None
+
+
+def intervallo(riga) -> tuple[int, int] | None:
+    """(inizio, fine) in minuti dalla mezzanotte; None se l'ora non è valida."""
+    inizio = _minuti(riga.ora)
+    if inizio is None:
+        return None
+    return inizio, inizio + (riga.durata_min or DURATA_DEFAULT_MIN)
+
+
+def _assegna_sottorighe(blocchi: list) -> int:
+    """
+    blocchi di una corsia, già ordinati per inizio: assegna la prima sotto-riga libera
+    a ciascuno e restituisce quante sotto-righe servono.
+    """
+    occupate = []   # heap (fine, sottoriga) delle sotto-righe in uso
+    libere = []     # heap delle sotto-righe liberate (si riusa sempre la più bassa)
+    totale = 0
+    for b in blocchi:
+        while occupate and occupate[0][0] <= b.inizio:
+            heapq.heappush(libere, heapq.heappop(occupate)[1])
+        if libere:
+            b.sottoriga = heapq.heappop(libere)
+        else:
+            b.sottoriga = totale
+            totale += 1
+        heapq.heappush(occupate, (b.fine, b.sottoriga))
+    return max(totale, 1)
+
+
+def calcola_layout(eventi_per_giorno: dict, primo_giorno: date, giorni: int = 1) -> Layout:
+    """
+    eventi_per_giorno: date -> [RigaIntervento] (come services.calendario.eventi_mese).
+    Un intervento con più dipendenti compare nella corsia di ciascuno; quelli senza
+    dipendenti finiscono nella corsia "Non assegnato" (ultima).
+    """
+    per_corsia = {}  # (dipendente_id, nome) -> [Blocco]
+    for offset in range(giorni):
+        giorno = primo_giorno + timedelta(days=offset)
+        base = offset * MINUTI_GIORNO
+        for r in eventi_per_giorno.get(giorno, ()):
+            iv = intervallo(r)
+            if iv is None:
+                continue
+            inizio, fine = iv
+            chiavi = list(zip(r.dipendente_ids, r.dipendenti)) or [NON_ASSEGNATO]
+            for chiave in chiavi:
+                per_corsia.setdefault(chiave, []).append(Blocco(r, 0, base + inizio, base + fine))
+
+    corsie = sorted((k for k in per_corsia if k != NON_ASSEGNATO), key=lambda k: k[1].casefold())
+    if NON_ASSEGNATO in per_corsia:
+        corsie.append(NON_ASSEGNATO)
+
+    layout = Layout(giorni=giorni, corsie=corsie)
+    for i, chiave in enumerate(corsie):
+        blocchi = per_corsia[chiave]
+        blocchi.sort(key=lambda b: (b.inizio, b.fine))
+        for b in blocchi:
+            b.corsia = i
+        layout.sottorighe.append(_assegna_sottorighe(blocchi))
+        layout.blocchi.extend(blocchi)
+    return layout
@@ -0,0 +1,55 @@
+"""
+Base comune dei test che usano il database: ogni test lavora su un file nuovo in una
+cartella temporanea, con lo schema migrato e le cache del calendario vuote; alla fine
+si tornano a usare il DB e il profilo di prima.
+
+    from tests.base import DBTestCase
+
+    class MioTestCase(DBTestCase):
+        def setUp(self):
+            super().setUp()
+            db.get_connection().execute(...)   # dati del test
+"""
+import os
+import tempfile
+import unittest
+
+import database.database as db
+from services.cache_calendario import invalida_tutto
+
+
+class DBTemporaneo:
+    """DB di prova in una cartella temporanea. chiudi() ripristina DB e profilo precedenti."""
+
+    def __init__(self, migra: bool = True, profilo: str | None = None):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._old_path = db.DB_PATH
+        self._old_profilo = db.profilo_corrente()
+        self.cartella = self._tmp.name
+        self.path = os.path.join(self.cartella, "test.db")
+
+        db.configure(db_path=self.path, profilo=profilo)
+        if migra:
+            db.init_db()
+        invalida_tutto()
+
+    def chiudi(self):
+        invalida_tutto()
+        db.configure(db_path=self._old_path, **self._old_profilo)
+        self._tmp.cleanup()
+
+
+class DBTestCase(unittest.TestCase):
+    """
+    Un DB nuovo per ogni test (self.db_path, nella cartella self.cartella).
+    migra = False: file non ancora creato né migrato (test delle migrazioni e della CLI).
+    """
+    migra = True
+    profilo = None
+
+    def setUp(self):
+        temporaneo = DBTemporaneo(self.migra, self.profilo)
+        # addCleanup: vale anche se il setUp della sottoclasse fallisce
+        self.addCleanup(temporaneo.chiudi)
+        self.cartella = temporaneo.cartella
+        self.db_path = temporaneo.path
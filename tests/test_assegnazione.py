@@ -0,0 +1,61 @@
+import unittest
+from datetime import date
+
+import database.database as db
+from database.repositories.interventi_repo import get_intervento_dipendenti_ids
+from services.assegnazione import applica, proponi
+from services.cache_calendario import invalida_tutto
+from tests.base import DBTestCase
+
+LUNEDI = date(2026, 3, 2)
+
+
+class AssegnazioneTestCase(DBTestCase):
+    def setUp(self):
+        super().setUp()
+
+        conn = db.get_connection()
+        conn.executemany("INSERT INTO clienti(id, nome, cognome) VALUES (?, ?, ?)",
+                         [(1, "Mario", "Rossi"), (2, "Carla", "Neri")])
+        conn.execute("INSERT INTO servizi(id, nome) VALUES (1, 'Uffici')")
+        # Anna: 4 ore a settimana; Luca senza limite
+        conn.executemany("INSERT INTO dipendenti(id, nome, cognome, ore_settimanali) VALUES (?, ?, ?, ?)",
+                         [(1, "Anna", "Bianchi", 4), (2, "Luca", "Verdi", None)])
+        conn.executemany(
+            "INSERT INTO interventi(id, cliente_id, servizio_id, data, ora_inizio, durata_ore) VALUES (?, ?, 1, ?, ?, ?)",
+            [
+                (1, 1, "2026-02-20", "09:00", 1),   # storico: Anna lavora per Rossi
+                (2, 1, "2026-03-02", "09:00", 2),   # da assegnare
+                (3, 2, "2026-03-02", "10:00", 2),   # si sovrappone al 2
+                (4, 1, "2026-03-03", "09:00", 3),   # Anna avrebbe 5 ore: oltre il limite
+            ],
+        )
+        conn.execute("INSERT INTO interventi_dipendenti VALUES (1, 1)")
+        conn.commit()
+        invalida_tutto()
+
+    def test_proposte_rispettano_vincoli_e_preferenze(self):
+        piano = proponi(LUNEDI, date(2026, 3, 8))
+        assegnati = {p.intervento_id: p.dipendente_id for p in piano.proposte}
+
+        self.assertEqual(piano.scoperti, [])
+        self.assertEqual(assegnati, {2: 1, 3: 2, 4: 2})
+        self.assertTrue(next(p for p in piano.proposte if p.intervento_id == 2).abituale)
+
+    def test_applica_in_una_transazione(self):
+        piano = proponi(LUNEDI, date(2026, 3, 8))
+        self.assertEqual(applica(piano.proposte), 3)
+        self.assertEqual(get_intervento_dipendenti_ids(2), [1])
+
+        # ora sono tutti assegnati: niente da proporre
+        self.assertEqual(proponi(LUNEDI, date(2026, 3, 8)).proposte, [])
+
+    def test_personale_minimo(self):
+        piano = proponi(LUNEDI, LUNEDI, personale_minimo=2)
+        # 2 e 3 si sovrappongono e i dipendenti sono due: uno dei due resta scoperto
+        self.assertEqual(len(piano.proposte), 2)
+        self.assertEqual(len(piano.scoperti), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,18 @@
+import unittest
+
+from services.avvio import Cronometro
+
+
+class CronometroTestCase(unittest.TestCase):
+    def test_traguardi_in_ordine(self):
+        c = Cronometro()
+        c.segna("init_db")
+        c.segna("primo frame")
+
+        self.assertEqual([n for n, _ in c.traguardi], ["init_db", "primo frame"])
+        self.assertLessEqual(c.traguardi[0][1], c.traguardi[1][1])
+        self.assertIn("primo frame", c.report())
+
+
+if __name__ == "__main__":
+    unittest.main()
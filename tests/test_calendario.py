@@ -0,0 +1,115 @@
+import unittest
+from datetime import date
+
+import database.database as db
+from database.repositories.interventi_repo import create_intervento
+from services.cache_calendario import CacheMesi, cache_mesi, invalida_tutto
+from services.calendario import eventi_griglia, eventi_griglia_in_cache, eventi_mese, griglia_mese
+from tests.base import DBTestCase
+
+
+class EventiMeseTestCase(DBTestCase):
+    def setUp(self):
+        super().setUp()
+
+        conn = db.get_connection()
+        conn.execute("INSERT INTO clienti(id, nome, cognome) VALUES (1, 'Mario', 'Rossi')")
+        conn.execute("INSERT INTO servizi(id, nome) VALUES (1, 'Uffici')")
+        conn.execute("INSERT INTO interventi(id, cliente_id, servizio_id, data, ora_inizio) "
+                     "VALUES (1, 1, 1, '2026-02-02', '10:00')")
+        # ricorrente ogni lunedì (giorno 1), alle 08:00
+        conn.execute("INSERT INTO interventi_ricorrenti(id, cliente_id, servizio_id, ora_inizio, data_inizio, data_fine) "
+                     "VALUES (1, 1, 1, '08:00', '2026-01-01', '2026-12-31')")
+        conn.execute("INSERT INTO interventi_ricorrenti_giorni VALUES (1, 1)")
+        conn.commit()
+        invalida_tutto()
+
+    def test_singoli_e_occorrenze_per_giorno(self):
+        eventi = eventi_mese(2026, 2)
+        self.assertEqual(sorted(eventi), [date(2026, 2, d) for d in (2, 9, 16, 23)])
+
+        # stesso giorno: ordinati per ora (ricorrente 08:00 prima del singolo 10:00)
+        self.assertEqual([e.tipo for e in eventi[date(2026, 2, 2)]], ["RICORRENTE", "SINGOLO"])
+
+    def test_mese_in_cache_non_interroga_il_db(self):
+        primo = eventi_mese(2026, 2)
+
+        query = []
+        db.get_connection().set_trace_callback(query.append)
+        try:
+            self.assertIs(eventi_mese(2026, 2), primo)
+        finally:
+            db.get_connection().set_trace_callback(None)
+        self.assertEqual(query, [])
+
+    def test_scrittura_invalida_solo_il_suo_mese(self):
+        eventi_mese(2026, 2)
+        eventi_mese(2026, 3)
+
+        create_intervento({"cliente_id": 1, "servizio_id": 1, "data": "2026-03-05", "ora_inizio": "11:00"})
+        self.assertIn((2026, 2), cache_mesi)
+        self.assertNotIn((2026, 3), cache_mesi)
+        self.assertIn(date(2026, 3, 5), eventi_mese(2026, 3))
+
+    def test_risultato_calcolato_prima_di_una_scrittura_scartato(self):
+        cache = CacheMesi()
+        generazione = cache.generazione()
+        cache.invalida_periodo(date(2026, 1, 1), date(2026, 1, 1))
+        self.assertFalse(cache.salva(2026, 1, {}, generazione))
+        self.assertIsNone(cache.get(2026, 1))
+
+    def test_griglia_mese_per_posizione(self):
+        conn = db.get_connection()
+        conn.execute("INSERT INTO dipendenti(id, nome, cognome) VALUES (1, 'Anna', 'Bianchi')")
+        # 2026-02-03: due interventi di Anna sovrapposti
+        for id_, ora in ((2, "09:00"), (3, "09:30")):
+            conn.execute("INSERT INTO interventi(id, cliente_id, servizio_id, data, ora_inizio, durata_ore) "
+                         "VALUES (?, 1, 1, '2026-02-03', ?, 1)", (id_, ora))
+            conn.execute("INSERT INTO interventi_dipendenti VALUES (?, 1)", (id_,))
+        conn.commit()
+        invalida_tutto()
+
+        griglia = griglia_mese(eventi_mese(2026, 2), 2026, 2)
+        # febbraio 2026 inizia di domenica: la griglia parte da lunedì 26 gennaio
+        self.assertEqual(griglia.inizio, date(2026, 1, 26))
+        lun, mar = griglia.indice(date(2026, 2, 2)), griglia.indice(date(2026, 2, 3))
+        self.assertEqual((lun, mar), (7, 8))
+        self.assertEqual(griglia.conteggi[lun], 2)
+        self.assertFalse(griglia.conflitti[lun])      # nessun dipendente assegnato
+        self.assertEqual((griglia.conteggi[mar], griglia.minuti[mar]), (2, 120))
+        self.assertTrue(griglia.conflitti[mar])
+        self.assertEqual(griglia.indice(date(2026, 3, 9)), -1)
+
+    def test_griglia_con_giorni_dei_mesi_adiacenti(self):
+        # marzo 2026: la griglia va da lunedì 23 febbraio a domenica 5 aprile
+        eventi = eventi_griglia(2026, 3)
+        self.assertIn(date(2026, 2, 23), eventi)     # lunedì di febbraio in testa
+        self.assertNotIn(date(2026, 2, 16), eventi)  # fuori dalla griglia
+        self.assertEqual(eventi_griglia_in_cache(2026, 3), eventi)
+
+        griglia = griglia_mese(eventi, 2026, 3)
+        self.assertEqual(griglia.conteggi[griglia.indice(date(2026, 2, 23))], 1)
+        self.assertEqual(griglia.minuti[griglia.indice(date(2026, 2, 23))], 60)
+
+        invalida_tutto()
+        self.assertIsNone(eventi_griglia_in_cache(2026, 3))
+
+    def test_griglia_ignora_annullati(self):
+        conn = db.get_connection()
+        conn.execute("INSERT INTO dipendenti(id, nome, cognome) VALUES (1, 'Anna', 'Bianchi')")
+        # 2026-02-04: sovrapposti, ma il secondo è annullato
+        for id_, ora, stato in ((2, "09:00", "Programmato"), (3, "09:30", "Annullato")):
+            conn.execute("INSERT INTO interventi(id, cliente_id, servizio_id, data, ora_inizio, durata_ore, stato) "
+                         "VALUES (?, 1, 1, '2026-02-04', ?, 1, ?)", (id_, ora, stato))
+            conn.execute("INSERT INTO interventi_dipendenti VALUES (?, 1)", (id_,))
+        conn.commit()
+        invalida_tutto()
+
+        griglia = griglia_mese(eventi_mese(2026, 2), 2026, 2)
+        i = griglia.indice(date(2026, 2, 4))
+        self.assertEqual((griglia.conteggi[i], griglia.minuti[i]), (2, 60))
+        self.assertFalse(griglia.conflitti[i])
+
+
+if __name__ == "__main__":
+    unittest.main()
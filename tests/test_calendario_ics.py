@@ -0,0 +1,78 @@
+import os
+import unittest
+from datetime import date
+
+import database.database as db
+from database.repositories.interventi_repo import create_intervento
+from services.cache_calendario import invalida_tutto
+from services.calendario_ics import _piega, aggiorna_feed, genera_ics, nome_feed
+from tests.base import DBTestCase
+
+OGGI = date(2026, 3, 1)
+
+
+class CalendarioIcsTestCase(DBTestCase):
+    def setUp(self):
+        super().setUp()
+
+        conn = db.get_connection()
+        conn.execute("INSERT INTO clienti(id, nome, cognome, indirizzo) VALUES (1, 'Mario', 'Rossi', 'Via Roma 1, Bari')")
+        conn.execute("INSERT INTO servizi(id, nome) VALUES (1, 'Uffici')")
+        conn.executemany("INSERT INTO dipendenti(id, nome, cognome) VALUES (?, ?, ?)",
+                         [(1, "Anna", "Bianchi"), (2, "Luca", "Verdi")])
+        conn.execute("INSERT INTO interventi(id, cliente_id, servizio_id, data, ora_inizio, durata_ore) "
+                     "VALUES (1, 1, 1, '2026-03-10', '09:00', 2)")
+        conn.execute("INSERT INTO interventi_dipendenti VALUES (1, 2)")
+        # lunedì e giovedì alle 07:30 per tutto l'anno: un solo VEVENT
+        conn.execute("INSERT INTO interventi_ricorrenti(id, cliente_id, servizio_id, ora_inizio, durata_ore, "
+                     "data_inizio, data_fine) VALUES (1, 1, 1, '07:30', 1.5, '2026-01-01', '2026-12-31')")
+        conn.executemany("INSERT INTO interventi_ricorrenti_giorni VALUES (1, ?)", [(1,), (4,)])
+        conn.execute("INSERT INTO ricorrenti_dipendenti VALUES (1, 1)")
+        conn.commit()
+        invalida_tutto()
+
+        self.feed = os.path.join(self.cartella, "feed")
+
+    def test_ricorrente_come_rrule(self):
+        testo = genera_ics(dipendente_id=1, oggi=OGGI)
+        righe = testo.split("\r\n")
+
+        self.assertEqual(testo.count("BEGIN:VEVENT"), 1)
+        self.assertIn("RRULE:FREQ=WEEKLY;BYDAY=MO,TH;UNTIL=20261231T235959", righe)
+        self.assertIn("DTSTART:20260101T073000", righe)   # 1/1/2026 è un giovedì
+        self.assertIn("DTEND:20260101T090000", righe)
+        self.assertIn("LOCATION:Via Roma 1\\, Bari", righe)
+
+        tutti = genera_ics(oggi=OGGI)
+        self.assertEqual(tutti.count("BEGIN:VEVENT"), 2)
+        self.assertIn("UID:intervento-1@gestione-pulizie", tutti)
+
+    def test_piega_righe_lunghe(self):
+        riga = "DESCRIPTION:" + "è" * 60
+        piegata = _piega(riga)
+        self.assertTrue(all(len(p.encode()) <= 75 for p in piegata.split("\r\n")))
+        self.assertEqual(piegata.replace("\r\n ", ""), riga)
+
+    def test_feed_riscritti_solo_se_cambiano(self):
+        primo = aggiorna_feed(self.feed, oggi=OGGI)
+        self.assertEqual(sorted(primo.scritti), [nome_feed(1), nome_feed(2), "tutti.ics"])
+
+        secondo = aggiorna_feed(self.feed, oggi=OGGI)
+        self.assertEqual((secondo.scritti, secondo.invariati), ([], 3))
+
+        # nuovo intervento di Luca: cambiano solo il suo feed e quello completo
+        create_intervento({"cliente_id": 1, "servizio_id": 1, "data": "2026-03-12", "ora_inizio": "15:00",
+                           "dipendente_ids": [2]})
+        terzo = aggiorna_feed(self.feed, oggi=OGGI)
+        self.assertEqual(sorted(terzo.scritti), [nome_feed(2), "tutti.ics"])
+
+        conn = db.get_connection()
+        conn.execute("DELETE FROM dipendenti WHERE id = 1")
+        conn.commit()
+        quarto = aggiorna_feed(self.feed, oggi=OGGI)
+        self.assertEqual(quarto.rimossi, [nome_feed(1)])
+        self.assertFalse(os.path.exists(os.path.join(self.feed, nome_feed(1))))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import time
+import unittest
+from datetime import date
+
+import database.database as db
+from database.repositories.interventi_repo import create_intervento
+from services.cache_calendario import invalida_tutto
+from services.carichi import report_carichi, settimane_periodo
+from tests.base import DBTestCase
+
+
+class CarichiTestCase(DBTestCase):
+    def setUp(self):
+        super().setUp()
+
+        conn = db.get_connection()
+        conn.execute("INSERT INTO clienti(id, nome, cognome) VALUES (1, 'Mario', 'Rossi')")
+        conn.execute("INSERT INTO servizi(id, nome) VALUES (1, 'Uffici')")
+        conn.executemany("INSERT INTO dipendenti(id, nome, cognome, ore_settimanali) VALUES (?, ?, ?, ?)",
+                         [(1, "Anna", "Bianchi", 10), (2, "Luca", "Verdi", None)])
+        conn.executemany(
+            "INSERT INTO interventi(id, cliente_id, servizio_id, data, ora_inizio, durata_ore, stato) "
+            "VALUES (?, 1, 1, ?, '09:00', ?, ?)",
+            [
+                (1, "2026-03-02", 3, "Programmato"),   # settimana 10
+                (2, "2026-03-04", 2, "Programmato"),   # settimana 10
+                (3, "2026-03-05", 8, "Annullato"),     # non conta
+                (4, "2026-03-10", 7, "Programmato"),   # settimana 11
+            ],
+        )
+        conn.executemany("INSERT INTO interventi_dipendenti VALUES (?, ?)",
+                         [(1, 1), (2, 1), (3, 1), (4, 1), (4, 2)])
+        # ricorrente lunedì e giovedì, 2 ore, Anna, solo a marzo
+        conn.execute("INSERT INTO interventi_ricorrenti(id, cliente_id, servizio_id, ora_inizio, durata_ore, "
+                     "data_inizio, data_fine) VALUES (1, 1, 1, '14:00', 2, '2026-03-01', '2026-03-31')")
+        conn.executemany("INSERT INTO interventi_ricorrenti_giorni VALUES (1, ?)", [(1,), (4,)])
+        conn.execute("INSERT INTO ricorrenti_dipendenti VALUES (1, 1)")
+        conn.commit()
+        invalida_tutto()
+
+    def test_ore_per_settimana_iso(self):
+        report = report_carichi(date(2026, 3, 2), date(2026, 3, 15))
+        self.assertEqual(report.settimane, [(2026, 10), (2026, 11)])
+
+        anna = next(r for r in report.righe if r.dipendente_id == 1)
+        luca = next(r for r in report.righe if r.dipendente_id == 2)
+        self.assertEqual(anna.ore, [3 + 2 + 2 * 2, 7 + 2 * 2])
+        self.assertEqual(luca.ore, [0.0, 7.0])
+
+        self.assertEqual(anna.stato(0), "ok")      # 9 su 10
+        self.assertEqual(anna.stato(1), "sopra")   # 11 su 10
+        self.assertEqual(luca.stato(1), "")        # nessun contratto
+
+    def test_settimane_in_cache_non_interrogano_gli_interventi(self):
+        report_carichi(date(2026, 3, 2), date(2026, 3, 15))
+
+        query = []
+        db.get_connection().set_trace_callback(query.append)
+        try:
+            report_carichi(date(2026, 3, 9), date(2026, 3, 15))
+        finally:
+            db.get_connection().set_trace_callback(None)
+        # solo l'elenco dipendenti (contratti sempre freschi)
+        self.assertFalse([q for q in query if "interventi" in q])
+
+    def test_scrittura_invalida_le_settimane(self):
+        report_carichi(date(2026, 3, 2), date(2026, 3, 15))
+        create_intervento({"cliente_id": 1, "servizio_id": 1, "data": "2026-03-11", "ora_inizio": "08:00",
+                           "durata_ore": 1, "dipendente_ids": [2]})
+
+        luca = next(r for r in report_carichi(date(2026, 3, 2), date(2026, 3, 15)).righe
+                    if r.dipendente_id == 2)
+        self.assertEqual(luca.ore, [0.0, 8.0])
+
+    def test_anno_con_molti_dipendenti(self):
+        conn = db.get_connection()
+        conn.executemany("INSERT INTO dipendenti(id, nome, cognome, ore_settimanali) VALUES (?, 'D', ?, 30)",
+                         [(i, f"N{i}") for i in range(10, 60)])
+        righe = [(100 + i, date.fromordinal(date(2026, 1, 1).toordinal() + i % 365).isoformat())
+                 for i in range(5000)]
+        conn.executemany("INSERT INTO interventi(id, cliente_id, servizio_id, data, ora_inizio, durata_ore) "
+                         "VALUES (?, 1, 1, ?, '09:00', 1.5)", righe)
+        conn.executemany("INSERT INTO interventi_dipendenti VALUES (?, ?)",
+                         [(i, 10 + i % 50) for i, _ in righe])
+        conn.commit()
+        invalida_tutto()
+
+        t0 = time.perf_counter()
+        report = report_carichi(date(2026, 1, 5), date(2027, 1, 3))
+        self.assertLess(time.perf_counter() - t0, 1.0)
+        self.assertEqual(len(report.settimane), len(settimane_periodo(date(2026, 1, 5), date(2027, 1, 3))))
+        self.assertEqual(len(report.righe), 52)
+
+
+if __name__ == "__main__":
+    unittest.main()
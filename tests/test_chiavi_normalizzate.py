@@ -0,0 +1,47 @@
+import unittest
+
+import database.database as db
+from database.index_advisor import spiega
+from database.migrations import migrate
+from models.cliente import Cliente
+from models.servizi import Servizio
+from services.normalizza import norm_nome
+from tests.base import DBTestCase
+
+
+class ChiaviNormalizzateTestCase(DBTestCase):
+    def test_norm_nome(self):
+        self.assertEqual(norm_nome("  Maria   De  ROSSI "), "maria de rossi")
+        self.assertEqual(norm_nome("STRASSE"), norm_nome("straße"))  # casefold, non lower
+        self.assertEqual(norm_nome(None), "")
+
+    def test_duplicato_cliente(self):
+        c = Cliente.create("Mario", "De  Rossi")
+        self.assertTrue(Cliente.esiste(" mario ", "de rossi"))
+        self.assertFalse(Cliente.esiste("Mario", "De Rossi", escludi_id=c.id))
+        self.assertFalse(Cliente.esiste("Maria", "De Rossi"))
+
+    def test_update_mantiene_la_chiave(self):
+        s = Servizio.create({"nome": "Uffici", "prezzo_mensile": 100})
+        Servizio.update(s.id, {"nome": "Vetrate", "prezzo_mensile": 100})
+        self.assertFalse(Servizio.esiste("uffici"))
+        self.assertTrue(Servizio.esiste("VETRATE"))
+
+    def test_migrazione_riempie_righe_esistenti(self):
+        conn = db.get_connection()
+        conn.execute("INSERT INTO clienti(nome, cognome) VALUES ('  Anna', 'BIANCHI ')")
+        conn.execute("PRAGMA user_version = 2")
+        conn.commit()
+
+        migrate()
+        row = conn.execute("SELECT nome_norm, cognome_norm FROM clienti").fetchone()
+        self.assertEqual(tuple(row), ("anna", "bianchi"))
+
+    def test_controllo_usa_indice(self):
+        piano = spiega(db.get_connection(),
+                       "SELECT 1 FROM clienti WHERE cognome_norm = ? AND nome_norm = ? AND id IS NOT ? LIMIT 1")
+        self.assertTrue(any("idx_clienti_norm" in d for d in piano), piano)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import unittest
+
+import database.database as db
+from gestione.cli import main
+from tests.base import DBTestCase
+
+RADICE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class CliTestCase(DBTestCase):
+    migra = False  # ci pensa la CLI (init_db o "migra")
+
+    def esegui(self, *argv) -> tuple[int, str]:
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(io.StringIO()):
+            codice = main(["--db", self.db_path, *argv])
+        return codice, out.getvalue()
+
+    def test_report_fatturazione_csv(self):
+        self.assertEqual(self.esegui("migra")[0], 0)
+        conn = db.get_connection()
+        conn.execute("INSERT INTO clienti(id, nome, cognome) VALUES (1, 'Mario', 'Rossi')")
+        conn.execute("INSERT INTO servizi(id, nome, prezzo_mensile) VALUES (1, 'Uffici', 250)")
+        conn.execute("INSERT INTO interventi(cliente_id, servizio_id, data, ora_inizio) "
+                     "VALUES (1, 1, '2026-02-10', '09:00')")
+        conn.commit()
+
+        codice, out = self.esegui("report", "fatturazione", "--mese", "2026-02", "--formato", "csv")
+        self.assertEqual(codice, 0)
+        # un singolo: un giorno su 28
+        self.assertEqual(out.splitlines(), ["Cliente,Servizi,Totale", "Mario Rossi,1,8.93"])
+
+    def test_non_importa_pyqt(self):
+        codice = ("import sys; from gestione.cli import main; "
+                  f"main(['--db', {self.db_path!r}, 'rinnova']); "
+                  "sys.exit('PyQt6' in sys.modules)")
+        esito = subprocess.run([sys.executable, "-c", codice], cwd=RADICE, capture_output=True)
+        self.assertEqual(esito.returncode, 0, esito.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
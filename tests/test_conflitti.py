@@ -0,0 +1,63 @@
+import time
+import unittest
+from dataclasses import replace
+from datetime import date, timedelta
+
+from services.conflitti import IndiceImpegni
+from tests.test_timeline import ANNA, LUCA, riga
+
+LUNEDI = date(2026, 3, 2)
+
+
+def ricorrente(id_ref, ora, durata_min, dipendenti):
+    return replace(riga(id_ref, ora, durata_min, dipendenti), tipo="RICORRENTE", stato="Attivo")
+
+
+class IndiceImpegniTestCase(unittest.TestCase):
+    def setUp(self):
+        # occorrenze già espanse, come in eventi_mese: il ricorrente 10 ogni lunedì alle 08:00
+        r10 = ricorrente(10, "08:00", 120, [ANNA])
+        self.eventi = {
+            LUNEDI: [r10, riga(1, "09:00", 60, [ANNA, LUCA])],
+            LUNEDI + timedelta(days=7): [r10],
+            LUNEDI + timedelta(days=1): [replace(riga(2, "09:00", 60, [LUCA]), stato="Annullato")],
+        }
+        self.indice = IndiceImpegni(self.eventi, LUNEDI, LUNEDI + timedelta(days=27))
+
+    def test_verifica_singolo(self):
+        conflitti = self.indice.verifica_singolo([1, 2], LUNEDI, 9 * 60 + 30, 30)
+        self.assertEqual(sorted((c.dipendente_id, c.secondo.riga.id_ref) for c in conflitti),
+                         [(1, 1), (1, 10), (2, 1)])
+
+        # che finisce esattamente quando inizia l'altro: nessun conflitto
+        self.assertEqual(self.indice.verifica_singolo([2], LUNEDI, 8 * 60, 60), [])
+        # in modifica l'intervento non confligge con se stesso; gli annullati non contano
+        self.assertEqual(self.indice.verifica_singolo([2], LUNEDI, 9 * 60, 60, ("SINGOLO", 1)), [])
+        self.assertEqual(self.indice.verifica_singolo([2], LUNEDI + timedelta(days=1), 9 * 60, 60), [])
+
+    def test_verifica_ricorrente_su_tutte_le_occorrenze(self):
+        conflitti = self.indice.verifica_ricorrente([1], [1], LUNEDI, None, 7 * 60, 90)
+        self.assertEqual([c.secondo.giorno for c in conflitti], [LUNEDI, LUNEDI + timedelta(days=7)])
+
+    def test_elenco_conflitti(self):
+        conflitti = self.indice.conflitti()
+        self.assertEqual(len(conflitti), 1)
+        c = conflitti[0]
+        self.assertEqual((c.dipendente_id, c.primo.riga.id_ref, c.secondo.riga.id_ref), (1, 10, 1))
+
+    def test_verifica_veloce_con_un_anno(self):
+        dipendenti = [(i, f"Dip {i}") for i in range(1, 41)]
+        eventi = {}
+        for g in range(365):
+            giorno = LUNEDI + timedelta(days=g)
+            eventi[giorno] = [riga(g * 300 + k, f"{6 + k % 14:02d}:{(k * 7) % 60:02d}", 60,
+                                   [dipendenti[k % 40]]) for k in range(300)]
+        indice = IndiceImpegni(eventi, LUNEDI, LUNEDI + timedelta(days=364))
+
+        t0 = time.perf_counter()
+        indice.verifica_ricorrente([d for d, _ in dipendenti[:3]], [1, 3, 5], None, None, 10 * 60, 120)
+        self.assertLess(time.perf_counter() - t0, 0.05)  # ~1 ms in pratica; margine per CI lente
+
+
+if __name__ == "__main__":
+    unittest.main()
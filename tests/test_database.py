@@ -0,0 +1,112 @@
+import os
+import sqlite3
+import threading
+import unittest
+
+import database.database as db
+from database.repositories.interventi_repo import create_intervento
+from tests.base import DBTestCase
+
+
+class ConnectionManagerTestCase(DBTestCase):
+    profilo = "desktop"
+
+    def test_wal_e_pragma_del_profilo(self):
+        conn = db.get_connection()
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+        self.assertEqual(conn.execute("PRAGMA foreign_keys").fetchone()[0], 1)
+
+    def test_profilo_configurabile(self):
+        db.configure(profilo="sicuro", cache_size=-1234)
+        conn = db.get_connection()
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 2)  # FULL
+        self.assertEqual(conn.execute("PRAGMA cache_size").fetchone()[0], -1234)
+
+    def test_una_connessione_per_thread(self):
+        main_conn = db.get_connection()
+        self.assertIs(db.get_connection(), main_conn)
+
+        other = []
+        t = threading.Thread(target=lambda: other.append(db.get_connection()))
+        t.start()
+        t.join()
+        self.assertIsNot(other[0], main_conn)
+
+    def test_lettore_non_bloccato_dallo_scrittore(self):
+        conn = db.get_connection()
+        conn.execute("INSERT INTO clienti(nome, cognome) VALUES ('Mario', 'Rossi')")
+        conn.commit()
+
+        # transazione di scrittura aperta e non ancora committata
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("INSERT INTO clienti(nome, cognome) VALUES ('Anna', 'Bianchi')")
+
+        with db.read_connection() as ro:
+            n = ro.execute("SELECT COUNT(*) FROM clienti").fetchone()[0]
+        self.assertEqual(n, 1)  # vede l'ultimo snapshot committato
+
+        conn.commit()
+        with db.read_connection() as ro:
+            self.assertEqual(ro.execute("SELECT COUNT(*) FROM clienti").fetchone()[0], 2)
+
+    def test_lettura_con_caratteri_speciali_nel_percorso(self):
+        # in un URI "file:" grezzo "#" apre il frammento e "%20" diventa uno spazio
+        db.configure(db_path=os.path.join(self.cartella, "dati #1 %20.db"))
+        db.init_db()
+        with db.read_connection() as ro:
+            self.assertEqual(ro.execute("SELECT COUNT(*) FROM clienti").fetchone()[0], 0)
+            self.assertRaises(sqlite3.OperationalError, ro.execute, "DELETE FROM clienti")
+
+
+class TransactionTestCase(DBTestCase):
+    def setUp(self):
+        super().setUp()
+
+        conn = db.get_connection()
+        conn.execute("INSERT INTO clienti(id, nome, cognome) VALUES (1, 'Mario', 'Rossi')")
+        conn.execute("INSERT INTO servizi(id, nome) VALUES (1, 'Uffici')")
+        conn.execute("INSERT INTO dipendenti(id, nome, cognome) VALUES (1, 'Luca', 'Verdi')")
+        conn.commit()
+
+    def _count(self, table):
+        return db.get_connection().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_savepoint_annidato(self):
+        with db.transaction() as conn:
+            conn.execute("INSERT INTO clienti(nome, cognome) VALUES ('A', 'A')")
+            try:
+                with db.transaction() as inner:
+                    inner.execute("INSERT INTO clienti(nome, cognome) VALUES ('B', 'B')")
+                    raise RuntimeError("annulla solo il livello interno")
+            except RuntimeError:
+                pass
+
+        self.assertEqual(self._count("clienti"), 2)
+        self.assertFalse(db.get_connection().in_transaction)
+
+    def test_errore_annulla_tutto(self):
+        with self.assertRaises(RuntimeError):
+            with db.transaction() as conn:
+                conn.execute("INSERT INTO clienti(nome, cognome) VALUES ('A', 'A')")
+                raise RuntimeError()
+        self.assertEqual(self._count("clienti"), 1)
+
+    def test_create_intervento_atomico(self):
+        dati = {
+            "cliente_id": 1, "servizio_id": 1, "data": "2026-01-10",
+            "ora_inizio": "09:00", "durata_ore": 1.0,
+        }
+
+        riga = create_intervento(dict(dati, dipendente_ids=[1]))
+        self.assertEqual(riga.dipendente_ids, (1,))
+
+        # dipendente inesistente: FK violata -> né intervento né link
+        with self.assertRaises(Exception):
+            create_intervento(dict(dati, dipendente_ids=[1, 999]))
+        self.assertEqual(self._count("interventi"), 1)
+        self.assertEqual(self._count("interventi_dipendenti"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import io
+import json
+import tracemalloc
+import unittest
+from datetime import date
+
+import database.database as db
+from services.cache_calendario import invalida_tutto
+from services.esporta import esporta
+from services.importa import importa
+from tests.base import DBTestCase
+
+
+class EsportaTestCase(DBTestCase):
+    def setUp(self):
+        super().setUp()
+
+        conn = db.get_connection()
+        conn.execute("INSERT INTO clienti(id, nome, cognome, nome_norm, cognome_norm) "
+                     "VALUES (1, 'Mario', 'Rossi', 'mario', 'rossi')")
+        conn.execute("INSERT INTO servizi(id, nome) VALUES (1, 'Uffici')")
+        conn.executemany("INSERT INTO dipendenti(id, nome, cognome) VALUES (?, ?, ?)",
+                         [(1, "Anna", "Bianchi"), (2, "Luca", "Verdi")])
+        conn.executemany("INSERT INTO interventi(id, cliente_id, servizio_id, data, ora_inizio) "
+                         "VALUES (?, 1, 1, ?, ?)",
+                         [(1, "2026-03-03", "10:00"), (2, "2026-03-02", "09:00"), (3, "2026-04-01", "08:00")])
+        conn.executemany("INSERT INTO interventi_dipendenti VALUES (?, ?)", [(1, 1), (1, 2), (2, 2)])
+        # ricorrente il lunedì, di Anna
+        conn.execute("INSERT INTO interventi_ricorrenti(id, cliente_id, servizio_id, ora_inizio, durata_ore) "
+                     "VALUES (1, 1, 1, '07:30', 1.5)")
+        conn.execute("INSERT INTO interventi_ricorrenti_giorni VALUES (1, 1)")
+        conn.execute("INSERT INTO ricorrenti_dipendenti VALUES (1, 1)")
+        conn.commit()
+        invalida_tutto()
+
+    def test_interventi_filtrati_in_ordine(self):
+        out = io.StringIO()
+        n = esporta("interventi", out, "jsonl", da=date(2026, 3, 1), a=date(2026, 3, 31))
+        righe = [json.loads(r) for r in out.getvalue().splitlines()]
+        self.assertEqual(n, 2)
+        self.assertEqual([r["id"] for r in righe], [2, 1])
+        self.assertEqual(righe[1]["dipendenti"], "Anna Bianchi, Luca Verdi")
+
+        out = io.StringIO()
+        esporta("interventi", out, "csv", dipendente_id=1)
+        self.assertEqual(len(out.getvalue().splitlines()), 2)  # intestazione + intervento 1
+
+    def test_occorrenze_per_dipendente(self):
+        out = io.StringIO()
+        esporta("occorrenze", out, "csv", da=date(2026, 3, 1), a=date(2026, 3, 31), dipendente_id=1)
+        righe = out.getvalue().splitlines()
+        self.assertEqual([r.split(",")[1] for r in righe[1:]],
+                         ["2026-03-02", "2026-03-09", "2026-03-16", "2026-03-23", "2026-03-30"])
+
+        out = io.StringIO()
+        self.assertEqual(esporta("occorrenze", out, da=date(2026, 3, 1), a=date(2026, 3, 31),
+                                 dipendente_id=2), 0)
+
+    def test_anagrafica_si_reimporta(self):
+        out = io.StringIO()
+        esporta("clienti", out)
+        with self.assertRaises(ValueError):
+            esporta("clienti", io.StringIO(), da=date(2026, 1, 1))
+
+        out.seek(0)
+        esito = importa("clienti", out)
+        self.assertEqual((esito.lette, esito.duplicate, esito.n_errori), (1, 1, 0))
+
+    def test_memoria_costante(self):
+        conn = db.get_connection()
+        conn.executemany("INSERT INTO interventi(cliente_id, servizio_id, data, ora_inizio, note) "
+                         "VALUES (1, 1, '2026-05-05', '09:00', ?)", [("x" * 200,) for _ in range(20_000)])
+        conn.commit()
+
+        class Scarta(io.TextIOBase):
+            def write(self, s):
+                return len(s)
+
+        tracemalloc.start()
+        try:
+            n = esporta("interventi", Scarta(), "jsonl")
+            picco = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(n, 20_003)
+        self.assertLess(picco, 2_000_000)  # i dati esportati sono ~5 MB
+
+
+if __name__ == "__main__":
+    unittest.main()
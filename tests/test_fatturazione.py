@@ -0,0 +1,166 @@
+import time
+import unittest
+from datetime import date, timedelta
+
+import database.database as db
+from database.repositories.ricorrenti_repo import update_ricorrente
+from services.cache_calendario import invalida_tutto
+from services.fatturazione import (
+    calcola_mese, chiudi_mese, fatturazione_mese, periodi_attivi, quota_coperta, riapri_mese
+)
+from tests.base import DBTestCase
+
+OGGI = date(2026, 6, 15)
+
+
+class FatturazioneTestCase(DBTestCase):
+    def setUp(self):
+        super().setUp()
+
+        conn = db.get_connection()
+        conn.executemany("INSERT INTO clienti(id, nome, cognome) VALUES (?, ?, ?)",
+                         [(1, "Mario", "Rossi"), (2, "Carla", "Neri")])
+        conn.executemany("INSERT INTO servizi(id, nome, prezzo_mensile) VALUES (?, ?, ?)",
+                         [(1, "Uffici", 300.0), (2, "Vetri", 90.0)])
+        # Rossi: uffici da metà aprile (16-30 = metà mese), due regole sovrapposte contano una volta
+        conn.executemany(
+            "INSERT INTO interventi_ricorrenti(id, cliente_id, servizio_id, ora_inizio, data_inizio, data_fine) "
+            "VALUES (?, 1, 1, '08:00', ?, ?)",
+            [(1, "2026-04-16", None), (2, "2026-04-20", "2026-05-10")],
+        )
+        conn.executemany(
+            "INSERT INTO interventi(cliente_id, servizio_id, data, ora_inizio, stato) VALUES (?, ?, ?, '10:00', ?)",
+            [
+                (1, 1, "2026-04-20", "Programmato"),   # giorno già coperto dal ricorrente uffici
+                (2, 2, "2026-04-07", "Completato"),    # Neri: vetri, due giorni su trenta
+                (2, 2, "2026-04-21", "Programmato"),
+                (2, 1, "2026-04-22", "Annullato"),     # non si fattura
+            ],
+        )
+        conn.commit()
+        invalida_tutto()
+
+    def test_quota_coperta_unione_dei_periodi(self):
+        primo, ultimo = date(2026, 4, 1), date(2026, 4, 30)
+        self.assertEqual(quota_coperta([(None, None)], primo, ultimo), 1.0)
+        self.assertEqual(quota_coperta([("2026-04-16", None), ("2026-04-20", "2026-05-10")], primo, ultimo), 0.5)
+        self.assertEqual(quota_coperta([(None, "2026-04-03"), ("2026-04-28", None)], primo, ultimo), 0.2)
+
+    def test_righe_per_cliente_e_servizio(self):
+        righe = {(r.cliente_id, r.servizio_id): r for r in calcola_mese(2026, 4)}
+        self.assertEqual(set(righe), {(1, 1), (2, 2)})
+
+        self.assertEqual(righe[(1, 1)].quota, 0.5)
+        self.assertEqual(righe[(1, 1)].importo, 150.0)
+        self.assertEqual((righe[(2, 2)].quota, righe[(2, 2)].importo), (0.0667, 6.0))
+        self.assertEqual(righe[(2, 2)].n_singoli, 2)
+
+        # da maggio Rossi paga il mese intero
+        self.assertEqual([r.importo for r in calcola_mese(2026, 5)], [300.0])
+
+    def test_mese_chiuso_non_si_ricalcola(self):
+        with self.assertRaises(ValueError):
+            chiudi_mese(2026, 6, oggi=OGGI)
+
+        chiuso = chiudi_mese(2026, 4, oggi=OGGI)
+        self.assertTrue(chiuso.chiuso)
+        self.assertEqual(chiuso.totale, 156.0)
+        self.assertEqual([f.cliente for f in chiuso.fatture()], ["Carla Neri", "Mario Rossi"])
+
+        # cambia il prezzo: il mese chiuso resta com'era, quello aperto no
+        conn = db.get_connection()
+        conn.execute("UPDATE servizi SET prezzo_mensile = 400 WHERE id = 1")
+        conn.commit()
+        self.assertEqual(fatturazione_mese(2026, 4).totale, 156.0)
+        self.assertEqual(fatturazione_mese(2026, 5).totale, 400.0)
+
+        self.assertTrue(riapri_mese(2026, 4))
+        self.assertEqual(fatturazione_mese(2026, 4).totale, 206.0)
+
+    def test_singoli_fuori_dal_ricorrente(self):
+        # un singolo prima dell'inizio della regola aggiunge il suo giorno alla quota
+        conn = db.get_connection()
+        conn.execute("INSERT INTO interventi(cliente_id, servizio_id, data, ora_inizio) "
+                     "VALUES (1, 1, '2026-04-02', '10:00')")
+        conn.commit()
+        riga = next(r for r in calcola_mese(2026, 4) if r.cliente_id == 1)
+        self.assertEqual((riga.quota, riga.importo, riga.n_singoli), (0.5333, 160.0, 2))
+
+    def test_regola_sospesa_fatturata_nei_mesi_in_cui_era_attiva(self):
+        conn = db.get_connection()
+        conn.execute("INSERT INTO interventi_ricorrenti(id, cliente_id, servizio_id, ora_inizio, data_inizio) "
+                     "VALUES (3, 2, 1, '08:00', '2026-04-01')")
+        conn.commit()
+        chiuso = chiudi_mese(2026, 4, oggi=OGGI)
+        self.assertEqual(chiuso.totale, 456.0)
+
+        # sospesa dal 5 maggio: aprile intero, maggio fino al 4, giugno niente
+        conn.execute("UPDATE interventi_ricorrenti SET attivo = 0 WHERE id = 3")
+        conn.execute("INSERT INTO ricorrenti_sospensioni(ricorrente_id, dal) VALUES (3, '2026-05-05')")
+        conn.commit()
+        self.assertTrue(riapri_mese(2026, 4))
+        self.assertEqual(chiudi_mese(2026, 4, oggi=OGGI).totale, 456.0)
+        maggio = {(r.cliente_id, r.servizio_id): r.importo for r in calcola_mese(2026, 5)}
+        self.assertEqual(maggio[(2, 1)], round(300 * 4 / 31, 2))
+        self.assertNotIn((2, 1), {(r.cliente_id, r.servizio_id) for r in calcola_mese(2026, 6)})
+
+    def test_periodi_attivi_senza_le_sospensioni(self):
+        primo, ultimo = date(2026, 5, 1), date(2026, 5, 31)
+        self.assertEqual(periodi_attivi("2026-04-01", None, [], primo, ultimo), [("2026-05-01", "2026-05-31")])
+        self.assertEqual(periodi_attivi("2026-04-01", None, [("2026-05-05", "2026-05-20")], primo, ultimo),
+                         [("2026-05-01", "2026-05-04"), ("2026-05-21", "2026-05-31")])
+        self.assertEqual(periodi_attivi(None, "2026-05-10", [("2026-04-01", "2026-05-02"), ("2026-05-08", None)],
+                                        primo, ultimo), [("2026-05-03", "2026-05-07")])
+        self.assertEqual(periodi_attivi("2026-04-01", None, [(None, None)], primo, ultimo), [])
+
+    def test_riattivazione_non_fattura_i_giorni_sospesi(self):
+        dati = {"cliente_id": 1, "servizio_id": 1, "ora_inizio": "08:00", "data_inizio": "2026-04-16",
+                "giorni_settimana": [1], "dipendente_ids": []}
+        conn = db.get_connection()
+        sql = "SELECT dal, al FROM ricorrenti_sospensioni WHERE ricorrente_id = 1"
+
+        update_ricorrente(1, dict(dati, attivo=0))
+        oggi = date.today()
+        self.assertEqual([tuple(r) for r in conn.execute(sql)], [(oggi.isoformat(), None)])
+        update_ricorrente(1, dict(dati, attivo=1))
+        self.assertEqual([tuple(r) for r in conn.execute(sql)], [])   # riattivata in giornata
+
+        # sospesa dal 5 maggio e riattivata: il periodo si chiude a ieri e resta registrato
+        conn.execute("UPDATE interventi_ricorrenti SET attivo = 0 WHERE id = 1")
+        conn.execute("INSERT INTO ricorrenti_sospensioni VALUES (1, '2026-05-05', NULL)")
+        conn.commit()
+        update_ricorrente(1, dict(dati, attivo=1))
+        ieri = (oggi - timedelta(days=1)).isoformat()
+        self.assertEqual([tuple(r) for r in conn.execute(sql)], [("2026-05-05", ieri)])
+
+        # riattivata il 20 maggio: maggio resta scontato dei 15 giorni sospesi
+        conn.execute("UPDATE ricorrenti_sospensioni SET al = '2026-05-19'")
+        conn.execute("DELETE FROM interventi_ricorrenti WHERE id = 2")
+        conn.commit()
+        maggio = {(r.cliente_id, r.servizio_id): r.importo for r in calcola_mese(2026, 5)}
+        self.assertEqual(maggio[(1, 1)], round(300 * 16 / 31, 2))
+        self.assertEqual([r.importo for r in calcola_mese(2026, 6) if r.cliente_id == 1], [300.0])
+
+    def test_chiusura_di_migliaia_di_clienti(self):
+        conn = db.get_connection()
+        conn.executemany("INSERT INTO clienti(id, nome, cognome) VALUES (?, 'C', ?)",
+                         [(i, f"N{i}") for i in range(10, 3010)])
+        conn.executemany(
+            "INSERT INTO interventi_ricorrenti(cliente_id, servizio_id, ora_inizio, data_inizio) "
+            "VALUES (?, ?, '08:00', ?)",
+            [(i, 1 + i % 2, f"2026-03-{1 + i % 28:02d}") for i in range(10, 3010)],
+        )
+        conn.executemany(
+            "INSERT INTO interventi(cliente_id, servizio_id, data, ora_inizio) VALUES (?, 2, ?, '09:00')",
+            [(i, f"2026-03-{1 + i % 28:02d}") for i in range(10, 3010, 3)],
+        )
+        conn.commit()
+
+        t0 = time.perf_counter()
+        chiuso = chiudi_mese(2026, 3, oggi=OGGI)
+        self.assertLess(time.perf_counter() - t0, 2.0)
+        self.assertEqual(len(chiuso.fatture()), 3000)
+
+
+if __name__ == "__main__":
+    unittest.main()
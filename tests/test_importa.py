@@ -0,0 +1,75 @@
+import io
+import time
+import unittest
+
+import database.database as db
+from models.cliente import Cliente
+from services.importa import importa
+from tests.base import DBTestCase
+
+
+class ImportaTestCase(DBTestCase):
+    def setUp(self):
+        super().setUp()
+        Cliente.create("Mario", "Rossi")
+
+    def test_duplicati_ed_errori_per_riga(self):
+        testo = (
+            "Nome;Cognome;Telefono\n"
+            "Carla;Neri;333\n"
+            "  mario ;ROSSI;\n"        # già nel DB (stessa chiave normalizzata)
+            ";Bianchi;\n"              # riga 4: nome mancante
+            "carla;neri;\n"            # doppione nel file
+            "\n"
+            "Luca;Verdi;\n"
+        )
+        esito = importa("clienti", io.StringIO(testo), lotto=1)
+
+        self.assertEqual((esito.lette, esito.inserite, esito.duplicate, esito.n_errori), (5, 2, 2, 1))
+        self.assertEqual(esito.errori, [(4, "campi obbligatori mancanti: nome")])
+        self.assertEqual(sorted(c.cognome for c in Cliente.all()), ["Neri", "Rossi", "Verdi"])
+        self.assertTrue(Cliente.esiste("carla", "NERI"))
+
+    def test_conversioni_dipendenti(self):
+        testo = (
+            "nome,cognome,ore settimanali,stipendio,scadenza_contratto\n"
+            "Anna,Bianchi,30,\"1250,50\",31/12/2026\n"
+            "Luca,Verdi,trenta,,\n"
+        )
+        esito = importa("dipendenti", io.StringIO(testo))
+        self.assertEqual(esito.inserite, 1)
+        self.assertEqual(esito.errori[0][0], 3)
+        self.assertTrue(esito.errori[0][1].startswith("ore_settimanali"))
+
+        r = db.get_connection().execute(
+            "SELECT ore_settimanali, stipendio, scadenza_contratto FROM dipendenti").fetchone()
+        self.assertEqual(tuple(r), (30, 1250.5, "2026-12-31"))
+
+    def test_servizi_prezzo_obbligatorio(self):
+        testo = (
+            "nome;prezzo_mensile;durata_default_ore\n"
+            "Uffici;120,00;2\n"
+            "Vetri;;1\n"               # riga 3: prezzo mancante
+            "Scale;0;1\n"              # riga 4: prezzo non positivo
+            "uffici;90;\n"             # doppione nel file
+        )
+        esito = importa("servizi", io.StringIO(testo), lotto=2)
+
+        self.assertEqual((esito.lette, esito.inserite, esito.duplicate, esito.n_errori), (4, 1, 1, 2))
+        self.assertEqual(esito.errori, [(3, "campi obbligatori mancanti: prezzo_mensile"),
+                                        (4, "prezzo_mensile: deve essere > 0")])
+        r = db.get_connection().execute("SELECT nome, prezzo_mensile FROM servizi").fetchall()
+        self.assertEqual([tuple(x) for x in r], [("Uffici", 120.0)])
+
+    def test_centomila_righe(self):
+        testo = io.StringIO("nome,cognome,email\n" + "".join(
+            f"Nome{i},Cognome{i},n{i}@esempio.it\n" for i in range(100_000)))
+
+        t0 = time.perf_counter()
+        esito = importa("clienti", testo, lotto=5000)
+        self.assertLess(time.perf_counter() - t0, 10.0)
+        self.assertEqual(esito.inserite, 100_000)
+
+
+if __name__ == "__main__":
+    unittest.main()
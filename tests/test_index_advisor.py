@@ -0,0 +1,36 @@
+import unittest
+
+import database.database as db
+from database.index_advisor import analizza, spiega
+from models.dipendenti import Dipendente
+from tests.base import DBTestCase
+
+
+class IndexAdvisorTestCase(DBTestCase):
+    def test_nessuna_scansione_sulle_query_registrate(self):
+        esiti = analizza()
+        self.assertTrue(esiti)
+        self.assertEqual([(e.nome, e.scansioni) for e in esiti if not e.ok], [])
+
+    def test_lookup_inverso_usa_indice(self):
+        piano = spiega(db.get_connection(),
+                       "SELECT 1 FROM interventi_dipendenti WHERE dipendente_id = ? LIMIT 1")
+        self.assertTrue(any("idx_interventi_dipendenti_dip" in d for d in piano), piano)
+
+    def test_in_uso(self):
+        conn = db.get_connection()
+        conn.execute("INSERT INTO clienti(id, nome, cognome) VALUES (1, 'Mario', 'Rossi')")
+        conn.execute("INSERT INTO servizi(id, nome) VALUES (1, 'Uffici')")
+        conn.execute("INSERT INTO dipendenti(id, nome, cognome) VALUES (1, 'Luca', 'Verdi')")
+        conn.execute("INSERT INTO dipendenti(id, nome, cognome) VALUES (2, 'Anna', 'Neri')")
+        conn.execute("INSERT INTO interventi_ricorrenti(id, cliente_id, servizio_id, ora_inizio) "
+                     "VALUES (1, 1, 1, '09:00')")
+        conn.execute("INSERT INTO ricorrenti_dipendenti(ricorrente_id, dipendente_id) VALUES (1, 1)")
+        conn.commit()
+
+        self.assertEqual(Dipendente.in_uso(1), "ricorrente")
+        self.assertIsNone(Dipendente.in_uso(2))
+
+
+if __name__ == "__main__":
+    unittest.main()
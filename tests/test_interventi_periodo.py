@@ -0,0 +1,76 @@
+import unittest
+
+import database.database as db
+from database.repositories.interventi_repo import (
+    get_interventi_misti, get_interventi_pagina, get_interventi_periodo
+)
+from tests.base import DBTemporaneo
+
+
+class InterventiPeriodoTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # un solo DB per tutta la classe: i test leggono soltanto
+        cls.db_temporaneo = DBTemporaneo()
+
+        conn = db.get_connection()
+        conn.execute("INSERT INTO clienti(id, nome, cognome) VALUES (1, 'Mario', 'Rossi')")
+        conn.execute("INSERT INTO clienti(id, nome, cognome) VALUES (2, 'Anna', 'Bianchi')")
+        conn.execute("INSERT INTO servizi(id, nome) VALUES (1, 'Uffici')")
+        conn.execute("INSERT INTO dipendenti(id, nome, cognome) VALUES (1, 'Luca', 'Verdi')")
+        conn.executemany(
+            "INSERT INTO interventi(id, cliente_id, servizio_id, data, ora_inizio, durata_ore) VALUES (?, ?, 1, ?, '09:00', 2)",
+            [(1, 1, "2026-01-10"), (2, 2, "2026-02-03"), (3, 1, "2025-12-31")],
+        )
+        conn.execute("INSERT INTO interventi_dipendenti VALUES (2, 1)")
+        conn.executemany(
+            "INSERT INTO interventi_ricorrenti(id, cliente_id, servizio_id, ora_inizio, data_inizio, data_fine) VALUES (?, 1, 1, '08:00', ?, ?)",
+            [(1, "2026-01-01", "2026-12-31"), (2, "2025-01-01", "2025-12-31"), (3, None, None)],
+        )
+        conn.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.db_temporaneo.chiudi()
+
+    def _ids(self, rows, tipo):
+        return sorted(r.id_ref for r in rows if r.tipo == tipo)
+
+    def test_solo_righe_del_periodo(self):
+        rows = get_interventi_periodo("2026-01-01", "2026-01-31")
+        self.assertEqual(self._ids(rows, "SINGOLO"), [1])
+        self.assertEqual(self._ids(rows, "RICORRENTE"), [1, 3])
+
+    def test_filtro_dipendente(self):
+        rows = get_interventi_periodo("2026-01-01", "2026-12-31", dipendente_id=1)
+        self.assertEqual(self._ids(rows, "SINGOLO"), [2])
+        self.assertEqual(self._ids(rows, "RICORRENTE"), [])
+
+    def test_righe_strutturate(self):
+        rows = get_interventi_periodo("2026-02-01", "2026-02-28", cliente_id=2)
+        self.assertEqual(len(rows), 1)
+        riga = rows[0]
+        self.assertEqual(riga.cliente, "Anna Bianchi")
+        self.assertEqual(riga.durata_min, 120)
+        self.assertEqual(riga.dipendente_ids, (1,))
+        self.assertEqual(riga.dipendenti, ("Luca Verdi",))
+
+    def test_paginazione_keyset(self):
+        attese = [(r.tipo, r.id_ref) for r in get_interventi_misti()]
+
+        lette = []
+        pagina = get_interventi_pagina(None, 2)
+        while pagina:
+            lette.extend((r.tipo, r.id_ref) for r in pagina)
+            pagina = get_interventi_pagina(pagina[-1], 2)
+
+        self.assertEqual(lette, attese)
+        self.assertEqual(len(lette), 6)
+
+    def test_filtro_cliente(self):
+        rows = get_interventi_periodo("2025-01-01", "2026-12-31", cliente_id=2)
+        self.assertEqual(self._ids(rows, "SINGOLO"), [2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import sqlite3
+import unittest
+
+import database.database as db
+from database.migrations import migrate, ultima_versione, versione_corrente
+from tests.base import DBTestCase
+
+
+class MigrationsTestCase(DBTestCase):
+    migra = False
+
+    def test_db_nuovo_arriva_all_ultima_versione(self):
+        applicate = migrate()
+        self.assertEqual(applicate[-1], ultima_versione())
+        self.assertEqual(versione_corrente(), ultima_versione())
+
+    def test_seconda_esecuzione_non_fa_nulla(self):
+        migrate()
+        self.assertEqual(migrate(), [])
+
+    def test_db_esistente_senza_versione(self):
+        # DB creato prima delle migrazioni: tabelle presenti, user_version = 0
+        legacy = sqlite3.connect(self.db_path)
+        legacy.execute("CREATE TABLE clienti (id INTEGER PRIMARY KEY AUTOINCREMENT, nome TEXT NOT NULL, cognome TEXT NOT NULL, telefono TEXT, indirizzo TEXT, email TEXT)")
+        legacy.execute("INSERT INTO clienti(nome, cognome) VALUES ('Mario', 'Rossi')")
+        legacy.commit()
+        legacy.close()
+
+        migrate()
+        conn = db.get_connection()
+        self.assertEqual(versione_corrente(), ultima_versione())
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM clienti").fetchone()[0], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+import database.database as db
+from database.repositories.ricerca_repo import cerca, query_fts
+from models.cliente import Cliente
+from tests.base import DBTestCase
+
+
+class RicercaTestCase(DBTestCase):
+    def setUp(self):
+        super().setUp()
+
+        conn = db.get_connection()
+        conn.execute("INSERT INTO clienti(id, nome, cognome, indirizzo) VALUES (1, 'Mario', 'Rossi', 'Via Garibaldi 3')")
+        conn.execute("INSERT INTO dipendenti(id, nome, cognome, mansione) VALUES (1, 'Luca', 'Verdi', 'Vetri')")
+        conn.execute("INSERT INTO servizi(id, nome, descrizione) VALUES (1, 'Uffici', 'Pulizia scrivanie')")
+        conn.execute("INSERT INTO interventi(id, cliente_id, servizio_id, data, ora_inizio, note) "
+                     "VALUES (7, 1, 1, '2026-01-10', '09:00', 'portare chiavi cantina')")
+        conn.commit()
+
+    def _trovati(self, testo):
+        return [(r.tipo, r.id) for r in cerca(testo)]
+
+    def test_query_fts_neutralizza_sintassi(self):
+        self.assertEqual(query_fts('mar "ros* OR'), '"mar"* "ros"* "OR"*')
+        self.assertEqual(cerca("  ***  "), [])
+
+    def test_prefisso_su_tutte_le_entita(self):
+        self.assertEqual(self._trovati("ross"), [("cliente", 1)])
+        self.assertEqual(self._trovati("garib"), [("cliente", 1)])
+        self.assertEqual(self._trovati("vetr"), [("dipendente", 1)])
+        self.assertEqual(self._trovati("scriv"), [("servizio", 1)])
+        self.assertEqual(self._trovati("cantin"), [("intervento", 7)])
+
+    def test_trigger_mantengono_l_indice(self):
+        c = Cliente.get(1)
+        c.cognome = "Bianchi"
+        c.update()
+        self.assertEqual(self._trovati("ross"), [])
+        self.assertEqual(self._trovati("bianc"), [("cliente", 1)])
+
+        conn = db.get_connection()
+        conn.execute("DELETE FROM interventi WHERE id = 7")
+        conn.commit()
+        self.assertEqual(self._trovati("cantin"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+from datetime import date
+
+from services.ricorrenze import (
+    CacheOccorrenze, Regola, espandi, giorni_da_maschera, maschera_da_giorni
+)
+
+
+class RicorrenzeTestCase(unittest.TestCase):
+    def test_maschera(self):
+        m = maschera_da_giorni([1, 3, 7, 3])
+        self.assertEqual(m, 0b1000101)
+        self.assertEqual(giorni_da_maschera(m), [1, 3, 7])
+
+    def test_espandi_lun_mer(self):
+        # gennaio 2026: il 1° è giovedì
+        regola = Regola.crea(1, [1, 3])
+        dates = espandi(regola, date(2026, 1, 1), date(2026, 1, 14))
+        self.assertEqual(dates, [date(2026, 1, 5), date(2026, 1, 7), date(2026, 1, 12), date(2026, 1, 14)])
+
+    def test_espandi_rispetta_periodo_regola(self):
+        regola = Regola.crea(1, range(1, 8), "2026-01-10", "2026-01-12")
+        dates = espandi(regola, date(2026, 1, 1), date(2026, 1, 31))
+        self.assertEqual(dates, [date(2026, 1, 10), date(2026, 1, 11), date(2026, 1, 12)])
+
+    def test_regola_sospesa_o_senza_giorni(self):
+        self.assertEqual(espandi(Regola.crea(1, [1], attivo=0), date(2026, 1, 1), date(2026, 1, 31)), [])
+        self.assertEqual(espandi(Regola.crea(1, []), date(2026, 1, 1), date(2026, 1, 31)), [])
+
+    def test_cache_invalidata(self):
+        cache = CacheOccorrenze()
+        da, a = date(2026, 1, 1), date(2026, 1, 31)
+        first = cache.occorrenze(Regola.crea(5, [1]), da, a)
+        self.assertIs(cache.occorrenze(Regola.crea(5, [1]), da, a), first)
+
+        cache.invalida(5)
+        self.assertEqual(len(cache), 0)
+        second = cache.occorrenze(Regola.crea(5, [2]), da, a)
+        self.assertEqual(second[0], date(2026, 1, 6))
+
+    def test_stesso_id_regola_diversa_senza_invalidare(self):
+        # es. la regola 5 di un altro file DB: nessuno ha chiamato invalida()
+        cache = CacheOccorrenze()
+        da, a = date(2026, 1, 1), date(2026, 1, 31)
+        cache.occorrenze(Regola.crea(5, [1]), da, a)
+        self.assertEqual(cache.occorrenze(Regola.crea(5, [2]), da, a)[0], date(2026, 1, 6))
+        self.assertEqual(cache.occorrenze(Regola.crea(5, [1], "2026-01-20"), da, a), (date(2026, 1, 26),))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from datetime import date
+
+from database.repositories.interventi_repo import RigaIntervento
+from services.timeline import MINUTI_GIORNO, NON_ASSEGNATO, calcola_layout
+
+
+def riga(id_ref, ora, durata_min, dipendenti=()):
+    return RigaIntervento(
+        id_ref=id_ref, tipo="SINGOLO", cliente_id=1, cliente_nome="Mario", cliente_cognome="Rossi",
+        servizio_id=1, servizio="Uffici", ora=ora, durata_min=durata_min, stato="Programmato",
+        dipendente_ids=tuple(i for i, _ in dipendenti), dipendenti=tuple(n for _, n in dipendenti),
+    )
+
+
+ANNA = (1, "Anna Bianchi")
+LUCA = (2, "Luca Verdi")
+LUNEDI = date(2026, 3, 2)
+
+
+class TimelineLayoutTestCase(unittest.TestCase):
+    def test_sovrapposti_su_sottorighe_diverse_e_riuso(self):
+        eventi = {LUNEDI: [
+            riga(1, "08:00", 120, [ANNA]),
+            riga(2, "09:00", 60, [ANNA]),   # si sovrappone al primo
+            riga(3, "10:00", 60, [ANNA]),   # il primo finisce alle 10:00: riusa la sotto-riga 0
+            riga(4, "10:30", 30, [ANNA]),   # la 0 è di nuovo occupata, la 1 è libera dalle 10:00
+        ]}
+        layout = calcola_layout(eventi, LUNEDI)
+
+        self.assertEqual(layout.corsie, [ANNA])
+        self.assertEqual(layout.sottorighe, [2])
+        self.assertEqual({b.riga.id_ref: b.sottoriga for b in layout.blocchi}, {1: 0, 2: 1, 3: 0, 4: 1})
+
+    def test_corsie_per_dipendente_e_non_assegnati_in_fondo(self):
+        eventi = {LUNEDI: [
+            riga(1, "08:00", 60, [LUCA, ANNA]),
+            riga(2, "08:00", 60),
+        ]}
+        layout = calcola_layout(eventi, LUNEDI)
+
+        self.assertEqual(layout.corsie, [ANNA, LUCA, NON_ASSEGNATO])
+        self.assertEqual([b.corsia for b in layout.blocchi], [0, 1, 2])
+        self.assertEqual(layout.sottorighe, [1, 1, 1])
+
+    def test_settimana_minuti_dal_lunedi(self):
+        mercoledi = date(2026, 3, 4)
+        eventi = {
+            LUNEDI: [riga(1, "08:00", None, [ANNA])],
+            mercoledi: [riga(2, "08:00", 90, [ANNA])],
+            date(2026, 3, 9): [riga(3, "08:00", 60, [ANNA])],  # fuori settimana
+        }
+        layout = calcola_layout(eventi, LUNEDI, giorni=7)
+
+        self.assertEqual([(b.inizio, b.fine) for b in layout.blocchi], [
+            (8 * 60, 9 * 60),  # durata di default
+            (2 * MINUTI_GIORNO + 8 * 60, 2 * MINUTI_GIORNO + 9 * 60 + 30),
+        ])
+        self.assertEqual(layout.sottorighe, [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from windows import ui_cache
+
+
+class UiCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        ui_dir = self.tmp.name
+        cache_dir = os.path.join(ui_dir, "_compilati")
+        os.makedirs(cache_dir)
+        self.patch = mock.patch.multiple(
+            ui_cache, UI_DIR=ui_dir, CACHE_DIR=cache_dir,
+            MANIFEST=os.path.join(cache_dir, "manifest.json"),
+        )
+        self.patch.start()
+
+        self.ui_path = os.path.join(ui_dir, "prova.ui")
+        with open(self.ui_path, "w") as f:
+            f.write("<ui/>")
+        with open(os.path.join(cache_dir, "ui_prova.py"), "w") as f:
+            f.write("class Ui_Prova: pass\n")
+
+        st = os.stat(self.ui_path)
+        ui_cache._scrivi_manifest({"prova": {
+            "mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": ui_cache._sha256(self.ui_path),
+        }})
+
+    def tearDown(self):
+        self.patch.stop()
+        self.tmp.cleanup()
+
+    def test_valida_se_invariata(self):
+        self.assertTrue(ui_cache.cache_valida("prova"))
+
+    def test_mtime_cambiato_ma_stesso_contenuto(self):
+        os.utime(self.ui_path, ns=(1, 1))
+        self.assertTrue(ui_cache.cache_valida("prova"))
+        with open(ui_cache.MANIFEST) as f:
+            self.assertEqual(json.load(f)["prova"]["mtime_ns"], 1)
+
+    def test_contenuto_cambiato(self):
+        with open(self.ui_path, "w") as f:
+            f.write("<ui version='4.0'/>")
+        self.assertFalse(ui_cache.cache_valida("prova"))
+
+    def test_senza_manifest(self):
+        os.remove(ui_cache.MANIFEST)
+        self.assertFalse(ui_cache.cache_valida("prova"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,33 +1,90 @@
 from PyQt6.QtWidgets import QCalendarWidget
-from PyQt6.QtGui import QPainter, QColor
-from PyQt6.QtCore import QPoint
+from PyQt6.QtGui import QPainter, QColor, QBrush, QPen, QFont, QFontMetrics
+from PyQt6.QtCore import Qt
+
+from services.calendario import CELLE_GRIGLIA
+
 
 class BrillanceCalendar(QCalendarWidget):
+    """
+    Calendario con heat-map: ogni cella ha un'intensità di colore proporzionale alle ore
+    di lavoro del giorno e un badge col numero di interventi (rosso se ci sono conflitti).
+
+    I dati di disegno si preparano una volta per mese in setGriglia(), in liste indicizzate
+    per posizione nella griglia; paintCell fa solo accessi per indice e usa colori, pennelli
+    e font creati nel costruttore, così il ridimensionamento resta fluido.
+    """
+
+    LIVELLI = 5              # 0 = nessun intervento
+    ALFA_MAX = 120
+    ALTEZZA_BADGE = 14
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self._events_by_date = {}
 
-    def setEvents(self, events_by_date: dict):
-        self._events_by_date = events_by_date or {}
+        self._jd_inizio = 0  # giorno giuliano della prima cella
+        self._livelli = [0] * CELLE_GRIGLIA
+        self._testi = [""] * CELLE_GRIGLIA
+        self._larghezze = [0] * CELLE_GRIGLIA
+        self._conflitti = [False] * CELLE_GRIGLIA
+
+        base = QColor("#2563EB")
+        self._colori_livello = []
+        for n in range(self.LIVELLI):
+            c = QColor(base)
+            c.setAlpha(n * self.ALFA_MAX // (self.LIVELLI - 1))
+            self._colori_livello.append(c)
+
+        self._brush_badge = QBrush(QColor("#1D4ED8"))
+        self._brush_conflitto = QBrush(QColor("#DC2626"))
+        self._penna_testo = QPen(QColor("#FFFFFF"))
+        self._font_badge = QFont(self.font())
+        self._font_badge.setPointSizeF(max(self.font().pointSizeF() - 2, 7))
+        self._font_badge.setBold(True)
+        self._allinea = Qt.AlignmentFlag.AlignCenter
+
+    def setGriglia(self, griglia):
+        """griglia: services.calendario.GrigliaMese del mese mostrato."""
+        fm = QFontMetrics(self._font_badge)
+        self._jd_inizio = griglia.inizio.toordinal() + 1721425  # ordinale proleptico -> giorno giuliano
+
+        for i in range(CELLE_GRIGLIA):
+            n = griglia.conteggi[i]
+            if not n:
+                self._livelli[i] = 0
+                self._testi[i] = ""
+                continue
+            if griglia.max_minuti > 0:
+                livello = 1 + (griglia.minuti[i] * (self.LIVELLI - 1) - 1) // griglia.max_minuti
+            else:
+                livello = 1
+            self._livelli[i] = min(max(livello, 1), self.LIVELLI - 1)
+            self._testi[i] = str(n) if n < 100 else "99+"
+            self._larghezze[i] = max(fm.horizontalAdvance(self._testi[i]) + 8, self.ALTEZZA_BADGE)
+            self._conflitti[i] = griglia.conflitti[i]
+
         self.update()
 
     def paintCell(self, painter: QPainter, rect, date):
         # ✅ prima disegna la cella normale (numero incluso)
         super().paintCell(painter, rect, date)
 
-        evs = self._events_by_date.get(date, [])
-        if not evs:
+        i = date.toJulianDay() - self._jd_inizio
+        if i < 0 or i >= CELLE_GRIGLIA or not self._livelli[i]:
             return
 
+        x, y, w, h = rect.x(), rect.y(), rect.width(), rect.height()
         painter.save()
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing, True)
-
-        r = 4
-        cx = rect.center().x()
-        cy = rect.bottom() - 9  # un pelo più su
+        painter.fillRect(x, y, w, h, self._colori_livello[self._livelli[i]])
 
-        painter.setBrush(QColor("#2563EB"))
-        painter.setPen(QColor("#2563EB"))
-        painter.drawEllipse(QPoint(cx, cy), r, r)
+        bw = self._larghezze[i]
+        bx = x + w - bw - 3
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, True)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(self._brush_conflitto if self._conflitti[i] else self._brush_badge)
+        painter.drawRoundedRect(bx, y + 3, bw, self.ALTEZZA_BADGE, 7, 7)
 
+        painter.setFont(self._font_badge)
+        painter.setPen(self._penna_testo)
+        painter.drawText(bx, y + 3, bw, self.ALTEZZA_BADGE, self._allinea, self._testi[i])
         painter.restore()
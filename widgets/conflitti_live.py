@@ -0,0 +1,109 @@
+"""
+Verifica dei conflitti mentre si compila un dialog (InterventoDialog, RicorrenteDialog).
+
+L'indice degli impegni (services.conflitti) si costruisce in un worker quando serve un
+periodo nuovo; da lì in poi ogni modifica di dipendenti/orari è solo una verifica
+sull'indice (pochi millisecondi), fatta nel thread della GUI. Se si salva prima che
+l'indice arrivi, conflitti_prima_di_salvare() lo costruisce subito.
+"""
+from collections import defaultdict
+
+from PyQt6.QtCore import QObject, Qt
+from PyQt6.QtGui import QBrush, QColor
+from PyQt6.QtWidgets import QLabel, QListWidget
+
+from services.conflitti import indice_periodo
+
+CHIAVE = "conflitti"
+MAX_RIGHE = 5
+
+
+class ControlloConflitti(QObject):
+    """
+    verifica(indice, dipendente_ids, limite=None) -> list[Conflitto] descrive la proposta
+    del dialog.
+    Si controllano tutti i dipendenti della lista: quelli occupati vengono evidenziati
+    anche se non selezionati, così si vede subito chi è libero.
+    """
+
+    def __init__(self, lista: QListWidget, etichetta: QLabel, verifica, executor=None, parent=None):
+        super().__init__(parent)
+        self.lista = lista
+        self.etichetta = etichetta
+        self.verifica = verifica
+        self.executor = executor
+
+        self.indice = None
+        self.periodo = None  # (da, a) dell'ultimo indice chiesto
+        self.conflitti = []  # conflitti dei dipendenti selezionati
+        self._colore_libero = lista.palette().text()
+        self._colore_occupato = QBrush(QColor("#DC2626"))
+        self.etichetta.setWordWrap(True)
+
+    def carica(self, da, a):
+        if self.indice is not None and self.indice.copre(da, a):
+            self.aggiorna()
+            return
+
+        self.indice = None
+        self.periodo = (da, a)
+        self.etichetta.setText("Verifica conflitti in corso…")
+        if self.executor is None:
+            self._on_indice(indice_periodo(da, a))
+        else:
+            self.executor.submit(CHIAVE, indice_periodo, da, a, on_done=self._on_indice)
+
+    def conflitti_prima_di_salvare(self) -> list:
+        """
+        Conflitti dei dipendenti selezionati. Se l'indice del worker non è ancora arrivato
+        si costruisce qui, nel thread della GUI: salvare senza verifica farebbe passare
+        un doppio impegno.
+        """
+        if self.indice is None and self.periodo is not None:
+            self.chiudi()  # la richiesta in volo non serve più
+            self._on_indice(indice_periodo(*self.periodo))
+        return self.conflitti
+
+    def chiudi(self):
+        if self.executor is not None:
+            self.executor.annulla(CHIAVE)
+
+    def _on_indice(self, indice):
+        self.indice = indice
+        self.aggiorna()
+
+    def _dip_id(self, i: int):
+        return self.lista.item(i).data(Qt.ItemDataRole.UserRole)
+
+    def aggiorna(self):
+        if self.indice is None:
+            return
+
+        selezionati, altri = [], []
+        for i in range(self.lista.count()):
+            (selezionati if self.lista.item(i).isSelected() else altri).append(self._dip_id(i))
+
+        # elenco completo solo per i selezionati; per gli altri basta sapere se sono occupati
+        per_dip = defaultdict(list)
+        for c in self.verifica(self.indice, selezionati) + self.verifica(self.indice, altri, limite=1):
+            per_dip[c.dipendente_id].append(c)
+
+        self.conflitti = []
+        for i in range(self.lista.count()):
+            item = self.lista.item(i)
+            trovati = per_dip.get(self._dip_id(i), [])
+            item.setForeground(self._colore_occupato if trovati else self._colore_libero)
+            item.setToolTip("\n".join(c.descrizione() for c in trovati[:MAX_RIGHE]))
+            if item.isSelected():
+                self.conflitti.extend(trovati)
+
+        if not self.conflitti:
+            self.etichetta.setStyleSheet("color: #16A34A;")
+            self.etichetta.setText("Nessun conflitto")
+            return
+
+        righe = [c.descrizione() for c in self.conflitti[:MAX_RIGHE]]
+        if len(self.conflitti) > MAX_RIGHE:
+            righe.append(f"… altri {len(self.conflitti) - MAX_RIGHE}")
+        self.etichetta.setStyleSheet("color: #DC2626;")
+        self.etichetta.setText("\n".join(righe))
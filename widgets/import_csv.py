@@ -0,0 +1,45 @@
+"""
+Pulsante "Importa CSV…" per le sezioni clienti / dipendenti / servizi.
+L'import (services.importa) gira nel worker; alla fine si ricarica la tabella
+e si mostra il riepilogo con le prime righe scartate.
+"""
+from PyQt6.QtWidgets import QPushButton, QFileDialog, QMessageBox
+
+from services.importa import importa_file
+
+RIGHE_ERRORE_MOSTRATE = 15
+
+
+def aggiungi_pulsante_import(ui, dopo: QPushButton, entita: str, ricarica) -> QPushButton:
+    """Inserisce il pulsante accanto a `dopo`, con lo stesso stile; ricarica() al termine."""
+    btn = QPushButton("Importa CSV…")
+    btn.setStyleSheet(dopo.styleSheet())
+    layout = dopo.parent().layout()
+    layout.insertWidget(layout.indexOf(dopo) + 1, btn)
+    btn.clicked.connect(lambda: avvia_import(ui, btn, entita, ricarica))
+    return btn
+
+
+def avvia_import(ui, btn: QPushButton, entita: str, ricarica):
+    percorso, _ = QFileDialog.getOpenFileName(ui, f"Importa {entita}", "", "File CSV (*.csv);;Tutti i file (*)")
+    if not percorso:
+        return
+
+    def fatto(esito):
+        btn.setEnabled(True)
+        if esito.inserite:
+            ricarica()
+        testo = esito.riepilogo() + "."
+        if esito.errori:
+            righe = [f"riga {n}: {msg}" for n, msg in esito.errori[:RIGHE_ERRORE_MOSTRATE]]
+            if esito.n_errori > RIGHE_ERRORE_MOSTRATE:
+                righe.append(f"… e altre {esito.n_errori - RIGHE_ERRORE_MOSTRATE}")
+            testo += "\n\nRighe scartate:\n" + "\n".join(righe)
+        QMessageBox.information(ui, "Import completato", testo)
+
+    def errore(e):
+        btn.setEnabled(True)
+        QMessageBox.critical(ui, "Errore", f"Errore durante l'import:\n{e}")
+
+    btn.setEnabled(False)
+    ui.db_executor.submit(f"import_{entita}", importa_file, entita, percorso, on_done=fatto, on_error=errore)
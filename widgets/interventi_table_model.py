@@ -0,0 +1,253 @@
+from bisect import bisect_right
+from datetime import datetime, date
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+from database.repositories.interventi_repo import get_interventi_pagina
+from services.ricorrenze import GIORNI_MAP, giorni_da_maschera
+
+
+def format_giorni(maschera: int) -> str:
+    nums = giorni_da_maschera(maschera or 0)
+    return ", ".join(GIORNI_MAP[n] for n in nums) if nums else "-"
+
+
+def format_data(value) -> str:
+    if value is None:
+        return "-"
+
+    # se è già un date/datetime
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%d-%m-%Y")
+
+    s = str(value).strip()
+    if not s or s == "-":
+        return "-"
+
+    # prende solo la parte data se arriva "YYYY-MM-DD HH:MM:SS"
+    s = s[:10]
+
+    try:
+        return datetime.strptime(s, "%Y-%m-%d").strftime("%d-%m-%Y")
+    except ValueError:
+        return str(value)  # fallback
+
+
+def format_durata_hhmm(durata_min) -> str:
+    if durata_min is None:
+        return "-"
+
+    h = durata_min // 60
+    m = durata_min % 60
+    return f"{h:02d}:{m:02d}"
+
+
+def format_periodo(data_inizio, data_fine) -> str:
+    if not data_inizio and not data_fine:
+        return "-"
+
+    return f"{format_data(data_inizio)} → {format_data(data_fine)}"
+
+
+class InterventiTableModel(QAbstractTableModel):
+    """
+    Model "virtuale" per tableInterventi: le righe arrivano dal repository a pagine
+    (keyset) quando la view scorre (canFetchMore/fetchMore), e i testi vengono
+    formattati solo per le celle effettivamente disegnate.
+
+    Con un executor (windows.async_db.QueryExecutor) la pagina viene letta in un worker
+    e inserita quando arriva; nel frattempo canFetchMore() è False.
+    """
+
+    CHIAVE = "interventi_pagina"
+
+    COLONNE = [
+        "ID_REF", "TIPO", "Cliente", "Servizio", "Dipendenti",
+        "Data", "Ora", "Durata", "Giorni", "Stato", "Periodo"
+    ]
+
+    def __init__(self, parent=None, page_size: int = 200, executor=None):
+        super().__init__(parent)
+        self.page_size = page_size
+        self.executor = executor
+        self._rows = []          # list[RigaIntervento]
+        self._finito = False
+        self._in_attesa = False  # pagina richiesta al worker e non ancora arrivata
+
+    # ---------------- CARICAMENTO ----------------
+    def reload(self):
+        self._annulla_attesa()
+        self.beginResetModel()
+        self._rows = []
+        self._finito = False
+        self.endResetModel()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._finito and not self._in_attesa
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._finito or self._in_attesa:
+            return
+
+        dopo = self._rows[-1] if self._rows else None
+        if self.executor is None:
+            self._aggiungi_pagina(get_interventi_pagina(dopo, self.page_size))
+            return
+
+        self._in_attesa = True
+        self.executor.submit(self.CHIAVE, get_interventi_pagina, dopo, self.page_size,
+                             on_done=self._aggiungi_pagina)
+
+    def carica_pagina(self):
+        """Pagina successiva subito, nel thread corrente (es. per cercare una riga non ancora caricata)."""
+        self._annulla_attesa()
+        if not self._finito:
+            dopo = self._rows[-1] if self._rows else None
+            self._aggiungi_pagina(get_interventi_pagina(dopo, self.page_size))
+
+    def _annulla_attesa(self):
+        if self._in_attesa and self.executor is not None:
+            self.executor.annulla(self.CHIAVE)
+        self._in_attesa = False
+
+    def _aggiungi_pagina(self, pagina):
+        self._in_attesa = False
+        if len(pagina) < self.page_size:
+            self._finito = True
+        if not pagina:
+            return
+
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(pagina) - 1)
+        self._rows.extend(pagina)
+        self.endInsertRows()
+
+    @property
+    def finito(self) -> bool:
+        return self._finito
+
+    def riga(self, row: int):
+        if 0 <= row < len(self._rows):
+            return self._rows[row]
+        return None
+
+    # ---------------- AGGIORNAMENTI PUNTUALI ----------------
+    @staticmethod
+    def _chiave(r) -> tuple:
+        # stesso ordine di get_interventi_pagina: singoli (data DESC, ora, id), poi ricorrenti (ora, id)
+        if r.tipo == "SINGOLO":
+            try:
+                giorno = -date.fromisoformat(r.data).toordinal()
+            except (TypeError, ValueError):
+                giorno = 0
+            return 0, giorno, r.ora or "", r.id_ref
+        return 1, 0, r.ora or "", r.id_ref
+
+    def trova(self, tipo: str, id_ref: int, da: int = 0) -> int:
+        for i in range(da, len(self._rows)):
+            r = self._rows[i]
+            if r.id_ref == id_ref and r.tipo == tipo:
+                return i
+        return -1
+
+    def inserisci_riga(self, riga) -> int:
+        """
+        Inserisce la riga nella posizione ordinata. Se cade oltre l'ultima pagina caricata
+        non la aggiungo: arriverà con il prossimo fetchMore. Restituisce l'indice o -1.
+        """
+        pos = bisect_right(self._rows, self._chiave(riga), key=self._chiave)
+        if pos == len(self._rows) and not self._finito:
+            return -1
+
+        self.beginInsertRows(QModelIndex(), pos, pos)
+        self._rows.insert(pos, riga)
+        self.endInsertRows()
+        return pos
+
+    def rimuovi(self, tipo: str, id_ref: int):
+        i = self.trova(tipo, id_ref)
+        if i < 0:
+            return
+        self.beginRemoveRows(QModelIndex(), i, i)
+        del self._rows[i]
+        self.endRemoveRows()
+
+    def aggiorna_riga(self, riga) -> int:
+        i = self.trova(riga.tipo, riga.id_ref)
+        if i >= 0 and self._chiave(self._rows[i]) == self._chiave(riga):
+            # stessa posizione: basta ridisegnare la riga
+            self._rows[i] = riga
+            self._riga_cambiata(i)
+            return i
+
+        self.rimuovi(riga.tipo, riga.id_ref)
+        return self.inserisci_riga(riga)
+
+    def _riga_cambiata(self, i: int):
+        self.dataChanged.emit(self.index(i, 0), self.index(i, self.columnCount() - 1))
+
+    def aggiorna_cliente(self, cliente_id: int, nome: str, cognome: str):
+        for i, r in enumerate(self._rows):
+            if r.cliente_id == cliente_id:
+                r.cliente_nome = nome
+                r.cliente_cognome = cognome
+                self._riga_cambiata(i)
+
+    def aggiorna_servizio(self, servizio_id: int, nome: str):
+        for i, r in enumerate(self._rows):
+            if r.servizio_id == servizio_id:
+                r.servizio = nome
+                self._riga_cambiata(i)
+
+    def aggiorna_dipendente(self, dipendente_id: int, nome_completo: str):
+        for i, r in enumerate(self._rows):
+            if dipendente_id in r.dipendente_ids:
+                r.dipendenti = tuple(
+                    nome_completo if did == dipendente_id else nome
+                    for did, nome in zip(r.dipendente_ids, r.dipendenti)
+                )
+                self._riga_cambiata(i)
+
+    # ---------------- QAbstractTableModel ----------------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLONNE)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.COLONNE[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+
+        r = self._rows[index.row()]
+        col = index.column()
+        ricorrente = r.tipo == "RICORRENTE"
+
+        if col == 0:
+            return str(r.id_ref)
+        if col == 1:
+            return r.tipo
+        if col == 2:
+            return r.cliente
+        if col == 3:
+            return r.servizio
+        if col == 4:
+            return ", ".join(r.dipendenti) or "-"
+        if col == 5:
+            return "-" if ricorrente else format_data(r.data)
+        if col == 6:
+            return r.ora
+        if col == 7:
+            return format_durata_hhmm(r.durata_min)
+        if col == 8:
+            return format_giorni(r.maschera_giorni) if ricorrente else "-"
+        if col == 9:
+            return r.stato
+        if col == 10:
+            return format_periodo(r.data_inizio, r.data_fine) if ricorrente else "-"
+        return None
@@ -0,0 +1,77 @@
+"""
+Aggiornamento puntuale delle righe di una QTableWidget (colonna 0 = ID nascosto),
+usato dalle sezioni dopo create/update/delete al posto di un reload completo.
+"""
+from PyQt6.QtWidgets import QTableWidget
+
+
+def find_row_by_id(table: QTableWidget, record_id) -> int:
+    target = str(record_id)
+    for row in range(table.rowCount()):
+        item = table.item(row, 0)
+        if item is not None and item.text() == target:
+            return row
+    return -1
+
+
+def sorted_insert_position(table: QTableWidget, key: tuple, key_of_row) -> int:
+    """Ricerca binaria della posizione di `key` tra le righe (già ordinate secondo key_of_row)."""
+    lo, hi = 0, table.rowCount()
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if key_of_row(mid) <= key:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def upsert_row(table: QTableWidget, record_id, key: tuple, key_of_row, fill_row) -> int:
+    """
+    Inserisce o aggiorna la riga del record mantenendo l'ordinamento, la selezione
+    e la posizione di scroll. fill_row(row_idx) scrive le celle. Restituisce l'indice finale.
+    """
+    scroll = table.verticalScrollBar().value()
+    selected = table.currentRow()
+    selected_id = table.item(selected, 0).text() if selected >= 0 and table.item(selected, 0) else None
+
+    row = find_row_by_id(table, record_id)
+    if row >= 0:
+        # se la chiave di ordinamento non cambia, aggiorno le celle sul posto
+        prev_ok = row == 0 or key_of_row(row - 1) <= key
+        next_ok = row == table.rowCount() - 1 or key <= key_of_row(row + 1)
+        if prev_ok and next_ok:
+            fill_row(row)
+            table.verticalScrollBar().setValue(scroll)
+            return row
+        table.removeRow(row)
+
+    row = sorted_insert_position(table, key, key_of_row)
+    table.insertRow(row)
+    fill_row(row)
+
+    if selected_id is not None:
+        sel = find_row_by_id(table, selected_id)
+        if sel >= 0:
+            table.selectRow(sel)
+    table.verticalScrollBar().setValue(scroll)
+    return row
+
+
+def select_row_by_id(table: QTableWidget, record_id) -> bool:
+    """Seleziona e porta in vista la riga del record (es. risultato della ricerca)."""
+    row = find_row_by_id(table, record_id)
+    if row < 0:
+        return False
+    table.selectRow(row)
+    table.scrollToItem(table.item(row, 0), QTableWidget.ScrollHint.PositionAtCenter)
+    return True
+
+
+def remove_row(table: QTableWidget, record_id):
+    scroll = table.verticalScrollBar().value()
+    row = find_row_by_id(table, record_id)
+    if row >= 0:
+        table.removeRow(row)
+    table.clearSelection()
+    table.verticalScrollBar().setValue(scroll)
@@ -0,0 +1,190 @@
+from bisect import bisect_right
+from datetime import date
+
+from PyQt6.QtCore import Qt, QPointF, QRectF, QEvent, pyqtSignal
+from PyQt6.QtGui import QPainter, QColor, QPen, QFontMetrics
+from PyQt6.QtWidgets import QWidget, QToolTip
+
+from services.timeline import Layout, MINUTI_GIORNO
+
+
+class TimelineView(QWidget):
+    """
+    Vista timeline (giorno o settimana) disegnata a mano: nessun widget figlio per gli
+    interventi. Le coordinate dei blocchi si calcolano una volta in imposta_layout(); paintEvent
+    disegna solo le corsie e i blocchi che intersecano l'area da ridisegnare.
+    Va messa in una QScrollArea (la dimensione del widget è quella del contenuto).
+    """
+
+    bloccoAttivato = pyqtSignal(object)  # RigaIntervento (doppio click)
+
+    ORA_DA = 6
+    ORA_A = 22
+    LARGHEZZA_ETICHETTE = 170
+    ALTEZZA_HEADER = 28
+    ALTEZZA_SOTTORIGA = 24
+    PX_ORA_GIORNO = 90
+    PX_ORA_SETTIMANA = 16
+
+    COLORI_STATO = {
+        "Programmato": "#2563EB",
+        "In corso": "#D97706",
+        "Completato": "#16A34A",
+        "Annullato": "#9CA3AF",
+        "Attivo": "#7C3AED",       # occorrenze di ricorrenti
+    }
+
+    GIORNI = ["Lun", "Mar", "Mer", "Gio", "Ven", "Sab", "Dom"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._layout = Layout(giorni=1)
+        self._primo_giorno = None
+        self._rects = []       # QRectF per blocco, stesso ordine di layout.blocchi
+        self._testi = []       # etichetta per blocco
+        self._corsia_y = []    # y iniziale di ogni corsia (+ fine ultima)
+        self._corsia_idx = []  # indice del primo blocco di ogni corsia (+ len)
+        self._px_ora = self.PX_ORA_GIORNO
+
+    # ---------------- DATI ----------------
+    def imposta_layout(self, layout: Layout, primo_giorno):
+        self._layout = layout
+        self._primo_giorno = primo_giorno
+        self._px_ora = self.PX_ORA_GIORNO if layout.giorni == 1 else self.PX_ORA_SETTIMANA
+
+        y = self.ALTEZZA_HEADER
+        self._corsia_y = []
+        for n in layout.sottorighe:
+            self._corsia_y.append(y)
+            y += n * self.ALTEZZA_SOTTORIGA + 6
+        self._corsia_y.append(y)
+
+        self._rects = []
+        self._testi = []
+        self._corsia_idx = [0] * (len(layout.corsie) + 1)
+        for i, b in enumerate(layout.blocchi):
+            x1 = self._x(b.inizio)
+            x2 = max(self._x(min(b.fine, (b.inizio // MINUTI_GIORNO) * MINUTI_GIORNO + self.ORA_A * 60)), x1 + 3)
+            top = self._corsia_y[b.corsia] + 3 + b.sottoriga * self.ALTEZZA_SOTTORIGA
+            self._rects.append(QRectF(x1, top, x2 - x1, self.ALTEZZA_SOTTORIGA - 2))
+            self._testi.append(f"{b.riga.ora} {b.riga.cliente}")
+            self._corsia_idx[b.corsia + 1] = i + 1
+        # corsie vuote (non capita, ma l'indice deve restare monotono)
+        for c in range(1, len(self._corsia_idx)):
+            self._corsia_idx[c] = max(self._corsia_idx[c], self._corsia_idx[c - 1])
+
+        self.setFixedSize(int(self._x_fine()) + 1, int(y) + 1)
+        self.update()
+
+    def _larghezza_giorno(self) -> float:
+        return (self.ORA_A - self.ORA_DA) * self._px_ora
+
+    def _x(self, minuti: int) -> float:
+        giorno, m = divmod(minuti, MINUTI_GIORNO)
+        m = min(max(m, self.ORA_DA * 60), self.ORA_A * 60) - self.ORA_DA * 60
+        return self.LARGHEZZA_ETICHETTE + giorno * self._larghezza_giorno() + m * self._px_ora / 60
+
+    def _x_fine(self) -> float:
+        return self.LARGHEZZA_ETICHETTE + self._layout.giorni * self._larghezza_giorno()
+
+    def _corsie_visibili(self, top: float, bottom: float) -> range:
+        if not self._layout.corsie:
+            return range(0)
+        first = max(bisect_right(self._corsia_y, top) - 1, 0)
+        last = min(bisect_right(self._corsia_y, bottom), len(self._layout.corsie))
+        return range(first, last)
+
+    def blocco_in(self, pos: QPointF):
+        for c in self._corsie_visibili(pos.y(), pos.y()):
+            for i in range(self._corsia_idx[c], self._corsia_idx[c + 1]):
+                if self._rects[i].contains(pos):
+                    return self._layout.blocchi[i]
+        return None
+
+    # ---------------- DISEGNO ----------------
+    def paintEvent(self, event):
+        area = QRectF(event.rect())
+        p = QPainter(self)
+        p.fillRect(area, QColor("#FFFFFF"))
+
+        fm = QFontMetrics(self.font())
+        visibili = self._corsie_visibili(area.top(), area.bottom())
+
+        # corsie: sfondo alternato + nome dipendente
+        for c in visibili:
+            y1, y2 = self._corsia_y[c], self._corsia_y[c + 1]
+            if c % 2:
+                p.fillRect(QRectF(0, y1, self.width(), y2 - y1), QColor("#F9FAFB"))
+            p.setPen(QColor("#111827"))
+            nome = fm.elidedText(self._layout.corsie[c][1], Qt.TextElideMode.ElideRight,
+                                 self.LARGHEZZA_ETICHETTE - 12)
+            p.drawText(QRectF(6, y1, self.LARGHEZZA_ETICHETTE - 12, y2 - y1),
+                       Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, nome)
+
+        self._disegna_griglia(p, area, fm)
+
+        # blocchi delle sole corsie visibili
+        p.setRenderHint(QPainter.RenderHint.Antialiasing, True)
+        for c in visibili:
+            for i in range(self._corsia_idx[c], self._corsia_idx[c + 1]):
+                r = self._rects[i]
+                if not r.intersects(area):
+                    continue
+                riga = self._layout.blocchi[i].riga
+                colore = QColor(self.COLORI_STATO.get(riga.stato, "#2563EB"))
+                p.setPen(Qt.PenStyle.NoPen)
+                p.setBrush(colore)
+                p.drawRoundedRect(r, 4, 4)
+                if r.width() > 24:
+                    p.setPen(QColor("#FFFFFF"))
+                    testo = fm.elidedText(self._testi[i], Qt.TextElideMode.ElideRight, int(r.width()) - 8)
+                    p.drawText(r.adjusted(4, 0, -4, 0),
+                               Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, testo)
+        p.end()
+
+    def _disegna_griglia(self, p: QPainter, area: QRectF, fm: QFontMetrics):
+        h = self.height()
+        p.fillRect(QRectF(area.left(), 0, area.width(), self.ALTEZZA_HEADER), QColor("#F3F4F6"))
+
+        linea_ora = QPen(QColor("#E5E7EB"))
+        linea_giorno = QPen(QColor("#9CA3AF"))
+        ore = self.ORA_A - self.ORA_DA
+        for g in range(self._layout.giorni):
+            x0 = self.LARGHEZZA_ETICHETTE + g * self._larghezza_giorno()
+            if x0 > area.right() or x0 + self._larghezza_giorno() < area.left():
+                continue
+
+            for o in range(ore + 1):
+                x = x0 + o * self._px_ora
+                p.setPen(linea_giorno if o == 0 else linea_ora)
+                p.drawLine(int(x), self.ALTEZZA_HEADER, int(x), h)
+                # in settimana le ore sono strette: etichetta ogni 4 ore
+                if self._layout.giorni == 1 or o % 4 == 0:
+                    p.setPen(QColor("#374151"))
+                    p.drawText(int(x) + 3, self.ALTEZZA_HEADER - 8, f"{self.ORA_DA + o:02d}")
+
+            if self._layout.giorni > 1 and self._primo_giorno is not None:
+                d = date.fromordinal(self._primo_giorno.toordinal() + g)
+                p.setPen(QColor("#111827"))
+                p.drawText(int(x0) + 24, self.ALTEZZA_HEADER - 8, f"{self.GIORNI[g]} {d.day:02d}/{d.month:02d}")
+
+    # ---------------- INTERAZIONE ----------------
+    def event(self, e):
+        if e.type() == QEvent.Type.ToolTip:
+            b = self.blocco_in(QPointF(e.pos()))
+            if b is None:
+                QToolTip.hideText()
+            else:
+                r = b.riga
+                righe = [f"{r.ora}  {r.cliente}", r.servizio, ", ".join(r.dipendenti) or "-", r.stato]
+                if r.note:
+                    righe.append(r.note)
+                QToolTip.showText(e.globalPos(), "\n".join(righe), self)
+            return True
+        return super().event(e)
+
+    def mouseDoubleClickEvent(self, e):
+        b = self.blocco_in(e.position())
+        if b is not None:
+            self.bloccoAttivato.emit(b.riga)
+        super().mouseDoubleClickEvent(e)
@@ -0,0 +1,128 @@
+"""
+Esecuzione delle query fuori dal thread della GUI.
+
+Le funzioni di repository/model girano su un QThreadPool; il risultato torna nel thread
+della GUI tramite segnale (connessione queued) e lì viene passato alla callback.
+
+Ogni richiesta ha una chiave ("clienti", "calendario", ...): una nuova richiesta con la
+stessa chiave rende obsolete le precedenti. Quelle ancora in coda vengono tolte dal pool,
+quella in esecuzione viene interrotta (sqlite3 interrupt) e il suo risultato scartato.
+"""
+import threading
+import traceback
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from database.database import get_connection
+
+
+class _Job(QRunnable):
+    def __init__(self, executor, job_id: int, chiave: str, fn, args, kwargs):
+        super().__init__()
+        self.setAutoDelete(False)  # il riferimento lo tiene l'executor finché non arriva il risultato
+        self.executor = executor
+        self.job_id = job_id
+        self.chiave = chiave
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+
+        self.annullato = False
+        self._lock = threading.Lock()
+        self._conn = None  # connessione del worker mentre la query è in corso
+
+    def annulla(self):
+        with self._lock:
+            self.annullato = True
+            if self._conn is not None:
+                self._conn.interrupt()
+
+    def run(self):
+        with self._lock:
+            if self.annullato:
+                self.executor._finito.emit(self.job_id, None, None)
+                return
+            # una connessione per thread (database.get_connection): è quella che userà fn
+            self._conn = get_connection()
+
+        risultato, errore = None, None
+        try:
+            risultato = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            if not self.annullato:
+                traceback.print_exc()
+                errore = e
+        finally:
+            with self._lock:
+                self._conn = None
+
+        self.executor._finito.emit(self.job_id, risultato, errore)
+
+
+class QueryExecutor(QObject):
+    """
+    Uso:
+        executor.submit("clienti", Cliente.all, on_done=self._popola_clienti)
+
+    caricamento(chiave, in_corso) permette alle sezioni/statusbar di mostrare lo stato.
+    """
+
+    caricamento = pyqtSignal(str, bool)
+    _finito = pyqtSignal(int, object, object)  # emesso dai worker, ricevuto nel thread GUI
+
+    def __init__(self, parent=None, max_thread: int = 2):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_thread)
+
+        self._next_id = 0
+        self._jobs = {}        # job_id -> (_Job, on_done, on_error)
+        self._correnti = {}    # chiave -> job_id dell'ultima richiesta
+        self._finito.connect(self._on_finito)
+
+    def submit(self, chiave: str, fn, *args, on_done=None, on_error=None, **kwargs) -> int:
+        self.annulla(chiave)
+
+        self._next_id += 1
+        job = _Job(self, self._next_id, chiave, fn, args, kwargs)
+        self._jobs[job.job_id] = (job, on_done, on_error)
+        self._correnti[chiave] = job.job_id
+
+        self.caricamento.emit(chiave, True)
+        self.pool.start(job)
+        return job.job_id
+
+    def annulla(self, chiave: str):
+        job_id = self._correnti.pop(chiave, None)
+        if job_id is None or job_id not in self._jobs:
+            return
+
+        job = self._jobs[job_id][0]
+        if self.pool.tryTake(job):
+            # non era ancora partito: nessun risultato arriverà
+            del self._jobs[job_id]
+        else:
+            job.annulla()
+        self.caricamento.emit(chiave, False)
+
+    def in_corso(self, chiave: str) -> bool:
+        return chiave in self._correnti
+
+    def attendi(self, msecs: int = -1) -> bool:
+        """Per la chiusura dell'app e per i test: aspetta la fine dei worker."""
+        return self.pool.waitForDone(msecs)
+
+    def _on_finito(self, job_id: int, risultato, errore):
+        job, on_done, on_error = self._jobs.pop(job_id, (None, None, None))
+        if job is None or job.annullato or self._correnti.get(job.chiave) != job_id:
+            return  # richiesta superata da una più recente
+
+        del self._correnti[job.chiave]
+        self.caricamento.emit(job.chiave, False)
+
+        if errore is not None:
+            if on_error is not None:
+                on_error(errore)
+            return
+        if on_done is not None:
+            on_done(risultato)
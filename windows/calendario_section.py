@@ -1,17 +1,33 @@
+from datetime import date, timedelta
+
 from PyQt6.QtCore import Qt, QDate, QEvent, QObject
-from PyQt6.QtWidgets import QHeaderView, QAbstractItemView, QTableWidgetItem, QMessageBox, QCalendarWidget, QToolTip, QTableView
+from PyQt6.QtWidgets import (QHeaderView, QAbstractItemView, QTableWidgetItem, QMessageBox, QCalendarWidget,
+                             QToolTip, QTableView, QScrollArea, QPushButton, QButtonGroup)
 from PyQt6.QtGui import QTextCharFormat, QColor
 
-from database.repositories.interventi_repo import get_interventi_misti
+from services.calendario import (eventi_griglia, eventi_griglia_in_cache, eventi_mese, eventi_mese_in_cache,
+                                 eventi_settimana, griglia_mese, mese_adiacente)
+from services.timeline import calcola_layout
 from widgets.brillance_calendar import BrillanceCalendar
+from widgets.timeline_view import TimelineView
+
+
+def _layout_settimana(lunedi: date):
+    # gira nel worker: lettura (o cache) dei mesi + calcolo del layout
+    return calcola_layout(eventi_settimana(lunedi), lunedi, giorni=7)
+
 
 class CalendarioSection(QObject):
     def __init__(self, ui):
         super().__init__()
         self.ui = ui
         self.events_by_date = {}
+        self.griglia = None
+        self.vista = "giorno"  # timeline del dettaglio: "giorno" | "settimana"
+        self.giorno_dettaglio = None
         self.setup_calendar()
         self.setup_table()
+        self.setup_timeline()
         self.setup_signals()
 
         self.ui.stackedContent.setCurrentWidget(self.ui.pageCalendario)
@@ -55,113 +71,47 @@ class CalendarioSection(QObject):
 
         self.refresh_calendar_formats()
 
-    def build_events_cache_for_month(self):
+    def build_events_cache_for_month(self, on_ready=None):
+        """
+        Eventi delle 42 celle del mese mostrato, compresi i giorni dei mesi adiacenti:
+        dalla cache mensile se ancora validi (nessuna query), altrimenti calcolati in un
+        worker. Se si sfoglia velocemente, le richieste dei mesi superati vengono annullate.
+        Poi prefetch in background del mese prima e dopo.
+        """
         cal = self.ui.tableGiorno
         year = cal.yearShown()
         month = cal.monthShown()
 
-        rows = get_interventi_misti()
-        self.events_by_date = {}  # QDate -> list[dict]
-
-        def add_event(qd: QDate, ev: dict):
-            self.events_by_date.setdefault(qd, []).append(ev)
-
-        # range mese visibile (42 celle)
-        first = QDate(year, month, 1)
-        start_grid = first.addDays(-(first.dayOfWeek() - 1))
-
-
-        for r in rows:
-            tipo = r["tipo"]
-
-            # ---------------- SINGOLO ----------------
-            if tipo == "SINGOLO":
-                data_iso = (r["data"] or "").strip()
-                if not data_iso or data_iso == "-":
-                    continue
-
-                qd = QDate.fromString(data_iso, "yyyy-MM-dd")
-                if not qd.isValid():
-                    continue
-
-                # opzionale: mostra solo il mese corrente (io lo consiglio)
-                if qd.year() != year or qd.month() != month:
-                    continue
-
-                add_event(qd, {
-                    "id_ref": r["id_ref"],
-                    "tipo": "SINGOLO",
-                    "ora": r["ora"],
-                    "cliente": r["cliente"],
-                    "servizio": r["servizio"],
-                    "durata": r["durata"],
-                    "stato": r["stato"],
-                    "dipendenti": r["dipendenti"],
-                })
-
-                continue
-
-            # ---------------- RICORRENTE ----------------
-            if tipo == "RICORRENTE":
-                # stato: Attivo/Sospeso (dalla query)
-                if (r["stato"] or "").strip().lower() != "attivo":
-                    continue
-
-                # giorni: "1,3,5" ecc.
-                giorni_csv = (r["giorni"] or "").strip()
-                if not giorni_csv or giorni_csv == "-":
-                    continue
-
-                try:
-                    weekdays = {int(x.strip()) for x in giorni_csv.split(",") if x.strip().isdigit()}
-                except Exception:
-                    continue
-
-                # periodo: "YYYY-MM-DD → YYYY-MM-DD" oppure "- → -"
-                periodo = (r["periodo"] or "").strip()
-                data_inizio = None
-                data_fine = None
-                if "→" in periodo:
-                    p1, p2 = [x.strip() for x in periodo.split("→", 1)]
-                    if p1 != "-" and p1:
-                        data_inizio = QDate.fromString(p1, "yyyy-MM-dd")
-                        if not data_inizio.isValid():
-                            data_inizio = None
-                    if p2 != "-" and p2:
-                        data_fine = QDate.fromString(p2, "yyyy-MM-dd")
-                        if not data_fine.isValid():
-                            data_fine = None
-
-                # per ogni giorno nella griglia (42 celle), se è nel mese corrente e matcha weekday -> aggiungi
-                for i in range(42):
-                    d = start_grid.addDays(i)
-
-                    # mostra solo giorni del mese corrente
-                    if d.month() != month:
-                        continue
-
-                    # filtra per periodo (se presente)
-                    if data_inizio and d < data_inizio:
-                        continue
-                    if data_fine and d > data_fine:
-                        continue
-
-                    if d.dayOfWeek() in weekdays:
-                        add_event(d, {
-                            "id_ref": r["id_ref"],
-                            "tipo": "RICORRENTE",
-                            "ora": r["ora"],
-                            "cliente": r["cliente"],
-                            "servizio": r["servizio"],
-                            "durata": r["durata"],
-                            "stato": r["stato"],
-                            "dipendenti": r["dipendenti"],
-                        })
-
-        # ordina eventi per ora
-        for qd, evs in self.events_by_date.items():
-            evs.sort(key=lambda e: (e.get("ora") or ""))
+        eventi = eventi_griglia_in_cache(year, month)
+        if eventi is not None:
+            self.ui.db_executor.annulla("calendario")  # l'eventuale richiesta in volo è superata
+            self._set_events(eventi, on_ready)
+        else:
+            self.ui.db_executor.submit(
+                "calendario", eventi_griglia, year, month,
+                on_done=lambda ev: self._set_events(ev, on_ready),
+            )
+
+        self.prefetch_mesi_vicini(year, month)
+
+    def prefetch_mesi_vicini(self, year: int, month: int):
+        for chiave, delta in (("prefetch_mese_prec", -1), ("prefetch_mese_succ", 1)):
+            anno, mese = mese_adiacente(year, month, delta)
+            if eventi_mese_in_cache(anno, mese) is None:
+                self.ui.db_executor.submit(chiave, eventi_mese, anno, mese)
+
+    def _set_events(self, eventi: dict, on_ready=None):
+        # date -> QDate solo qui, nel thread della GUI
+        self.events_by_date = {QDate(d.year, d.month, d.day): evs for d, evs in eventi.items()}
+
+        # dati di disegno della heat-map: una volta per mese, non a ogni paintCell
+        cal = self.ui.tableGiorno
+        self.griglia = griglia_mese(eventi, cal.yearShown(), cal.monthShown())
+        if hasattr(cal, "setGriglia"):
+            cal.setGriglia(self.griglia)
 
+        if on_ready is not None:
+            on_ready()
 
     def date_from_cell(self, row: int, col: int) -> QDate:
         cal = self.ui.tableGiorno
@@ -196,8 +146,14 @@ class CalendarioSection(QObject):
 
             if evs:
                 lines = [f"{d.toString('dd-MM-yyyy')}  •  {len(evs)} interventi"]
+                i = self.griglia.indice(d.toPyDate()) if self.griglia else -1
+                if i >= 0:
+                    lines[0] += f"  •  {self.griglia.minuti[i] / 60:.1f} h"
+                    if self.griglia.conflitti[i]:
+                        lines[0] += "  •  ⚠ sovrapposizioni"
+
                 for e in evs[:3]:
-                    lines.append(f"• {e.get('ora', '')}  {e.get('cliente', '')} — {e.get('servizio', '')}")
+                    lines.append(f"• {e.ora}  {e.cliente} — {e.servizio}")
                 if len(evs) > 3:
                     lines.append("…")
 
@@ -219,14 +175,11 @@ class CalendarioSection(QObject):
         self.format_visible_cells()
         self.mark_holidays()
 
-        self.build_events_cache_for_month()
-
-
-        if hasattr(self.ui.tableGiorno, "setEvents"):
-            self.ui.tableGiorno.setEvents(self.events_by_date)
-
         self.highlight_today()
 
+        # gli eventi arrivano dal worker e ridisegnano il calendario
+        self.build_events_cache_for_month()
+
     def reset_calendar_formats(self):
         # resetta i formati (Qt trick: data "null" resetta)
         self.ui.tableGiorno.setDateTextFormat(QDate(), QTextCharFormat())
@@ -389,10 +342,59 @@ class CalendarioSection(QObject):
         table.setColumnWidth(4, 160)  # Servizio
         table.setColumnWidth(5, 220)  # Dipendenti
 
+    # ---------------- TIMELINE GIORNO / SETTIMANA ----------------
+    def setup_timeline(self):
+        page_layout = self.ui.page.layout()
+        header_layout = self.ui.btnGiornoBack.parent().layout()
+
+        self.btnVistaGiorno = QPushButton("Giorno")
+        self.btnVistaSettimana = QPushButton("Settimana")
+        self._gruppo_vista = QButtonGroup(self)
+        for btn in (self.btnVistaGiorno, self.btnVistaSettimana):
+            btn.setCheckable(True)
+            btn.setStyleSheet(self.ui.btnGiornoBack.styleSheet())
+            self._gruppo_vista.addButton(btn)
+            header_layout.addWidget(btn)
+        self.btnVistaGiorno.setChecked(True)
+
+        self.timeline = TimelineView()
+        self.timeline_scroll = QScrollArea()
+        self.timeline_scroll.setWidget(self.timeline)
+        self.timeline_scroll.setWidgetResizable(False)
+        self.timeline_scroll.setMinimumHeight(260)
+        page_layout.insertWidget(page_layout.indexOf(self.ui.tableWidget), self.timeline_scroll, 2)
+
+    def set_vista(self, vista: str):
+        if vista == self.vista:
+            return
+        self.vista = vista
+        if self.giorno_dettaglio is not None:
+            self.load_timeline(self.giorno_dettaglio)
+
+    def load_timeline(self, giorno: date):
+        if self.vista == "giorno":
+            # il giorno è già in events_by_date: layout calcolato qui, è una lista sola
+            evs = self.events_by_date.get(QDate(giorno.year, giorno.month, giorno.day), [])
+            self.ui.db_executor.annulla("timeline")
+            self.timeline.imposta_layout(calcola_layout({giorno: evs}, giorno, giorni=1), giorno)
+            return
+
+        lunedi = giorno - timedelta(days=giorno.weekday())
+        self.ui.db_executor.submit(
+            "timeline", _layout_settimana, lunedi,
+            on_done=lambda layout: self.timeline.imposta_layout(layout, lunedi),
+        )
+
+    def open_from_timeline(self, riga):
+        self.ui.vai_a("intervento" if riga.tipo == "SINGOLO" else "ricorrente", riga.id_ref)
+
     # ---------------- SEGNALI ----------------
     def setup_signals(self):
         self.ui.tableGiorno.clicked.connect(self.open_day_details)
         self.ui.btnGiornoBack.clicked.connect(self.back_to_calendar)
+        self.btnVistaGiorno.clicked.connect(lambda: self.set_vista("giorno"))
+        self.btnVistaSettimana.clicked.connect(lambda: self.set_vista("settimana"))
+        self.timeline.bloccoAttivato.connect(self.open_from_timeline)
 
 
     # ---------------- NAVIGAZIONE ----------------
@@ -400,10 +402,11 @@ class CalendarioSection(QObject):
         giorno_label = qdate.toString("dd-MM-yyyy")
         self.ui.lblDettaglioTitle.setText(f"Interventi del {giorno_label}")
 
-        # ✅ ricrea la cache e poi carica
-        self.build_events_cache_for_month()
-        self.load_giorno(qdate)
+        self.giorno_dettaglio = date(qdate.year(), qdate.month(), qdate.day())
 
+        # mese in cache: tabella riempita subito; altrimenti all'arrivo dal worker
+        self.ui.tableWidget.setRowCount(0)
+        self.build_events_cache_for_month(on_ready=lambda: self.load_giorno(qdate))
         self.ui.stackedContent.setCurrentWidget(self.ui.page)
 
     def back_to_calendar(self):
@@ -420,14 +423,14 @@ class CalendarioSection(QObject):
 
         for r, e in enumerate(eventi):
             values = [
-                e.get("id_ref", ""),
-                e.get("tipo", ""),
-                e.get("ora", ""),
-                e.get("cliente", ""),
-                e.get("servizio", ""),
-                e.get("dipendenti", ""),
-                e.get("durata", ""),
-                e.get("stato", "")
+                e.id_ref,
+                e.tipo,
+                e.ora,
+                e.cliente,
+                e.servizio,
+                ", ".join(e.dipendenti) or "-",
+                "" if e.durata_ore is None else e.durata_ore,
+                e.stato
             ]
 
             for c, v in enumerate(values):
@@ -436,6 +439,7 @@ class CalendarioSection(QObject):
                 table.setItem(r, c, item)
 
         table.clearSelection()
+        self.load_timeline(date(qdate.year(), qdate.month(), qdate.day()))
 
 
 
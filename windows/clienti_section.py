@@ -7,13 +7,15 @@ from PyQt6.QtWidgets import (
 
 
 from models.cliente import Cliente
-from database.database import get_connection
 from dialogs.cliente_dialog import ClienteDialog
+from widgets.table_rows import upsert_row, remove_row, select_row_by_id
+from widgets.import_csv import aggiungi_pulsante_import
 
 
 class ClientiSection:
     def __init__(self, ui):
         self.ui = ui
+        self._da_selezionare = None  # id da selezionare quando arriva il caricamento
 
         self.setup_table()
         self.setup_signals()
@@ -67,38 +69,68 @@ class ClientiSection:
         self.ui.btnClienteModifica.clicked.connect(self.modifica_cliente)
         self.ui.btnClienteElimina.clicked.connect(self.elimina_cliente)
 
+        # import in blocco da CSV, accanto a Elimina
+        self.btnImporta = aggiungi_pulsante_import(self.ui, self.ui.btnClienteElimina, "clienti", self.load_clienti)
+
     # ---------------------------------------------------------
     #  CARICAMENTO DATI
     # ---------------------------------------------------------
     def load_clienti(self):
-        table = self.ui.tableClienti
-        clienti = Cliente.all()      # prende i clienti dal model
+        # la query gira nel worker: la tabella si riempie quando arriva il risultato
+        self.ui.db_executor.submit("clienti", Cliente.all, on_done=self._popola_clienti)
 
+    def _popola_clienti(self, clienti):
+        table = self.ui.tableClienti
         table.setRowCount(len(clienti))
 
         for row_idx, cliente in enumerate(clienti):
-            # Colonna ID nascosta
-            table.setItem(row_idx, 0, QTableWidgetItem(str(cliente.id)))
-
-            # Colonne visibili
-            table.setItem(row_idx, 1, QTableWidgetItem(cliente.nome))
-            table.setItem(row_idx, 2, QTableWidgetItem(cliente.cognome))
-            table.setItem(row_idx, 3, QTableWidgetItem(cliente.telefono or ""))
-            table.setItem(row_idx, 4, QTableWidgetItem(cliente.indirizzo or ""))
-            table.setItem(row_idx, 5, QTableWidgetItem(cliente.email or ""))
+            self._fill_row(row_idx, cliente)
 
         # dopo il reload tolgo la selezione e aggiorno i pulsanti
         table.clearSelection()
         self.on_selection_changed()
 
+        if self._da_selezionare is not None:
+            select_row_by_id(table, self._da_selezionare)
+            self._da_selezionare = None
+
+    def seleziona(self, cliente_id: int):
+        """Seleziona la riga (es. dalla ricerca); se la tabella è ancora in caricamento, all'arrivo dei dati."""
+        if self.ui.db_executor.in_corso("clienti"):
+            self._da_selezionare = cliente_id
+        else:
+            select_row_by_id(self.ui.tableClienti, cliente_id)
+
+    def _fill_row(self, row_idx: int, cliente: Cliente):
+        table = self.ui.tableClienti
+
+        # Colonna ID nascosta
+        table.setItem(row_idx, 0, QTableWidgetItem(str(cliente.id)))
+
+        # Colonne visibili
+        table.setItem(row_idx, 1, QTableWidgetItem(cliente.nome))
+        table.setItem(row_idx, 2, QTableWidgetItem(cliente.cognome))
+        table.setItem(row_idx, 3, QTableWidgetItem(cliente.telefono or ""))
+        table.setItem(row_idx, 4, QTableWidgetItem(cliente.indirizzo or ""))
+        table.setItem(row_idx, 5, QTableWidgetItem(cliente.email or ""))
+
+    def _sort_key(self, row_idx: int) -> tuple:
+        # stesso ordinamento di Cliente.all(): cognome, nome
+        table = self.ui.tableClienti
+        return table.item(row_idx, 2).text(), table.item(row_idx, 1).text()
+
+    def _upsert_cliente(self, cliente: Cliente):
+        # aggiorno solo la riga interessata (niente reload della tabella)
+        upsert_row(
+            self.ui.tableClienti, cliente.id, (cliente.cognome, cliente.nome),
+            self._sort_key, lambda row_idx: self._fill_row(row_idx, cliente)
+        )
+        self.on_selection_changed()
+
     # ---------------------------------------------------------
     #  AGGIUNGI CLIENTE
     # ---------------------------------------------------------
 
-    def _norm(self, s: str) -> str:
-        # toglie spazi extra e rende case-insensitive (più robusto di lower)
-        return " ".join(s.strip().split()).casefold()
-
     def aggiungi_cliente(self):
         dialog = ClienteDialog(parent=None)
         result = dialog.exec()
@@ -117,34 +149,20 @@ class ClientiSection:
             QMessageBox.warning(self.ui, "Dati mancanti", "Nome e cognome sono obbligatori.")
             return
 
-        conn = get_connection()
-        cur = conn.cursor()
-
-        # --- 2) CONTROLLO DUPLICATI (robusto) ---
-        nome_n = self._norm(dati["nome"])
-        cognome_n = self._norm(dati["cognome"])
-
-        cur.execute(
-            "SELECT 1 FROM clienti WHERE lower(trim(nome)) = ? AND lower(trim(cognome)) = ?",
-            (nome_n, cognome_n)
-        )
-        if cur.fetchone():
+        # --- 2) CONTROLLO DUPLICATI (chiavi normalizzate, indicizzate) ---
+        if Cliente.esiste(dati["nome"], dati["cognome"]):
             QMessageBox.warning(self.ui, "Cliente esistente", "Esiste già un cliente con lo stesso nome e cognome.")
             return
 
         # --- 3) INSERT ---
-        cur.execute("""
-            INSERT INTO clienti (nome, cognome, telefono, indirizzo, email)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
+        cliente = Cliente.create(
             dati["nome"],
             dati["cognome"],
             dati["telefono"],
             dati["indirizzo"],
             dati["email"],
-        ))
-        conn.commit()
-        self.load_clienti()
+        )
+        self._upsert_cliente(cliente)
 
     def modifica_cliente(self):
         table = self.ui.tableClienti
@@ -181,38 +199,25 @@ class ClientiSection:
             QMessageBox.warning(self.ui, "Dati mancanti", "Nome e cognome sono obbligatori.")
             return
 
-        conn = get_connection()
-        cur = conn.cursor()
-
-        # --- 2) duplicati (robusto + escludo me stesso) ---
-        nome_n = self._norm(nuovi_dati["nome"])
-        cognome_n = self._norm(nuovi_dati["cognome"])
-
-        cur.execute(
-            "SELECT 1 FROM clienti WHERE lower(trim(nome)) = ? AND lower(trim(cognome)) = ? AND id != ?",
-            (nome_n, cognome_n, cliente_id)
-        )
-        if cur.fetchone():
+        # --- 2) duplicati (escludo me stesso) ---
+        if Cliente.esiste(nuovi_dati["nome"], nuovi_dati["cognome"], escludi_id=cliente_id):
             QMessageBox.warning(self.ui, "Cliente esistente", "Esiste già un cliente con lo stesso nome e cognome.")
             return
 
         # --- 3) update ---
-        cur.execute("""
-            UPDATE clienti
-            SET nome = ?, cognome = ?, telefono = ?, indirizzo = ?, email = ?
-            WHERE id = ?
-        """, (
-            nuovi_dati["nome"],
-            nuovi_dati["cognome"],
-            nuovi_dati["telefono"],
-            nuovi_dati["indirizzo"],
-            nuovi_dati["email"],
-            cliente_id
-        ))
-        conn.commit()
-        self.load_clienti()
-        if hasattr(self.ui, "interventi_section"):
-            self.ui.interventi_section.load_interventi()
+        cliente = Cliente(
+            id=cliente_id,
+            nome=nuovi_dati["nome"],
+            cognome=nuovi_dati["cognome"],
+            telefono=nuovi_dati["telefono"],
+            indirizzo=nuovi_dati["indirizzo"],
+            email=nuovi_dati["email"],
+        ).update()
+        self._upsert_cliente(cliente)
+
+        # il nome del cliente compare anche nelle righe degli interventi già caricate
+        if self.ui.interventi_section is not None:
+            self.ui.interventi_section.model.aggiorna_cliente(cliente.id, cliente.nome, cliente.cognome)
 
     # ---------------------------------------------------------
     #  ELIMINA CLIENTE
@@ -227,18 +232,13 @@ class ClientiSection:
 
         cliente_id = int(table.item(row, 0).text())
 
-        conn = get_connection()
-        cur = conn.cursor()
-
         # blocco se associato
-        cur.execute("SELECT 1 FROM interventi WHERE cliente_id = ? LIMIT 1", (cliente_id,))
-        if cur.fetchone():
+        uso = Cliente.in_uso(cliente_id)
+        if uso == "intervento":
             QMessageBox.warning(self.ui, "Impossibile eliminare",
                                 "Non puoi eliminare il cliente perché è associato ad almeno un intervento.")
             return
-
-        cur.execute("SELECT 1 FROM interventi_ricorrenti WHERE cliente_id = ? LIMIT 1", (cliente_id,))
-        if cur.fetchone():
+        if uso == "ricorrente":
             QMessageBox.warning(self.ui, "Impossibile eliminare",
                                 "Non puoi eliminare il cliente perché è associato ad almeno un intervento ricorrente.")
             return
@@ -253,9 +253,20 @@ class ClientiSection:
         if risposta != QMessageBox.StandardButton.Yes:
             return
 
-        cur.execute("DELETE FROM clienti WHERE id = ?", (cliente_id,))
-        conn.commit()
-        self.load_clienti()
+        try:
+            cliente = Cliente.get(cliente_id)
+            if cliente is not None:
+                cliente.delete()
+            remove_row(self.ui.tableClienti, cliente_id)
+            self.on_selection_changed()
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            QMessageBox.critical(
+                self.ui,
+                "Errore",
+                f"Errore durante l'eliminazione del cliente:\n{e}"
+            )
 
     # ---------------------------------------------------------
     #  GESTIONE SELEZIONE
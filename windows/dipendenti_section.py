@@ -1,13 +1,15 @@
 from PyQt6.QtWidgets import QHeaderView, QAbstractItemView,QTableWidgetItem, QMessageBox
 
-from database.database import get_connection
 from models.dipendenti import Dipendente
 from dialogs.dipendente_dialog import DipendenteDialog
+from widgets.table_rows import upsert_row, remove_row, select_row_by_id
+from widgets.import_csv import aggiungi_pulsante_import
 from datetime import datetime, date
 
 class DipendentiSection:
     def __init__(self, ui):
         self.ui = ui
+        self._da_selezionare = None  # id da selezionare quando arriva il caricamento
         self.setup_table()
         self.setup_signals()
         self.load_dipendenti()
@@ -45,6 +47,9 @@ class DipendentiSection:
         self.ui.btnDipendentiModifica.clicked.connect(self.modifica_dipendente)
         self.ui.btnDipendentiElimina.clicked.connect(self.elimina_dipendente)
 
+        # import in blocco da CSV, accanto a Elimina
+        self.btnImporta = aggiungi_pulsante_import(self.ui, self.ui.btnDipendentiElimina, "dipendenti", self.load_dipendenti)
+
         self.ui.tableDipendenti.itemSelectionChanged.connect(self.on_selection_changed)
 
     def format_data(self, value) -> str:
@@ -70,31 +75,58 @@ class DipendentiSection:
     #  LOAD DIPENDENTI
     # ---------------------------------------------------------
     def load_dipendenti(self):
-        table = self.ui.tableDipendenti
-        dipendenti = Dipendente.all()   # come Cliente.all()
+        # come load_clienti: query nel worker, tabella riempita all'arrivo del risultato
+        self.ui.db_executor.submit("dipendenti", Dipendente.all, on_done=self._popola_dipendenti)
 
+    def _popola_dipendenti(self, dipendenti):
+        table = self.ui.tableDipendenti
         table.setRowCount(len(dipendenti))
 
         for row_idx, d in enumerate(dipendenti):
-            # colonna ID nascosta
-            table.setItem(row_idx, 0, QTableWidgetItem(str(d.id)))
-
-            # colonne visibili
-            table.setItem(row_idx, 1, QTableWidgetItem(d.nome))
-            table.setItem(row_idx, 2, QTableWidgetItem(d.cognome))
-            table.setItem(row_idx, 3, QTableWidgetItem(d.telefono or ""))
-            table.setItem(row_idx, 4, QTableWidgetItem(d.email or ""))
-            table.setItem(row_idx, 5, QTableWidgetItem(d.mansione or ""))
-            table.setItem(row_idx, 6, QTableWidgetItem(str(d.ore_settimanali) if d.ore_settimanali is not None else ""))
-            table.setItem(row_idx, 7, QTableWidgetItem(str(d.stipendio) if d.stipendio is not None else ""))
-            table.setItem(row_idx, 8, QTableWidgetItem(self.format_data(d.scadenza_contratto)))
-
+            self._fill_row(row_idx, d)
 
         table.clearSelection()
         self.on_selection_changed()
 
-    def _norm(self, s: str) -> str:
-        return " ".join(s.strip().split()).lower()
+        if self._da_selezionare is not None:
+            select_row_by_id(table, self._da_selezionare)
+            self._da_selezionare = None
+
+    def seleziona(self, dipendente_id: int):
+        """Seleziona la riga (es. dalla ricerca); se la tabella è ancora in caricamento, all'arrivo dei dati."""
+        if self.ui.db_executor.in_corso("dipendenti"):
+            self._da_selezionare = dipendente_id
+        else:
+            select_row_by_id(self.ui.tableDipendenti, dipendente_id)
+
+    def _fill_row(self, row_idx: int, d: Dipendente):
+        table = self.ui.tableDipendenti
+
+        # colonna ID nascosta
+        table.setItem(row_idx, 0, QTableWidgetItem(str(d.id)))
+
+        # colonne visibili
+        table.setItem(row_idx, 1, QTableWidgetItem(d.nome))
+        table.setItem(row_idx, 2, QTableWidgetItem(d.cognome))
+        table.setItem(row_idx, 3, QTableWidgetItem(d.telefono or ""))
+        table.setItem(row_idx, 4, QTableWidgetItem(d.email or ""))
+        table.setItem(row_idx, 5, QTableWidgetItem(d.mansione or ""))
+        table.setItem(row_idx, 6, QTableWidgetItem(str(d.ore_settimanali) if d.ore_settimanali is not None else ""))
+        table.setItem(row_idx, 7, QTableWidgetItem(str(d.stipendio) if d.stipendio is not None else ""))
+        table.setItem(row_idx, 8, QTableWidgetItem(self.format_data(d.scadenza_contratto)))
+
+    def _sort_key(self, row_idx: int) -> tuple:
+        # stesso ordinamento di Dipendente.all(): cognome, nome
+        table = self.ui.tableDipendenti
+        return table.item(row_idx, 2).text(), table.item(row_idx, 1).text()
+
+    def _upsert_dipendente(self, d: Dipendente):
+        # aggiorno solo la riga interessata (niente reload della tabella)
+        upsert_row(
+            self.ui.tableDipendenti, d.id, (d.cognome, d.nome),
+            self._sort_key, lambda row_idx: self._fill_row(row_idx, d)
+        )
+        self.on_selection_changed()
 
     # ---------------------------------------------------------
     #  AGGIUNGI DIPENDENTE
@@ -146,23 +178,15 @@ class DipendentiSection:
         else:
             dati["ore_settimanali"] = None
 
-        # duplicati (robusto)
-        conn = get_connection()
-        cur = conn.cursor()
-        nome_n = self._norm(dati["nome"])
-        cognome_n = self._norm(dati["cognome"])
-        cur.execute(
-            "SELECT 1 FROM dipendenti WHERE lower(trim(nome)) = ? AND lower(trim(cognome)) = ? LIMIT 1",
-            (nome_n, cognome_n)
-        )
-        if cur.fetchone():
+        # duplicati (chiavi normalizzate, indicizzate)
+        if Dipendente.esiste(dati["nome"], dati["cognome"]):
             QMessageBox.warning(self.ui, "Dipendente esistente",
                                 "Esiste già un dipendente con lo stesso nome e cognome.")
             return
 
         try:
-            Dipendente.create(dati)
-            self.load_dipendenti()
+            d = Dipendente.create(dati)
+            self._upsert_dipendente(d)
         except Exception as e:
             import traceback
             traceback.print_exc()
@@ -244,25 +268,18 @@ class DipendentiSection:
             nuovi_dati["ore_settimanali"] = None
 
         # duplicati (escludo me stesso)
-        conn = get_connection()
-        cur = conn.cursor()
-        nome_n = self._norm(nuovi_dati["nome"])
-        cognome_n = self._norm(nuovi_dati["cognome"])
-        cur.execute(
-            "SELECT 1 FROM dipendenti WHERE lower(trim(nome)) = ? AND lower(trim(cognome)) = ? AND id != ? LIMIT 1",
-            (nome_n, cognome_n, dipendente_id)
-        )
-        if cur.fetchone():
+        if Dipendente.esiste(nuovi_dati["nome"], nuovi_dati["cognome"], escludi_id=dipendente_id):
             QMessageBox.warning(self.ui, "Dipendente esistente",
                                 "Esiste già un dipendente con lo stesso nome e cognome.")
             return
 
         try:
-            Dipendente.update(dipendente_id, nuovi_dati)
-            self.load_dipendenti()
+            d = Dipendente.update(dipendente_id, nuovi_dati)
+            self._upsert_dipendente(d)
 
-            if hasattr(self.ui, "interventi_section"):
-                self.ui.interventi_section.load_interventi()
+            # il nome compare anche nelle righe degli interventi già caricate
+            if self.ui.interventi_section is not None:
+                self.ui.interventi_section.model.aggiorna_dipendente(d.id, f"{d.nome} {d.cognome}")
         except Exception as e:
             import traceback
             traceback.print_exc()
@@ -289,17 +306,12 @@ class DipendentiSection:
 
         dipendente_id = int(table.item(row, 0).text())
 
-        conn = get_connection()
-        cur = conn.cursor()
-
-        cur.execute("SELECT 1 FROM interventi_dipendenti WHERE dipendente_id = ? LIMIT 1", (dipendente_id,))
-        if cur.fetchone():
+        uso = Dipendente.in_uso(dipendente_id)
+        if uso == "intervento":
             QMessageBox.warning(self.ui, "Impossibile eliminare",
                                 "Non puoi eliminare il dipendente perché è assegnato ad almeno un intervento.")
             return
-
-        cur.execute("SELECT 1 FROM ricorrenti_dipendenti WHERE dipendente_id = ? LIMIT 1", (dipendente_id,))
-        if cur.fetchone():
+        if uso == "ricorrente":
             QMessageBox.warning(self.ui, "Impossibile eliminare",
                                 "Non puoi eliminare il dipendente perché è assegnato ad almeno un intervento ricorrente.")
             return
@@ -316,7 +328,8 @@ class DipendentiSection:
 
         try:
             Dipendente.delete(dipendente_id)
-            self.load_dipendenti()
+            remove_row(self.ui.tableDipendenti, dipendente_id)
+            self.on_selection_changed()
         except Exception as e:
             import traceback
             traceback.print_exc()
@@ -1,13 +1,8 @@
-import re
-
-from PyQt6.QtCore import Qt
-from PyQt6.QtWidgets import QHeaderView, QAbstractItemView, QTableWidgetItem, QMessageBox
-from datetime import datetime, date
-
+from PyQt6.QtWidgets import QHeaderView, QAbstractItemView, QMessageBox, QPushButton
 
+from dialogs.assegnazione_dialog import AssegnazioneDialog
 from dialogs.intervento_dialog import InterventoDialog
 from database.repositories.interventi_repo import (
-    get_interventi_misti,
     get_intervento_by_id,
     get_intervento_dipendenti_ids,
     create_intervento,
@@ -17,35 +12,37 @@ from database.repositories.interventi_repo import (
 from dialogs.ricorrente_dialog import RicorrenteDialog
 from database.repositories.ricorrenti_repo import (
     get_ricorrente_by_id, get_ricorrente_giorni, get_ricorrente_dipendenti_ids,
-    create_ricorrente, update_ricorrente, delete_ricorrente, rinnova_ricorrenti_scaduti
+    create_ricorrente, update_ricorrente, delete_ricorrente
 )
+from widgets.interventi_table_model import InterventiTableModel
 
 
 class InterventiSection:
     def __init__(self, ui):
         self.ui = ui
         self.setup_table()
+        self.setup_assegnazione()
         self.setup_signals()
-        rinnova_ricorrenti_scaduti()
+        # rinnova_ricorrenti_scaduti() gira all'avvio, dopo il primo frame (MainWindow.avvio_differito)
         self.load_interventi()
 
         self.ui.btnInterventiModifica.setEnabled(False)
         self.ui.btnInterventiElimina.setEnabled(False)
 
     def setup_table(self):
-        table = self.ui.tableInterventi
+        table = self.ui.tableInterventi  # QTableView
+
+        # model virtuale: righe caricate a pagine mentre si scorre
+        self.model = InterventiTableModel(table, executor=self.ui.db_executor)
+        table.setModel(self.model)
 
-        table.setColumnCount(11)
-        table.setHorizontalHeaderLabels([
-            "ID_REF", "TIPO", "Cliente", "Servizio", "Dipendenti",
-            "Data", "Ora", "Durata", "Giorni", "Stato", "Periodo"
-        ])
         table.setColumnHidden(0, True)
         table.setColumnHidden(1, True)
 
+        # niente ResizeToContents: con migliaia di righe misurerebbe ogni cella
         header = table.horizontalHeader()
         header.setStretchLastSection(True)
-        header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
 
         table.setAlternatingRowColors(True)
         table.verticalHeader().setVisible(False)
@@ -55,116 +52,77 @@ class InterventiSection:
         table.setWordWrap(False)
         table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
 
-        table.setStyleSheet(self.ui.tableClienti.styleSheet())
+        table.setStyleSheet(self.ui.tableClienti.styleSheet().replace("QTableWidget", "QTableView"))
 
+        table.setColumnWidth(5, 100)  # Data
+        table.setColumnWidth(6, 70)  # Ora
+        table.setColumnWidth(7, 70)  # Durata
+        table.setColumnWidth(8, 140)  # Giorni
+        table.setColumnWidth(9, 110)  # Stato
         table.setColumnWidth(2, 200)  # Cliente
         table.setColumnWidth(3, 160)  # Servizio
         table.setColumnWidth(4, 220)  # Dipendenti
         table.setColumnWidth(10, 220)  # Periodo
+    def setup_assegnazione(self):
+        # accanto a Aggiungi/Modifica/Elimina, stesso stile
+        btn = QPushButton("Assegna automaticamente")
+        btn.setStyleSheet(self.ui.btnInterventiAggiungi.styleSheet())
+        layout = self.ui.btnInterventiElimina.parent().layout()
+        layout.insertWidget(layout.indexOf(self.ui.btnInterventiElimina) + 1, btn)
+        self.btnInterventiAssegna = btn
+
     def setup_signals(self):
+        self.btnInterventiAssegna.clicked.connect(self.assegna_automaticamente)
         self.ui.btnInterventiAggiungi.clicked.connect(self.aggiungi_intervento)
         self.ui.btnInterventiModifica.clicked.connect(self.modifica_intervento)
         self.ui.btnInterventiElimina.clicked.connect(self.elimina_intervento)
 
-        self.ui.tableInterventi.itemSelectionChanged.connect(self.on_selection_changed)
-
-    def format_giorni(self, csv_nums: str) -> str:
-        if not csv_nums or str(csv_nums).strip() in ("-", ""):
-            return "-"
-
-        GIORNI_MAP = {1: "Lun", 2: "Mar", 3: "Mer", 4: "Gio", 5: "Ven", 6: "Sab", 7: "Dom"}
-        parts = [p.strip() for p in str(csv_nums).split(",")]
-        nums = sorted({int(p) for p in parts if p.isdigit() and int(p) in GIORNI_MAP})
-        return ", ".join(GIORNI_MAP[n] for n in nums) if nums else "-"
-
+        self.ui.tableInterventi.selectionModel().selectionChanged.connect(self.on_selection_changed)
 
+    def load_interventi(self):
+        # reset del model + prima pagina; le successive le chiede la view scorrendo (fetchMore)
+        self.model.reload()
+        if self.model.canFetchMore():
+            self.model.fetchMore()
 
-    def format_data(self, value) -> str:
-        if value is None:
-            return "-"
-
-        # se è già un date/datetime
-        if isinstance(value, (date, datetime)):
-            return value.strftime("%d-%m-%Y")
-
-        s = str(value).strip()
-        if not s or s == "-":
-            return "-"
-
-        # prende solo la parte data se arriva "YYYY-MM-DD HH:MM:SS"
-        s = s[:10]
-
-        try:
-            return datetime.strptime(s, "%Y-%m-%d").strftime("%d-%m-%Y")
-        except ValueError:
-            return str(value)  # fallback
-
-    def format_durata_hhmm(self, durata_ore) -> str:
-        if durata_ore is None or str(durata_ore).strip() in ("", "-"):
-            return "-"
+        self.ui.tableInterventi.clearSelection()
+        self.on_selection_changed()
 
-        try:
-            total_min = int(round(float(durata_ore) * 60))
-            h = total_min // 60
-            m = total_min % 60
-            return f"{h:02d}:{m:02d}"
-        except:
-            return "-"
+    def _mostra_riga(self, riga):
+        """Aggiorna/inserisce solo la riga toccata dal salvataggio, mantenendo lo scroll."""
+        if riga is None:
+            return
 
-    def format_periodo(self, periodo: str) -> str:
-        if not periodo:
-            return "-"
+        table = self.ui.tableInterventi
+        scroll = table.verticalScrollBar().value()
 
-        s = str(periodo).strip()
-        if not s or s == "-":
-            return "-"
+        pos = self.model.aggiorna_riga(riga)
+        if pos >= 0:
+            table.selectRow(pos)
 
-        # Estrae 2 date in formato YYYY-MM-DD da qualunque stringa
-        dates = re.findall(r"\d{4}-\d{2}-\d{2}", s)
-        if len(dates) >= 2:
-            return f"{self.format_data(dates[0])} → {self.format_data(dates[1])}"
+        table.verticalScrollBar().setValue(scroll)
+        self.on_selection_changed()
 
-        return s  # fallback (se già formattato o formato diverso)
+    def seleziona(self, tipo: str, id_ref: int) -> bool:
+        """Seleziona la riga (caricando le pagine successive se serve) e la porta in vista."""
+        i = self.model.trova(tipo, id_ref)
+        while i < 0 and not self.model.finito:
+            da = self.model.rowCount()
+            self.model.carica_pagina()
+            i = self.model.trova(tipo, id_ref, da)
+        if i < 0:
+            return False
 
-    def load_interventi(self):
         table = self.ui.tableInterventi
-        rows = get_interventi_misti()  # sqlite3.Row
-
-        table.setRowCount(len(rows))
+        table.selectRow(i)
+        table.scrollTo(self.model.index(i, 0), table.ScrollHint.PositionAtCenter)
+        return True
 
-        for r, row in enumerate(rows):
-            tipo = row["tipo"]
-
-            if tipo == "RICORRENTE":
-                giorni = self.format_giorni(row["giorni"])
-                data_fmt = "-"
-                periodo_fmt = self.format_periodo(row["periodo"])
-            else:
-                giorni = "-"
-                data_fmt = self.format_data(row["data"])
-                periodo_fmt = "-"
-
-            values = [
-                row["id_ref"],
-                row["tipo"],
-                row["cliente"],
-                row["servizio"],
-                row["dipendenti"],
-                data_fmt,
-                row["ora"],
-                self.format_durata_hhmm(row["durata"]),
-                giorni,
-                row["stato"],
-                periodo_fmt,
-            ]
-
-            for c, v in enumerate(values):
-                item = QTableWidgetItem("" if v is None else str(v))
-                item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                table.setItem(r, c, item)
-
-        table.clearSelection()
-        self.on_selection_changed()
+    def riga_corrente(self):
+        index = self.ui.tableInterventi.currentIndex()
+        if not index.isValid():
+            return None
+        return self.model.riga(index.row())
 
     def aggiungi_intervento(self):
         scelta = QMessageBox.question(
@@ -176,15 +134,14 @@ class InterventiSection:
 
         if scelta == QMessageBox.StandardButton.No:
             # RICORRENTE (solo regola, nessuna istanza generata)
-            dialog = RicorrenteDialog(parent=None)
+            dialog = RicorrenteDialog(parent=None, executor=self.ui.db_executor)
             if dialog.exec() != dialog.DialogCode.Accepted:
                 return
 
             dati = dialog.get_dati()
 
             try:
-                create_ricorrente(dati)
-                self.load_interventi()
+                self._mostra_riga(create_ricorrente(dati))
             except Exception as e:
                 import traceback
                 traceback.print_exc()
@@ -193,30 +150,28 @@ class InterventiSection:
             return
 
         # SINGOLO
-        dialog = InterventoDialog(parent=None)
+        dialog = InterventoDialog(parent=None, executor=self.ui.db_executor)
         if dialog.exec() != dialog.DialogCode.Accepted:
             return
 
         dati = dialog.get_dati()
 
         try:
-            create_intervento(dati)
-            self.load_interventi()
+            self._mostra_riga(create_intervento(dati))
         except Exception as e:
             import traceback
             traceback.print_exc()
             QMessageBox.critical(self.ui, "Errore", f"Errore durante il salvataggio dell'intervento:\n{e}")
 
     def modifica_intervento(self):
-        table = self.ui.tableInterventi
-        row = table.currentRow()
+        riga = self.riga_corrente()
 
-        if row < 0:
+        if riga is None:
             QMessageBox.warning(self.ui, "Modifica", "Seleziona prima una riga da modificare.")
             return
 
-        id_ref = int(table.item(row, 0).text())  # ID_REF (nascosta)
-        tipo = table.item(row, 1).text()  # TIPO (nascosta)
+        id_ref = riga.id_ref
+        tipo = riga.tipo
 
         # --- CASO 1: SINGOLO ---
         if tipo == "SINGOLO":
@@ -230,6 +185,7 @@ class InterventiSection:
             dip_ids = get_intervento_dipendenti_ids(intervento_id)
 
             dati_correnti = {
+                "id": intervento_id,
                 "cliente_id": it["cliente_id"],
                 "servizio_id": it["servizio_id"],
                 "data": it["data"],
@@ -240,7 +196,7 @@ class InterventiSection:
                 "dipendente_ids": dip_ids
             }
 
-            dialog = InterventoDialog(parent=None, intervento=dati_correnti)
+            dialog = InterventoDialog(parent=None, intervento=dati_correnti, executor=self.ui.db_executor)
             if dialog.exec() != dialog.DialogCode.Accepted:
                 return
 
@@ -264,8 +220,7 @@ class InterventiSection:
                 return
 
             try:
-                update_intervento(intervento_id, nuovi_dati)
-                self.load_interventi()
+                self._mostra_riga(update_intervento(intervento_id, nuovi_dati))
             except Exception as e:
                 import traceback
                 traceback.print_exc()
@@ -283,17 +238,20 @@ class InterventiSection:
                 return
 
             dati_correnti = {
+                "id": ricorrente_id,
                 "cliente_id": r["cliente_id"],
                 "servizio_id": r["servizio_id"],
                 "ora_inizio": r["ora_inizio"],
                 "durata_ore": r["durata_ore"],
                 "note": r["note"],
                 "attivo": r["attivo"],
+                "data_inizio": r["data_inizio"],
+                "data_fine": r["data_fine"],
                 "giorni_settimana": get_ricorrente_giorni(ricorrente_id),
                 "dipendente_ids": get_ricorrente_dipendenti_ids(ricorrente_id),
             }
 
-            dialog = RicorrenteDialog(parent=None, ricorrente=dati_correnti)
+            dialog = RicorrenteDialog(parent=None, ricorrente=dati_correnti, executor=self.ui.db_executor)
             if dialog.exec() != dialog.DialogCode.Accepted:
                 return
 
@@ -323,24 +281,31 @@ class InterventiSection:
                 return
 
             try:
-                update_ricorrente(ricorrente_id, nuovi)
-                self.load_interventi()
+                self._mostra_riga(update_ricorrente(ricorrente_id, nuovi))
             except Exception as e:
                 import traceback
                 traceback.print_exc()
                 QMessageBox.critical(self.ui, "Errore", f"Errore durante la modifica del ricorrente:\n{e}")
             return
 
+    def assegna_automaticamente(self):
+        dialog = AssegnazioneDialog(parent=None, executor=self.ui.db_executor)
+        if dialog.exec() != dialog.DialogCode.Accepted:
+            return
+
+        # cambiano i dipendenti di molte righe sparse: si ricarica la lista
+        self.load_interventi()
+        QMessageBox.information(self.ui, "Assegnazione", f"{dialog.applicate} assegnazioni salvate.")
+
     def elimina_intervento(self):
-        table = self.ui.tableInterventi
-        row = table.currentRow()
+        riga = self.riga_corrente()
 
-        if row < 0:
+        if riga is None:
             QMessageBox.warning(self.ui, "Elimina", "Seleziona prima una riga da eliminare.")
             return
 
-        id_ref = int(table.item(row, 0).text())  # ID_REF (nascosta)
-        tipo = table.item(row, 1).text()  # TIPO (nascosta)
+        id_ref = riga.id_ref
+        tipo = riga.tipo
 
         msg = "Sei sicuro di voler eliminare questo elemento?"
         if tipo == "RICORRENTE":
@@ -366,14 +331,15 @@ class InterventiSection:
                 QMessageBox.warning(self.ui, "Errore", f"Tipo non riconosciuto: {tipo}")
                 return
 
-            self.load_interventi()
+            self.model.rimuovi(tipo, id_ref)
+            self.on_selection_changed()
 
         except Exception as e:
             import traceback
             traceback.print_exc()
             QMessageBox.critical(self.ui, "Errore", f"Errore durante l'eliminazione:\n{e}")
 
-    def on_selection_changed(self):
-        ha_selezione = self.ui.tableInterventi.currentRow() >= 0
+    def on_selection_changed(self, *args):
+        ha_selezione = self.ui.tableInterventi.selectionModel().hasSelection()
         self.ui.btnInterventiModifica.setEnabled(ha_selezione)
         self.ui.btnInterventiElimina.setEnabled(ha_selezione)
@@ -1,13 +1,23 @@
 import os
-from PyQt6.QtWidgets import QMainWindow
-from PyQt6.uic import loadUi
-from PyQt6.QtGui import QPixmap
+from datetime import date
+
+from PyQt6.QtCore import Qt, QTimer, QModelIndex
+from PyQt6.QtWidgets import QMainWindow, QCompleter
+from PyQt6.QtGui import QPixmap, QStandardItemModel, QStandardItem
+
+from database.repositories.ricerca_repo import cerca
+from database.repositories.ricorrenti_repo import rinnova_ricorrenti_scaduti
+from services.avvio import cronometro
+from services.calendario import eventi_mese
+from windows.async_db import QueryExecutor
+from windows.ui_cache import carica_ui
 
 from windows.dipendenti_section import DipendentiSection
 from windows.clienti_section import ClientiSection
 from windows.servizi_section import ServiziSection
 from windows.interventi_section import InterventiSection
 from windows.calendario_section import CalendarioSection
+from windows.report_section import ReportSection
 
 
 class MainWindow(QMainWindow):
@@ -17,8 +27,8 @@ class MainWindow(QMainWindow):
 
 
         base_dir = os.path.dirname(os.path.dirname(__file__))
-        ui_path = os.path.join(base_dir, "ui", "main_window.ui")
-        loadUi(ui_path, self)
+        # modulo compilato da ui/main_window.ui (ricompilato solo se il .ui cambia)
+        carica_ui("main_window", self)
 
         # --- LOGO ---
         logo_path = os.path.join(base_dir, "assets", "logo_brilance.png")
@@ -32,7 +42,8 @@ class MainWindow(QMainWindow):
             self.btnAreaDipendenti,
             self.btnAreaServizi,
             self.btnAreaInterventi,
-            self.btnCalendario
+            self.btnCalendario,
+            self.btnReport
         ]
         for btn in self.btn_list:
             btn.setCheckable(True)
@@ -43,16 +54,28 @@ class MainWindow(QMainWindow):
         self.btnAreaServizi.clicked.connect(lambda: self.select_section(2, self.btnAreaServizi))
         self.btnAreaInterventi.clicked.connect(lambda: self.select_section(3, self.btnAreaInterventi))
         self.btnCalendario.clicked.connect(lambda: self.select_section(4, self.btnCalendario))
+        # pagina 5 = dettaglio giorno del calendario (senza pulsante)
+        self.btnReport.clicked.connect(lambda: self.select_section(6, self.btnReport))
+
+        # Query in background: le sezioni caricano i dati senza bloccare la GUI
+        self.db_executor = QueryExecutor(self)
+        self._caricamenti = set()
+        self.db_executor.caricamento.connect(self.on_caricamento)
+
+        # Sezioni: costruite alla prima visita (vedi sezione())
+        self.clienti_section = None
+        self.dipendenti_section = None
+        self.servizi_section = None
+        self.interventi_section = None
+        self.calendario_section = None
+        self.report_section = None
+        self._primo_frame = False
 
-        # Sezioni
-        self.clienti_section = ClientiSection(self)
-        self.dipendenti_section = DipendentiSection(self)
-        self.servizi_section = ServiziSection(self)
-        self.interventi_section = InterventiSection(self)
-        self.calendario_section = CalendarioSection(self)
+        self.setup_ricerca()
 
         # Imposto la pagina iniziale e il pulsante selezionato
         self.select_section(0, self.btnAreaClienti)
+        cronometro.segna("MainWindow costruita")
 
     # ---------- METODI DI SUPPORTO ----------
 
@@ -60,12 +83,146 @@ class MainWindow(QMainWindow):
         for btn in self.btn_list:
             btn.setChecked(False)
 
+    # indice pagina -> (attributo, classe della sezione)
+    SEZIONI = {
+        0: ("clienti_section", ClientiSection),
+        1: ("dipendenti_section", DipendentiSection),
+        2: ("servizi_section", ServiziSection),
+        3: ("interventi_section", InterventiSection),
+        4: ("calendario_section", CalendarioSection),
+        6: ("report_section", ReportSection),
+    }
+
+    def sezione(self, index):
+        """Restituisce la sezione della pagina, costruendola (e caricandone i dati) al primo uso."""
+        attr, cls = self.SEZIONI[index]
+        sec = getattr(self, attr)
+        if sec is None:
+            sec = cls(self)
+            setattr(self, attr, sec)
+            cronometro.segna(f"sezione {attr}")
+            return sec, True
+        return sec, False
+
     def select_section(self, index, btn):
         self.uncheck_all()
         btn.setChecked(True)
-        self.stackedContent.setCurrentIndex(index)
-
-        if index == 4:
-            self.calendario_section.refresh_calendar()
 
+        sec, nuova = self.sezione(index)
+        self.stackedContent.setCurrentIndex(index)
 
+        # appena costruito il calendario è già aggiornato
+        if index == 4 and not nuova:
+            sec.refresh_calendar()
+        elif index == 6 and not nuova:
+            sec.load_report()  # i dati possono essere cambiati; le settimane valide sono in cache
+
+    # ---------- AVVIO DIFFERITO ----------
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self._primo_frame:
+            self._primo_frame = True
+            # parte dopo il primo paint (l'UpdateRequest è già in coda)
+            QTimer.singleShot(0, self.avvio_differito)
+
+    def avvio_differito(self):
+        cronometro.segna("primo frame")
+
+        # lavoro non urgente, nei worker: rinnovo dei ricorrenti scaduti e poi
+        # prefetch del mese corrente (dopo, così espande le regole già rinnovate)
+        self.db_executor.submit("rinnovo_ricorrenti", rinnova_ricorrenti_scaduti,
+                                on_done=self._on_rinnovo, on_error=lambda e: self._on_rinnovo(0))
+
+    def _on_rinnovo(self, rinnovati):
+        cronometro.segna("rinnovo ricorrenti")
+        if rinnovati:
+            if self.interventi_section is not None:
+                self.interventi_section.load_interventi()
+            if self.calendario_section is not None:
+                self.calendario_section.refresh_calendar()
+
+        oggi = date.today()
+        self.db_executor.submit("prefetch_calendario", eventi_mese, oggi.year, oggi.month,
+                                on_done=lambda _: self._fine_avvio(),
+                                on_error=lambda e: self._fine_avvio())
+
+    def _fine_avvio(self):
+        cronometro.segna("prefetch calendario")
+        if os.environ.get("GESTIONE_CRONOMETRO"):
+            print(cronometro.report())
+
+    def on_caricamento(self, chiave: str, in_corso: bool):
+        # stato di caricamento "leggero": un messaggio in statusbar finché c'è una query in corso
+        if chiave.startswith("prefetch"):
+            return  # i prefetch in background non interessano all'utente
+        if in_corso:
+            self._caricamenti.add(chiave)
+        else:
+            self._caricamenti.discard(chiave)
+
+        if self._caricamenti:
+            self.statusBar().showMessage("Caricamento...")
+        else:
+            self.statusBar().clearMessage()
+
+    def closeEvent(self, event):
+        self.db_executor.attendi(2000)
+        super().closeEvent(event)
+
+    # ---------- RICERCA RAPIDA ----------
+
+    def setup_ricerca(self):
+        # i risultati compaiono nel popup del completer; la query parte dopo una breve pausa di digitazione
+        self._ricerca_model = QStandardItemModel(self)
+        self._completer = QCompleter(self._ricerca_model, self)
+        self._completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self._completer.activated[QModelIndex].connect(self._apri_risultato)
+        self.txtRicerca.setCompleter(self._completer)
+
+        self._ricerca_timer = QTimer(self)
+        self._ricerca_timer.setSingleShot(True)
+        self._ricerca_timer.setInterval(150)
+        self._ricerca_timer.timeout.connect(self.esegui_ricerca)
+
+        self.txtRicerca.textEdited.connect(lambda _: self._ricerca_timer.start())
+        self.txtRicerca.returnPressed.connect(self._apri_primo_risultato)
+
+    def esegui_ricerca(self):
+        self._ricerca_model.clear()
+        for r in cerca(self.txtRicerca.text()):
+            testo = f"{r.titolo} ({r.tipo})"
+            if r.dettaglio:
+                testo += f" - {r.dettaglio}"
+            item = QStandardItem(testo)
+            item.setData((r.tipo, r.id), Qt.ItemDataRole.UserRole)
+            self._ricerca_model.appendRow(item)
+
+        if self._ricerca_model.rowCount():
+            self._completer.complete()
+
+    def _apri_primo_risultato(self):
+        self._ricerca_timer.stop()
+        self.esegui_ricerca()
+        if self._ricerca_model.rowCount():
+            self._apri_risultato(self._ricerca_model.index(0, 0))
+
+    def _apri_risultato(self, index):
+        tipo, ref = index.data(Qt.ItemDataRole.UserRole)
+        self._completer.popup().hide()
+        self.vai_a(tipo, ref)
+
+    def vai_a(self, tipo: str, ref: int):
+        """Apre la sezione del risultato e ne seleziona la riga."""
+        if tipo == "cliente":
+            self.select_section(0, self.btnAreaClienti)
+            self.clienti_section.seleziona(ref)
+        elif tipo == "dipendente":
+            self.select_section(1, self.btnAreaDipendenti)
+            self.dipendenti_section.seleziona(ref)
+        elif tipo == "servizio":
+            self.select_section(2, self.btnAreaServizi)
+            self.servizi_section.seleziona(ref)
+        else:
+            self.select_section(3, self.btnAreaInterventi)
+            self.interventi_section.seleziona("SINGOLO" if tipo == "intervento" else "RICORRENTE", ref)
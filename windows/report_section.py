@@ -0,0 +1,154 @@
+from datetime import date, timedelta
+
+from PyQt6.QtCore import Qt, QDate
+from PyQt6.QtGui import QColor, QBrush
+from PyQt6.QtWidgets import (
+    QLabel, QDateEdit, QPushButton, QHeaderView, QAbstractItemView, QTableWidgetItem,
+    QFileDialog, QMessageBox
+)
+
+from dialogs.esporta_dialog import EsportaDialog
+from dialogs.fatturazione_dialog import FatturazioneDialog
+from services.calendario_ics import aggiorna_feed
+from services.carichi import report_carichi
+
+
+class ReportSection:
+    """
+    Pagina "Report carichi": ore pianificate per dipendente e settimana ISO contro le
+    ore_settimanali del contratto. Il calcolo (services.carichi, in cache per settimana)
+    gira nel worker; qui si riempie solo la tabella.
+    """
+
+    COLORI = {
+        "sopra": QBrush(QColor("#FECACA")),   # oltre il contratto
+        "sotto": QBrush(QColor("#FEF3C7")),   # sotto-allocato
+        "ok": QBrush(QColor("#DCFCE7")),
+    }
+    COLONNE_FISSE = ["ID", "Dipendente", "Contratto"]
+
+    def __init__(self, ui):
+        self.ui = ui
+        self.report = None
+        self.setup_filtri()
+        self.setup_table()
+        self.load_report()
+
+    # ---------------- FILTRI ----------------
+    def setup_filtri(self):
+        oggi = date.today()
+        lunedi = oggi - timedelta(days=oggi.weekday())
+
+        self.dateDa = QDateEdit(QDate(lunedi.year, lunedi.month, lunedi.day))
+        fine = lunedi + timedelta(weeks=52, days=-1)
+        self.dateA = QDateEdit(QDate(fine.year, fine.month, fine.day))
+        for d in (self.dateDa, self.dateA):
+            d.setCalendarPopup(True)
+            d.setDisplayFormat("dd-MM-yyyy")
+
+        self.btnAggiorna = QPushButton("Aggiorna")
+        self.btnAggiorna.clicked.connect(self.load_report)
+        self.btnFatturazione = QPushButton("Fatturazione mensile…")
+        self.btnFatturazione.clicked.connect(self.apri_fatturazione)
+        self.btnEsporta = QPushButton("Esporta dati…")
+        self.btnEsporta.clicked.connect(self.apri_esportazione)
+        self.btnCalendari = QPushButton("Calendari .ics…")
+        self.btnCalendari.clicked.connect(self.aggiorna_calendari)
+        self.lblLegenda = QLabel("Rosso: oltre il contratto · Giallo: sotto l'80% · Verde: in linea")
+
+        # barra nel widget_report del .ui: stesso stile dei pulsanti delle altre pagine
+        filtri = self.ui.widget_report.layout()
+        filtri.addWidget(QLabel("Dal:"))
+        filtri.addWidget(self.dateDa)
+        filtri.addWidget(QLabel("al:"))
+        filtri.addWidget(self.dateA)
+        filtri.addWidget(self.btnAggiorna)
+        filtri.addStretch()
+        filtri.addWidget(self.lblLegenda)
+        filtri.addWidget(self.btnFatturazione)
+        filtri.addWidget(self.btnEsporta)
+        filtri.addWidget(self.btnCalendari)
+
+    def setup_table(self):
+        table = self.ui.tableReport
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        table.setWordWrap(False)
+        table.setStyleSheet(self.ui.tableClienti.styleSheet())
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+
+    def apri_fatturazione(self):
+        FatturazioneDialog(parent=None, executor=self.ui.db_executor).exec()
+
+    def apri_esportazione(self):
+        EsportaDialog(parent=None, executor=self.ui.db_executor).exec()
+
+    def aggiorna_calendari(self):
+        # un .ics per dipendente nella cartella scelta (es. condivisa o sincronizzata)
+        cartella = QFileDialog.getExistingDirectory(self.ui, "Cartella dei calendari")
+        if not cartella:
+            return
+
+        def fatto(esito):
+            self.btnCalendari.setEnabled(True)
+            QMessageBox.information(self.ui, "Calendari", esito.riepilogo() + ".")
+
+        def errore(e):
+            self.btnCalendari.setEnabled(True)
+            QMessageBox.critical(self.ui, "Errore", f"Errore durante la generazione dei calendari:\n{e}")
+
+        self.btnCalendari.setEnabled(False)
+        self.ui.db_executor.submit("calendari_ics", aggiorna_feed, cartella, on_done=fatto, on_error=errore)
+
+    # ---------------- DATI ----------------
+    def load_report(self):
+        da = self.dateDa.date().toPyDate()
+        a = self.dateA.date().toPyDate()
+        if a < da:
+            da, a = a, da
+        self.ui.db_executor.submit("report_carichi", report_carichi, da, a, on_done=self._popola)
+
+    def _popola(self, report):
+        self.report = report
+        table = self.ui.tableReport
+        n_sett = len(report.settimane)
+
+        table.setUpdatesEnabled(False)
+        try:
+            table.clear()
+            table.setColumnCount(len(self.COLONNE_FISSE) + n_sett + 1)
+            table.setHorizontalHeaderLabels(
+                self.COLONNE_FISSE
+                + [f"S{s:02d}\n{report.lunedi(i):%d/%m}" for i, (_, s) in enumerate(report.settimane)]
+                + ["Totale"]
+            )
+            table.setColumnHidden(0, True)
+            table.setRowCount(len(report.righe))
+
+            for r, riga in enumerate(report.righe):
+                contratto = "-" if riga.ore_contratto is None else f"{riga.ore_contratto:g}"
+                for c, v in enumerate((riga.dipendente_id, riga.nome, contratto)):
+                    table.setItem(r, c, QTableWidgetItem(str(v)))
+
+                for i, ore in enumerate(riga.ore):
+                    item = QTableWidgetItem(f"{ore:.1f}" if ore else "")
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+                    colore = self.COLORI.get(riga.stato(i))
+                    if colore is not None:
+                        item.setBackground(colore)
+                    if riga.ore_contratto:
+                        item.setToolTip(f"{ore:.1f} h su {riga.ore_contratto:g} h di contratto")
+                    table.setItem(r, len(self.COLONNE_FISSE) + i, item)
+
+                totale = QTableWidgetItem(f"{riga.totale:.1f}")
+                totale.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+                table.setItem(r, len(self.COLONNE_FISSE) + n_sett, totale)
+
+            table.setColumnWidth(1, 200)
+            for c in range(len(self.COLONNE_FISSE) - 1, table.columnCount()):
+                if c != 1:
+                    table.setColumnWidth(c, 64)
+        finally:
+            table.setUpdatesEnabled(True)
@@ -1,13 +1,15 @@
 from PyQt6.QtWidgets import QHeaderView, QAbstractItemView, QTableWidgetItem, QMessageBox
 
-from database.database import get_connection
 from models.servizi import Servizio
 from dialogs.servizio_dialog import ServizioDialog
+from widgets.table_rows import upsert_row, remove_row, select_row_by_id
+from widgets.import_csv import aggiungi_pulsante_import
 
 
 class ServiziSection:
     def __init__(self, ui):
         self.ui = ui
+        self._da_selezionare = None  # id da selezionare quando arriva il caricamento
         self.setup_table()
         self.setup_signals()
         self.load_servizi()
@@ -44,25 +46,53 @@ class ServiziSection:
         self.ui.btnServiziModifica.clicked.connect(self.modifica_servizio)
         self.ui.btnServiziElimina.clicked.connect(self.elimina_servizio)
 
+        # import in blocco da CSV, accanto a Elimina
+        self.btnImporta = aggiungi_pulsante_import(self.ui, self.ui.btnServiziElimina, "servizi", self.load_servizi)
+
         self.ui.tableServizi.itemSelectionChanged.connect(self.on_selection_changed)
 
     def load_servizi(self):
-        table = self.ui.tableServizi
-        servizi = Servizio.all()
+        self.ui.db_executor.submit("servizi", Servizio.all, on_done=self._popola_servizi)
 
+    def _popola_servizi(self, servizi):
+        table = self.ui.tableServizi
         table.setRowCount(len(servizi))
 
         for row_idx, s in enumerate(servizi):
-            table.setItem(row_idx, 0, QTableWidgetItem(str(s.id)))
-            table.setItem(row_idx, 1, QTableWidgetItem(s.nome))
-            table.setItem(row_idx, 2, QTableWidgetItem(s.descrizione or ""))
-            table.setItem(row_idx, 3, QTableWidgetItem("" if s.prezzo_mensile is None else f"{s.prezzo_mensile:.2f}"))
+            self._fill_row(row_idx, s)
 
         table.clearSelection()
         self.on_selection_changed()
 
-    def _norm(self, s: str) -> str:
-        return " ".join(s.strip().split()).lower()
+        if self._da_selezionare is not None:
+            select_row_by_id(table, self._da_selezionare)
+            self._da_selezionare = None
+
+    def seleziona(self, servizio_id: int):
+        """Seleziona la riga (es. dalla ricerca); se la tabella è ancora in caricamento, all'arrivo dei dati."""
+        if self.ui.db_executor.in_corso("servizi"):
+            self._da_selezionare = servizio_id
+        else:
+            select_row_by_id(self.ui.tableServizi, servizio_id)
+
+    def _fill_row(self, row_idx: int, s: Servizio):
+        table = self.ui.tableServizi
+        table.setItem(row_idx, 0, QTableWidgetItem(str(s.id)))
+        table.setItem(row_idx, 1, QTableWidgetItem(s.nome))
+        table.setItem(row_idx, 2, QTableWidgetItem(s.descrizione or ""))
+        table.setItem(row_idx, 3, QTableWidgetItem("" if s.prezzo_mensile is None else f"{s.prezzo_mensile:.2f}"))
+
+    def _sort_key(self, row_idx: int) -> tuple:
+        # stesso ordinamento di Servizio.all(): nome
+        return (self.ui.tableServizi.item(row_idx, 1).text(),)
+
+    def _upsert_servizio(self, s: Servizio):
+        # aggiorno solo la riga interessata (niente reload della tabella)
+        upsert_row(
+            self.ui.tableServizi, s.id, (s.nome,),
+            self._sort_key, lambda row_idx: self._fill_row(row_idx, s)
+        )
+        self.on_selection_changed()
 
     def aggiungi_servizio(self):
         dialog = ServizioDialog(parent=None)
@@ -93,22 +123,14 @@ class ServiziSection:
             QMessageBox.warning(self.ui, "Dato non valido", "Inserisci un prezzo mensile valido (> 0).")
             return
 
-        # 3) duplicati (robusto)
-        conn = get_connection()
-        cur = conn.cursor()
-        nome_n = self._norm(dati["nome"])
-
-        cur.execute(
-            "SELECT 1 FROM servizi WHERE lower(trim(nome)) = ? LIMIT 1",
-            (nome_n,)
-        )
-        if cur.fetchone():
+        # 3) duplicati (chiave normalizzata, indicizzata)
+        if Servizio.esiste(dati["nome"]):
             QMessageBox.warning(self.ui, "Servizio esistente", "Esiste già un servizio con lo stesso nome.")
             return
 
         try:
-            Servizio.create(dati)
-            self.load_servizi()
+            s = Servizio.create(dati)
+            self._upsert_servizio(s)
         except Exception as e:
             import traceback
             traceback.print_exc()
@@ -157,23 +179,17 @@ class ServiziSection:
             return
 
         # 3) duplicati (escludo me stesso)
-        conn = get_connection()
-        cur = conn.cursor()
-        nome_n = self._norm(nuovi_dati["nome"])
-
-        cur.execute(
-            "SELECT 1 FROM servizi WHERE lower(trim(nome)) = ? AND id != ? LIMIT 1",
-            (nome_n, servizio_id)
-        )
-        if cur.fetchone():
+        if Servizio.esiste(nuovi_dati["nome"], escludi_id=servizio_id):
             QMessageBox.warning(self.ui, "Servizio esistente", "Esiste già un servizio con lo stesso nome.")
             return
 
         try:
-            Servizio.update(servizio_id, nuovi_dati)
-            self.load_servizi()
-            if hasattr(self.ui, "interventi_section"):
-                self.ui.interventi_section.load_interventi()
+            s = Servizio.update(servizio_id, nuovi_dati)
+            self._upsert_servizio(s)
+
+            # il nome del servizio compare anche nelle righe degli interventi già caricate
+            if self.ui.interventi_section is not None:
+                self.ui.interventi_section.model.aggiorna_servizio(s.id, s.nome)
 
         except Exception as e:
             import traceback
@@ -190,19 +206,13 @@ class ServiziSection:
 
         servizio_id = int(table.item(row, 0).text())
 
-        conn = get_connection()
-        cur = conn.cursor()
-
-        # blocco se associato a interventi
-        cur.execute("SELECT 1 FROM interventi WHERE servizio_id = ? LIMIT 1", (servizio_id,))
-        if cur.fetchone():
+        # blocco se associato a interventi o ricorrenti
+        uso = Servizio.in_uso(servizio_id)
+        if uso == "intervento":
             QMessageBox.warning(self.ui, "Impossibile eliminare",
                                 "Non puoi eliminare il servizio perché è associato ad almeno un intervento.")
             return
-
-        # blocco se associato a ricorrenti
-        cur.execute("SELECT 1 FROM interventi_ricorrenti WHERE servizio_id = ? LIMIT 1", (servizio_id,))
-        if cur.fetchone():
+        if uso == "ricorrente":
             QMessageBox.warning(self.ui, "Impossibile eliminare",
                                 "Non puoi eliminare il servizio perché è associato ad almeno un intervento ricorrente.")
             return
@@ -218,7 +228,8 @@ class ServiziSection:
 
         try:
             Servizio.delete(servizio_id)
-            self.load_servizi()
+            remove_row(self.ui.tableServizi, servizio_id)
+            self.on_selection_changed()
         except Exception as e:
             import traceback
             traceback.print_exc()
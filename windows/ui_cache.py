@@ -0,0 +1,149 @@
+"""
+Cache dei file .ui compilati in moduli Python (pyuic).
+
+loadUi a ogni avvio legge l'XML e costruisce i widget per reflection. Qui ogni .ui viene
+compilato una volta in ui/_compilati/ui_<nome>.py e poi semplicemente importato.
+La cache è valida se mtime e dimensione del .ui coincidono con il manifest; se non
+coincidono si confronta lo sha256 (es. dopo un checkout che tocca il file senza cambiarlo).
+Se il .ui è cambiato si ricompila; se la compilazione non riesce si usa loadUi.
+
+Per (ri)compilare tutto in anticipo, ad esempio prima di distribuire l'app:
+
+    python -m windows.ui_cache
+"""
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import sys
+import traceback
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UI_DIR = os.path.join(BASE_DIR, "ui")
+CACHE_DIR = os.path.join(UI_DIR, "_compilati")
+MANIFEST = os.path.join(CACHE_DIR, "manifest.json")
+
+_moduli = {}  # nome -> modulo compilato già importato in questo processo
+
+
+def _percorso_ui(nome: str) -> str:
+    return os.path.join(UI_DIR, f"{nome}.ui")
+
+
+def _percorso_py(nome: str) -> str:
+    return os.path.join(CACHE_DIR, f"ui_{nome}.py")
+
+
+def _sha256(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _leggi_manifest() -> dict:
+    try:
+        with open(MANIFEST, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _scrivi_manifest(manifest: dict):
+    tmp = MANIFEST + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, MANIFEST)
+
+
+def cache_valida(nome: str, manifest: dict | None = None) -> bool:
+    manifest = _leggi_manifest() if manifest is None else manifest
+    voce = manifest.get(nome)
+    if not voce or not os.path.exists(_percorso_py(nome)):
+        return False
+
+    st = os.stat(_percorso_ui(nome))
+    if voce["mtime_ns"] == st.st_mtime_ns and voce["size"] == st.st_size:
+        return True
+
+    # mtime cambiato: decide il contenuto
+    if voce["sha256"] != _sha256(_percorso_ui(nome)):
+        return False
+    voce["mtime_ns"], voce["size"] = st.st_mtime_ns, st.st_size
+    manifest[nome] = voce
+    _scrivi_manifest(manifest)
+    return True
+
+
+def compila(nome: str):
+    """Compila ui/<nome>.ui in ui/_compilati/ui_<nome>.py e aggiorna il manifest."""
+    from PyQt6.uic import compileUi
+
+    ui_path = _percorso_ui(nome)
+    out = io.StringIO()
+    with open(ui_path, encoding="utf-8") as f:
+        compileUi(f, out)
+
+    # il .qrc non viene compilato (PyQt6 non ha pyrcc) e il .ui non usa risorse ":/":
+    # l'import di resources_rc generato da pyuic fallirebbe
+    codice = "\n".join(r for r in out.getvalue().splitlines() if r.strip() != "import resources_rc")
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = _percorso_py(nome) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(codice + "\n")
+    os.replace(tmp, _percorso_py(nome))
+
+    st = os.stat(ui_path)
+    manifest = _leggi_manifest()
+    manifest[nome] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": _sha256(ui_path)}
+    _scrivi_manifest(manifest)
+    _moduli.pop(nome, None)
+
+
+def _importa(nome: str):
+    if nome not in _moduli:
+        spec = importlib.util.spec_from_file_location(f"ui_{nome}", _percorso_py(nome))
+        modulo = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(modulo)
+        _moduli[nome] = modulo
+    return _moduli[nome]
+
+
+def _classe_ui(modulo):
+    return next(v for k, v in vars(modulo).items() if k.startswith("Ui_") and isinstance(v, type))
+
+
+def carica_ui(nome: str, widget):
+    """
+    Equivalente di loadUi("ui/<nome>.ui", widget): costruisce i widget dentro `widget`
+    e li espone come attributi (widget.tableClienti, ...), usando il modulo compilato.
+    """
+    try:
+        if not cache_valida(nome):
+            compila(nome)
+        form = _classe_ui(_importa(nome))()
+    except Exception:
+        # cache non scrivibile o compilazione fallita: si torna al parsing a runtime
+        traceback.print_exc()
+        from PyQt6.uic import loadUi
+        loadUi(_percorso_ui(nome), widget)
+        return widget
+
+    form.setupUi(widget)
+
+    # come loadUi: i figli diventano attributi del widget
+    for attr, valore in vars(form).items():
+        setattr(widget, attr, valore)
+    return widget
+
+
+def main() -> int:
+    nomi = sorted(f[:-3] for f in os.listdir(UI_DIR) if f.endswith(".ui"))
+    for nome in nomi:
+        compila(nome)
+        print(f"compilato ui/{nome}.ui -> {os.path.relpath(_percorso_py(nome), BASE_DIR)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())